@@ -2,11 +2,15 @@
 Run 50 hybrid searches on pdf_chunks and report p50 (median) and p95 latency in ms.
 
 Usage (from project root):
-  uv run python complex_pdf_test/audit/benchmark_hybrid_latency.py
+  uv run python complex_pdf_test/audit/benchmark_hybrid_latency.py [--label TEXT] [--no-save]
+
+The run (raw samples, settings hash, corpus size, environment) is saved to the results
+store; compare runs with complex_pdf_test/results/compare.py.
 
 Requires: Meilisearch running with pdf_chunks index populated (run_pipeline.py --load).
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
@@ -20,6 +24,7 @@ load_dotenv(PROJECT_ROOT / ".env")
 
 import meilisearch
 from config import load_settings
+from complex_pdf_test.results import latency_summary, new_run, save_run
 
 PDF_INDEX = "pdf_chunks"
 NUM_REQUESTS = 50
@@ -28,6 +33,11 @@ QUERY = "architecture Mixtral experts routing"
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--label", default="", help="Free-text label stored with the run (e.g. 'v1.16 upgrade')")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the run to the results store")
+    args = parser.parse_args()
+
     settings = load_settings()
     client = meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key or "")
     index = client.index(PDF_INDEX)
@@ -46,11 +56,8 @@ def main() -> None:
         t1 = time.perf_counter()
         latencies_ms.append((t1 - t0) * 1000)
 
-    latencies_ms.sort()
-    p50 = latencies_ms[len(latencies_ms) // 2]
-    p95_idx = int(len(latencies_ms) * 0.95)
-    p95 = latencies_ms[p95_idx] if p95_idx < len(latencies_ms) else latencies_ms[-1]
-    mean_ms = sum(latencies_ms) / len(latencies_ms)
+    summary = latency_summary(latencies_ms)
+    mean_ms, p50, p95 = summary["mean"], summary["p50"], summary["p95"]
 
     print(f"Hybrid search latency (index: {PDF_INDEX}, {NUM_REQUESTS} requests)")
     print(f"  Query: {QUERY!r}")
@@ -60,6 +67,17 @@ def main() -> None:
     print()
     print(f"→ Due diligence one-liner: \"{mean_ms:.0f} ms average (p50 {p50:.0f} ms) for hybrid search on a complex document — includes Mistral embedder round-trip.\"")
 
+    if not args.no_save:
+        run = new_run(
+            "hybrid_latency",
+            index_uid=PDF_INDEX,
+            label=args.label,
+            client=client,
+            latencies_ms=latencies_ms,
+            extra={"query": QUERY},
+        )
+        print(f"Saved run {run.run_id} → {save_run(run)}")
+
 
 if __name__ == "__main__":
     main()
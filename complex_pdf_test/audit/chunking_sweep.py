@@ -0,0 +1,415 @@
+"""
+Chunking sweep: cost and retrieval quality of max_chars / overlap, end to end.
+
+run_pipeline chunks with --max-chars 1200 --overlap 120. These two numbers set the chunk
+count, hence the embedding calls and tokens, the index size and the search latency, and
+they decide whether the passage that answers a question lands whole in one chunk. This
+re-chunks a corpus over a grid of (max_chars, overlap) with the pipeline's chunk_text and
+records, per configuration:
+  - cost      chunks, embedded tokens (the embedder's documentTemplate, first 50 words +
+              section, CHARS_PER_TOKEN estimate), NDJSON payload bytes, raw vector bytes,
+  - quality   recall@k over a labelled query set: each query lists short evidence strings;
+              an evidence counts as retrieved when one of the top-k chunks contains it
+              (case and whitespace insensitive). Chunk ids differ between configurations,
+              evidence text does not. "coverage" is the share of evidence that is whole in
+              some chunk at all (a boundary can cut it; overlap is what repairs that), and
+              "embedded" the share that is whole in the text the embedder sees,
+  - latency   offline: BM25 over the chunks in process (ranking only, the timings are not
+              Meilisearch's). With --server: each configuration is loaded into a scratch
+              index (chunkopt_<max>_<overlap>, deleted afterwards unless --keep-indexes),
+              and ingestion time, usedDatabaseSize growth, search latency and recall come
+              from the server (hybrid with the Mistral embedder, or --keyword-only).
+
+Configurations not dominated on (recall ↑, embedded ↑, embedded tokens ↓, index bytes ↓,
+and p95 latency ↓ with --server) form the Pareto front. The recommendation is the front's
+configuration with the fewest embedded tokens whose recall is within --recall-tolerance of
+the best recall.
+
+The documentTemplate truncates chunk_text to 50 words, so the vector of a long chunk only
+sees its beginning: past a few hundred characters, larger chunks stop costing more
+embedding tokens per chunk but their tail is reachable by keywords only. Offline BM25
+cannot see that; "embedded" is the offline stand-in, --server measures it.
+
+Corpus: --text (markdown / text files), --pdf (parsed once with Docling, markdown cached in
+the output directory), default: the text of mistral-doc.chunks.json with the chunk overlaps
+removed (an approximation of the parsed markdown). Queries: fixtures/chunking_queries.json
+(JSON list of {"query", "evidence": [...]}).
+
+Usage (from project root):
+  uv run python complex_pdf_test/audit/chunking_sweep.py
+  uv run python complex_pdf_test/audit/chunking_sweep.py --max-chars 600,1200,2000 --overlaps 0,120 --server
+  uv run python complex_pdf_test/audit/chunking_sweep.py --pdf complex_pdf_test/mistral-doc.pdf --queries my_queries.json -k 3
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from complex_pdf_test.chat.rag_chat import estimate_tokens
+from complex_pdf_test.load.serialize import encode_document
+from complex_pdf_test.pipeline import build_documents, chunk_text, normalize_text
+from complex_pdf_test.results import latency_summary
+
+LOG_PREFIX = "[chunking_sweep]"
+OUT_DIR = Path(__file__).resolve().parent / "sweeps"
+SEED_CHUNKS = PROJECT_ROOT / "complex_pdf_test" / "mistral-doc.chunks.json"
+QUERIES_PATH = PROJECT_ROOT / "complex_pdf_test" / "fixtures" / "chunking_queries.json"
+DEFAULT_MAX_CHARS = [400, 800, 1200, 1600, 2400]
+DEFAULT_OVERLAPS = [0, 60, 120, 240]
+CURRENT = (1200, 120)  # run_pipeline defaults
+DEFAULT_K = 5
+TEMPLATE_WORDS = 50  # pdf_index_settings: chunk_text | truncatewords: 50
+_TOKEN_RE = re.compile(r"\w+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _norm(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.lower()).strip()
+
+
+def text_from_chunks(documents: list[dict]) -> list[tuple[str, str, str]]:
+    """(doc_id, source_file, text) per document, from chunks JSON, dropping the overlap between consecutive chunks."""
+    by_doc: dict[str, list[dict]] = {}
+    for d in documents:
+        by_doc.setdefault(d["doc_id"], []).append(d)
+    corpus = []
+    for doc_id, chunks in by_doc.items():
+        parts: list[str] = []
+        prev: dict | None = None
+        for c in chunks:
+            text = c["chunk_text"]
+            if prev is not None and prev.get("title") == c.get("title"):
+                cut = next((o for o in range(min(len(text), len(prev["chunk_text"])), 0, -1) if prev["chunk_text"].endswith(text[:o])), 0)
+                parts[-1] += text[cut:] if cut else "\n\n" + text
+            else:
+                parts.append(text)
+            prev = c
+        corpus.append((doc_id, chunks[0].get("source_file") or f"{doc_id}.pdf", "\n\n".join(parts)))
+    return corpus
+
+
+def load_corpus(texts: list[Path], pdfs: list[Path], cache_dir: Path) -> list[tuple[str, str, str]]:
+    """(doc_id, source_file, normalized text) for every input; PDFs are parsed once and cached as markdown."""
+    corpus = [(p.stem, p.name, normalize_text(p.read_text(encoding="utf-8"))) for p in texts]
+    for pdf in pdfs:
+        cached = cache_dir / f"{pdf.stem}.md"
+        if not cached.exists():
+            from complex_pdf_test.pipeline import parse_pdf
+
+            print(f"{LOG_PREFIX} Parsing {pdf.name} with Docling (cached to {cached})...")
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            cached.write_text(parse_pdf(pdf)[1], encoding="utf-8")
+        corpus.append((pdf.stem, pdf.name, normalize_text(cached.read_text(encoding="utf-8"))))
+    if not corpus:
+        corpus = text_from_chunks(json.loads(SEED_CHUNKS.read_text(encoding="utf-8")))
+    return corpus
+
+
+def chunk_corpus(corpus: list[tuple[str, str, str]], max_chars: int, overlap: int) -> list[dict]:
+    """Meilisearch documents for the corpus, chunked as run_pipeline does (header split, then size)."""
+    documents: list[dict] = []
+    with contextlib.redirect_stdout(io.StringIO()):  # chunk_text logs per document
+        for doc_id, source_file, text in corpus:
+            chunks = chunk_text(text, doc_id=doc_id, source_file=source_file, max_chars=max_chars, overlap_chars=overlap)
+            documents.extend(build_documents(chunks))
+    return documents
+
+
+def embedded_text(doc: dict) -> str:
+    """What the embedder receives for a document (pdf_index_settings' documentTemplate)."""
+    words = (doc.get("chunk_text") or "").split()
+    text = " ".join(words[:TEMPLATE_WORDS]) + (" ..." if len(words) > TEMPLATE_WORDS else "")
+    return f"Section: {doc['title']}. {text}" if doc.get("title") else text
+
+
+def cost_of(documents: list[dict], dimensions: int) -> dict:
+    payload = sum(len(encode_document(d)) + 1 for d in documents)
+    vectors = len(documents) * dimensions * 4
+    return {
+        "chunks": len(documents),
+        "chars": sum(len(d["chunk_text"]) for d in documents),
+        "mean_chunk_chars": sum(len(d["chunk_text"]) for d in documents) / len(documents) if documents else 0.0,
+        "embed_tokens": sum(estimate_tokens(embedded_text(d)) for d in documents),
+        "payload_bytes": payload,
+        "vector_bytes": vectors,
+        "index_bytes_est": payload + vectors,
+    }
+
+
+def recall_at_k(ranked: dict[str, list[str]], queries: list[dict], k: int) -> float:
+    """Mean over queries of the share of their evidence found in their top-k chunk texts."""
+    scores = []
+    for q in queries:
+        top = [_norm(t) for t in ranked.get(q["query"], [])[:k]]
+        evidence = [_norm(e) for e in q["evidence"]]
+        scores.append(sum(any(e in t for t in top) for e in evidence) / len(evidence))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def coverage(documents: list[dict], queries: list[dict], *, embedded: bool = False) -> float:
+    """Share of evidence strings that are whole in at least one chunk (in its embedded text with embedded=True)."""
+    texts = [_norm(embedded_text(d) if embedded else d["chunk_text"]) for d in documents]
+    evidence = [_norm(e) for q in queries for e in q["evidence"]]
+    return sum(any(e in t for t in texts) for e in evidence) / len(evidence) if evidence else 0.0
+
+
+class BM25:
+    """Okapi BM25 over title + chunk_text (the index's searchable attributes), for offline ranking."""
+
+    def __init__(self, documents: list[dict], k1: float = 1.2, b: float = 0.75):
+        self.documents = documents
+        self.k1, self.b = k1, b
+        self.tfs = [Counter(_TOKEN_RE.findall(f"{d.get('title') or ''} {d['chunk_text']}".lower())) for d in documents]
+        self.lengths = [sum(tf.values()) for tf in self.tfs]
+        self.avg_len = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        df = Counter(term for tf in self.tfs for term in tf)
+        n = len(documents)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def search(self, query: str, k: int) -> list[dict]:
+        terms = [t for t in _TOKEN_RE.findall(query.lower()) if t in self.idf]
+        scores = []
+        for i, tf in enumerate(self.tfs):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_len)
+            s = sum(self.idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf)
+            if s > 0:
+                scores.append((s, i))
+        scores.sort(reverse=True)
+        return [self.documents[i] for _, i in scores[:k]]
+
+
+def evaluate_offline(documents: list[dict], queries: list[dict], k: int, repeats: int) -> dict:
+    t0 = time.perf_counter()
+    bm25 = BM25(documents)
+    build_s = time.perf_counter() - t0
+    latencies: list[float] = []
+    ranked: dict[str, list[str]] = {}
+    for _ in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            hits = bm25.search(q["query"], k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            ranked[q["query"]] = [h["chunk_text"] for h in hits]
+    return {"mode": "offline-bm25", "ingestion_s": build_s, "recall": recall_at_k(ranked, queries, k), "latency": latency_summary(latencies)}
+
+
+def evaluate_server(client, settings, documents: list[dict], queries: list[dict], k: int, repeats: int, *,
+                    index_uid: str, semantic_ratio: float | None, keep_index: bool) -> dict:
+    """Load the documents into a scratch index and measure ingestion, database growth, latency and recall."""
+    from complex_pdf_test.load.load_to_meilisearch import pdf_index_settings
+    from complex_pdf_test.load.serialize import add_batches_raw, byte_batches
+    from complex_pdf_test.scale_test._common import wait_task
+    from complex_pdf_test.scale_test.resource_monitor import read_stats
+
+    index = client.index(index_uid)
+    wait_task(client, client.delete_index(index_uid), check=False)  # index_not_found on a fresh server
+    index_settings = pdf_index_settings(settings)
+    if semantic_ratio is None:
+        index_settings.pop("embedders")
+    used_before = read_stats(client, index_uid)["used_database_size_bytes"] or 0
+    t0 = time.perf_counter()
+    wait_task(client, index.update_settings(index_settings))
+    for task in add_batches_raw(index, byte_batches(documents)):
+        wait_task(client, task)
+    ingestion_s = time.perf_counter() - t0
+    used_after = read_stats(client, index_uid)["used_database_size_bytes"] or 0
+
+    params: dict = {"limit": k, "attributesToRetrieve": ["id", "chunk_text"]}
+    if semantic_ratio is not None:
+        params["hybrid"] = {"semanticRatio": semantic_ratio, "embedder": "mistral"}
+    latencies: list[float] = []
+    ranked: dict[str, list[str]] = {}
+    for _ in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            hits = index.search(q["query"], params)["hits"]
+            latencies.append((time.perf_counter() - t0) * 1000)
+            ranked[q["query"]] = [h.get("chunk_text", "") for h in hits]
+    if not keep_index:
+        wait_task(client, client.delete_index(index_uid), check=False)  # index_not_found on a fresh server
+    return {
+        "mode": "server-keyword" if semantic_ratio is None else f"server-hybrid-{semantic_ratio:g}",
+        "ingestion_s": ingestion_s,
+        "index_bytes": max(0, used_after - used_before),
+        "recall": recall_at_k(ranked, queries, k),
+        "latency": latency_summary(latencies),
+    }
+
+
+def pareto_front(rows: list[dict], objectives: list[tuple[str, int]]) -> list[str]:
+    """Names of rows not dominated; objectives are (key, +1 to maximise / -1 to minimise)."""
+    def key(r):
+        return [sign * r["metrics"][name] for name, sign in objectives]
+    front = []
+    for r in rows:
+        kr = key(r)
+        dominated = any(
+            all(a >= b for a, b in zip(key(o), kr)) and any(a > b for a, b in zip(key(o), kr))
+            for o in rows if o is not r
+        )
+        if not dominated:
+            front.append(r["name"])
+    return front
+
+
+def recommend(rows: list[dict], tolerance: float) -> dict | None:
+    """Fewest embedded tokens on the Pareto front among recalls within tolerance of the best."""
+    front = [r for r in rows if r["pareto"]]
+    if not front:
+        return None
+    best = max(r["metrics"]["recall"] for r in front)
+    good = [r for r in front if r["metrics"]["recall"] >= best - tolerance]
+    return min(good, key=lambda r: (r["metrics"]["embed_tokens"], r["metrics"]["p95_ms"]))
+
+
+def plot_front(rows: list[dict], out_path: Path) -> list[Path]:
+    """Recall@k vs embedded tokens; marker size ~ index bytes, red edge = Pareto."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    max_bytes = max(r["metrics"]["index_bytes"] for r in rows) or 1
+    max_overlap = max(r["config"]["overlap"] for r in rows) or 1
+    for r in rows:
+        m = r["metrics"]
+        ax.scatter(m["embed_tokens"], m["recall"], s=20 + 300 * m["index_bytes"] / max_bytes,
+                   color=plt.cm.viridis(r["config"]["overlap"] / max_overlap), alpha=0.7,
+                   edgecolors="red" if r["pareto"] else "none")
+        ax.annotate(r["name"], (m["embed_tokens"], m["recall"]), fontsize=6)
+    ax.set_xlabel("Embedded tokens (corpus)")
+    ax.set_ylabel("Recall@k")
+    ax.set_title("Chunking: cost vs recall (size = index bytes, colour = overlap, red edge = Pareto)")
+    ax.grid(alpha=0.3)
+    plt.tight_layout()
+    written = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def _ints(text: str) -> list[int]:
+    return [int(p) for p in text.split(",") if p.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep chunk size / overlap: chunks, embedding cost, index bytes, latency, recall@k.")
+    parser.add_argument("--text", type=Path, nargs="*", default=[], help="Markdown / text files")
+    parser.add_argument("--pdf", type=Path, nargs="*", default=[], help="PDFs (parsed once with Docling)")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH, help="Labelled queries JSON")
+    parser.add_argument("--max-chars", default=",".join(map(str, DEFAULT_MAX_CHARS)))
+    parser.add_argument("--overlaps", default=",".join(map(str, DEFAULT_OVERLAPS)))
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="Recall@k / search limit")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the query set per configuration")
+    parser.add_argument("--server", action="store_true", help="Measure on Meilisearch (scratch index per configuration)")
+    parser.add_argument("--keyword-only", action="store_true", help="With --server: no embedder, keyword search")
+    parser.add_argument("--semantic-ratio", type=float, default=0.5, help="With --server: hybrid semanticRatio")
+    parser.add_argument("--keep-indexes", action="store_true", help="With --server: keep the scratch indexes")
+    parser.add_argument("--recall-tolerance", type=float, default=0.02, help="Recall a cheaper configuration may give up")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="Report path stem (default: audit/sweeps/chunking-<ts>)")
+    args = parser.parse_args()
+
+    from config import load_settings
+
+    settings = load_settings()
+    out = args.output or OUT_DIR / f"chunking-{time.strftime('%Y%m%dT%H%M%S')}"
+    corpus = load_corpus(args.text, args.pdf, out.parent / "corpus")
+    queries = json.loads(args.queries.read_text(encoding="utf-8"))
+    grid = [(m, o) for m, o in itertools.product(_ints(args.max_chars), _ints(args.overlaps)) if o < m // 2]
+    client = None
+    if args.server:
+        from complex_pdf_test.load.load_to_meilisearch import get_client
+
+        client = get_client()
+    mode = "offline BM25" if client is None else ("keyword" if args.keyword_only else f"hybrid {args.semantic_ratio:g}") + " on Meilisearch"
+    print(f"{LOG_PREFIX} {len(corpus)} documents ({sum(len(t) for _, _, t in corpus)} chars), {len(queries)} queries, "
+          f"{len(grid)} configurations, recall@{args.k}, {mode}")
+
+    rows: list[dict] = []
+    for i, (max_chars, overlap) in enumerate(grid, start=1):
+        name = f"{max_chars}/{overlap}"
+        documents = chunk_corpus(corpus, max_chars, overlap)
+        cost = cost_of(documents, settings.mistral_embedding_dimensions)
+        if client is None:
+            result = evaluate_offline(documents, queries, args.k, args.repeats)
+        else:
+            result = evaluate_server(
+                client, settings, documents, queries, args.k, args.repeats, index_uid=f"chunkopt_{max_chars}_{overlap}",
+                semantic_ratio=None if args.keyword_only else args.semantic_ratio, keep_index=args.keep_indexes,
+            )
+        metrics = {
+            **cost,
+            "coverage": coverage(documents, queries),
+            "embedded": coverage(documents, queries, embedded=True),
+            "recall": result["recall"],
+            "ingestion_s": result["ingestion_s"],
+            "index_bytes": result.get("index_bytes", cost["index_bytes_est"]),
+            "p50_ms": result["latency"]["p50"],
+            "p95_ms": result["latency"]["p95"],
+        }
+        rows.append({"name": name, "config": {"max_chars": max_chars, "overlap": overlap}, "mode": result["mode"], "metrics": metrics, "latency": result["latency"]})
+        print(f"{LOG_PREFIX} [{i}/{len(grid)}] {name:10} {cost['chunks']:5} chunks  {cost['embed_tokens']:7} tokens  "
+              f"recall {metrics['recall']:.2f} (coverage {metrics['coverage']:.2f}, embedded {metrics['embedded']:.2f})  p95 {metrics['p95_ms']:.1f} ms")
+
+    objectives = [("recall", 1), ("embedded", 1), ("embed_tokens", -1), ("index_bytes", -1)]
+    if client is not None:
+        objectives.append(("p95_ms", -1))
+    front = set(pareto_front(rows, objectives))
+    for r in rows:
+        r["pareto"] = r["name"] in front
+    best = recommend(rows, args.recall_tolerance)
+
+    print()
+    print(f"{'CONFIG':10} {'CHUNKS':>7} {'TOKENS':>8} {'INDEX KB':>9} {'INGEST S':>9} {'P95 MS':>8} {'COVER':>6} {'EMBED':>6} {'RECALL':>7}  PARETO")
+    for r in sorted(rows, key=lambda r: (-r["metrics"]["recall"], r["metrics"]["embed_tokens"])):
+        m = r["metrics"]
+        print(f"{r['name']:10} {m['chunks']:7} {m['embed_tokens']:8} {m['index_bytes'] / 1024:9.0f} {m['ingestion_s']:9.2f} "
+              f"{m['p95_ms']:8.1f} {m['coverage']:6.2f} {m['embedded']:6.2f} {m['recall']:7.2f}  {'*' if r['pareto'] else ''}")
+    current = next((r for r in rows if (r["config"]["max_chars"], r["config"]["overlap"]) == CURRENT), None)
+    if best is not None:
+        print(f"\n{LOG_PREFIX} Recommended: --max-chars {best['config']['max_chars']} --overlap {best['config']['overlap']} "
+              f"(recall {best['metrics']['recall']:.2f}, {best['metrics']['chunks']} chunks, {best['metrics']['embed_tokens']} tokens)")
+        if current is not None and current is not best:
+            cm, bm = current["metrics"], best["metrics"]
+            print(f"{LOG_PREFIX} vs current {current['name']}: recall {bm['recall'] - cm['recall']:+.2f}, "
+                  f"chunks {bm['chunks'] - cm['chunks']:+d}, embedded tokens {(bm['embed_tokens'] / cm['embed_tokens'] - 1):+.0%}")
+            if client is None and bm["embedded"] < cm["embedded"]:
+                print(f"{LOG_PREFIX} Evidence inside the embedded text drops from {cm['embedded']:.2f} to {bm['embedded']:.2f}: "
+                      "offline recall is keyword only, confirm with --server before changing the defaults.")
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "mode": mode,
+        "k": args.k,
+        "documents": [doc_id for doc_id, _, _ in corpus],
+        "queries": queries,
+        "objectives": objectives,
+        "recommended": best["name"] if best else None,
+        "configs": rows,
+    }
+    out.with_suffix(".json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n{LOG_PREFIX} Report → {out.with_suffix('.json')}")
+    for path in plot_front(rows, out):
+        print(f"{LOG_PREFIX} Chart → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Search canary: probe pdf_chunks at a fixed rate, forever, and export sliding-window latency.
+
+benchmark_hybrid_latency.py is a one-off 50-request run; a slow drift (index growth,
+embedder latency, a noisy neighbour) never shows up in it. The canary cycles through a
+query set × search types (keyword / hybrid / semantic, same parameters as the scale
+sweep) at --rate probes per second. Each type has a SlidingHistogram
+(instrumentation/window.py) over the last --window seconds, so memory stays constant
+however long it runs.
+
+GET /metrics on --port serves Prometheus text: per type, the window quantiles as a summary
+(with lifetime _sum / _count), error and empty-result counters, and the window's request
+count and error ratio; one canary_alert_firing gauge per alert rule. GET /status returns
+the same as JSON.
+
+Alert rules are "<type>:<stat>><threshold>", stat p50 / p95 / p99 (ms) or error_rate
+(0-1), e.g. --alert hybrid:p95>800 --alert keyword:error_rate>0.05. A rule is evaluated
+every --eval-interval seconds once the window holds --min-samples probes; each change
+between ok and firing is logged and, with --webhook, POSTed as JSON.
+
+Probes run one at a time: a probe slower than 1 / rate delays the next one, and the
+schedule skips ahead instead of bursting to catch up (canary_probes_skipped_total).
+
+Usage (from project root):
+  uv run python complex_pdf_test/audit/search_canary.py --rate 2 --alert hybrid:p95>800
+  uv run python complex_pdf_test/audit/search_canary.py --types keyword,hybrid --queries queries.txt --port 9464
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle, product
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+import requests
+from config import load_settings
+from complex_pdf_test.audit.search_param_sweep import DEFAULT_QUERIES, build_params
+from complex_pdf_test.instrumentation.exporters import QUANTILES, _escape_label
+from complex_pdf_test.instrumentation.window import SlidingHistogram
+
+PDF_INDEX = "pdf_chunks"
+LOG_PREFIX = "[canary]"
+SEARCH_TYPES = {
+    "keyword": None,
+    "hybrid": 0.5,
+    "semantic": 1.0,
+}
+STATS = ("p50", "p95", "p99", "error_rate")
+
+
+def log(msg: str) -> None:
+    print(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {LOG_PREFIX} {msg}", flush=True)
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    search_type: str
+    stat: str
+    threshold: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.search_type}:{self.stat}>{self.threshold:g}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "AlertRule":
+        """"hybrid:p95>800" → AlertRule("hybrid", "p95", 800.0)."""
+        try:
+            search_type, rest = spec.split(":", 1)
+            stat, threshold = rest.split(">", 1)
+            rule = cls(search_type.strip(), stat.strip(), float(threshold))
+        except ValueError:
+            raise ValueError(f"Alert rule must look like hybrid:p95>800, got {spec!r}") from None
+        if rule.search_type not in SEARCH_TYPES or rule.stat not in STATS:
+            raise ValueError(f"Unknown search type or stat in {spec!r} (types {list(SEARCH_TYPES)}, stats {list(STATS)})")
+        return rule
+
+    def value(self, window: dict[str, Any]) -> float | None:
+        return window.get(self.stat)
+
+
+class SearchCanary:
+    """Probe loop, one SlidingHistogram per search type, alert state (see module docstring)."""
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str | None,
+        index_uid: str,
+        queries: list[str],
+        search_types: list[str],
+        *,
+        rate: float = 1.0,
+        window_s: float = 300.0,
+        slots: int = 10,
+        rules: list[AlertRule] | None = None,
+        min_samples: int = 20,
+        webhook: str | None = None,
+        timeout_s: float = 30.0,
+    ):
+        self.url = f"{url.rstrip('/')}/indexes/{index_uid}/search"
+        self.index_uid = index_uid
+        self.interval_s = 1.0 / rate
+        self.params = {t: build_params(SEARCH_TYPES[t], 5, "full", "none") for t in search_types}
+        self.histograms = {t: SlidingHistogram(window_s, slots) for t in search_types}
+        self.empty = {t: 0 for t in search_types}
+        self.rules = rules or []
+        self.firing: dict[str, bool] = {r.name: False for r in self.rules}
+        self.min_samples = min_samples
+        self.webhook = webhook
+        self.timeout_s = timeout_s
+        self.skipped = 0
+        self.last_probe_ts = 0.0
+        self._plan = cycle(list(product(queries, search_types)))
+        self._session = requests.Session()
+        if api_key:
+            self._session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def probe(self, query: str, search_type: str) -> None:
+        hist = self.histograms[search_type]
+        t0 = time.perf_counter()
+        try:
+            r = self._session.post(self.url, json={"q": query, **self.params[search_type]}, timeout=self.timeout_s)
+            r.raise_for_status()
+            hits = r.json().get("hits", [])
+        except (requests.RequestException, ValueError) as e:
+            hist.record_error()
+            log(f"{search_type} probe failed: {e}")
+            return
+        finally:
+            self.last_probe_ts = time.time()
+        hist.record((time.perf_counter() - t0) * 1000)
+        if not hits:
+            self.empty[search_type] += 1
+
+    def windows(self) -> dict[str, dict[str, Any]]:
+        return {t: h.window(QUANTILES) for t, h in self.histograms.items()}
+
+    def evaluate(self) -> None:
+        windows = self.windows()
+        for rule in self.rules:
+            window = windows.get(rule.search_type)
+            if window is None or window["count"] + window["errors"] < self.min_samples:
+                continue
+            value = rule.value(window)
+            firing = value is not None and value > rule.threshold
+            if firing != self.firing[rule.name]:
+                self.firing[rule.name] = firing
+                state = "FIRING" if firing else "resolved"
+                log(f"alert {rule.name} {state}: {rule.stat} = {value if value is None else round(value, 3)} over the last {self.histograms[rule.search_type].window_s:g}s")
+                self._notify(rule, state, value)
+
+    def _notify(self, rule: AlertRule, state: str, value: float | None) -> None:
+        if not self.webhook:
+            return
+        payload = {"rule": rule.name, "state": state, "value": value, "threshold": rule.threshold, "index": self.index_uid}
+        try:
+            requests.post(self.webhook, json=payload, timeout=10)
+        except requests.RequestException as e:
+            log(f"webhook failed: {e}")
+
+    def run(self, stop: threading.Event, *, eval_interval_s: float = 15.0, duration_s: float = 0.0) -> None:
+        start = time.monotonic()
+        next_probe = next_eval = start
+        while not stop.is_set():
+            now = time.monotonic()
+            if duration_s and now - start >= duration_s:
+                break
+            if now > next_probe + self.interval_s:  # fell behind: skip, do not burst
+                missed = int((now - next_probe) / self.interval_s)
+                self.skipped += missed
+                next_probe += missed * self.interval_s
+            if stop.wait(max(0.0, next_probe - now)):
+                break
+            self.probe(*next(self._plan))
+            next_probe += self.interval_s
+            if time.monotonic() >= next_eval:
+                self.evaluate()
+                next_eval += eval_interval_s
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "index": self.index_uid,
+            "windows": self.windows(),
+            "empty_results": self.empty,
+            "alerts": self.firing,
+            "skipped": self.skipped,
+            "last_probe_ts": self.last_probe_ts,
+        }
+
+    def render_prometheus(self, prefix: str = "canary") -> str:
+        lines = [
+            f"# HELP {prefix}_search_latency_seconds Search latency: quantiles over the sliding window, lifetime sum / count.",
+            f"# TYPE {prefix}_search_latency_seconds summary",
+        ]
+        for t, hist in self.histograms.items():
+            label = f'type="{_escape_label(t)}",index="{_escape_label(self.index_uid)}"'
+            for q, v in hist.quantiles(QUANTILES).items():
+                value = f"{v / 1000:.6f}" if v is not None else "NaN"
+                lines.append(f'{prefix}_search_latency_seconds{{{label},quantile="{q}"}} {value}')
+            lines.append(f"{prefix}_search_latency_seconds_sum{{{label}}} {hist.total_sum / 1000:.6f}")
+            lines.append(f"{prefix}_search_latency_seconds_count{{{label}}} {hist.total_count}")
+        windows = self.windows()
+        for metric, kind, help_text, get in (
+            ("search_errors_total", "counter", "Failed probes (HTTP error, timeout).", lambda t: self.histograms[t].total_errors),
+            ("search_empty_total", "counter", "Probes that returned no hits.", lambda t: self.empty[t]),
+            ("window_requests", "gauge", "Probes in the sliding window.", lambda t: windows[t]["count"] + windows[t]["errors"]),
+            ("window_error_ratio", "gauge", "Failed / all probes in the sliding window.", lambda t: windows[t]["error_rate"]),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for t in self.histograms:
+                lines.append(f'{prefix}_{metric}{{type="{_escape_label(t)}",index="{_escape_label(self.index_uid)}"}} {get(t):g}')
+        lines.append(f"# TYPE {prefix}_alert_firing gauge")
+        for name, firing in sorted(self.firing.items()):
+            lines.append(f'{prefix}_alert_firing{{rule="{_escape_label(name)}"}} {int(firing)}')
+        lines.append(f"# TYPE {prefix}_probes_skipped_total counter")
+        lines.append(f"{prefix}_probes_skipped_total {self.skipped}")
+        lines.append(f"# TYPE {prefix}_last_probe_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_probe_timestamp_seconds {self.last_probe_ts:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _ms(value: float | None) -> str:
+    return f"{value:.1f}" if value is not None else "n/a"
+
+
+def serve_metrics(canary: SearchCanary, host: str = "0.0.0.0", port: int = 9464) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /status (JSON) from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, ctype = canary.render_prometheus().encode(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/status":
+                body, ctype = json.dumps(canary.status(), indent=2).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # scraped every few seconds
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="canary-metrics", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Continuous search canary with sliding-window percentiles and a /metrics endpoint.")
+    parser.add_argument("--index", default=PDF_INDEX)
+    parser.add_argument("--queries", type=Path, default=None, help="File with one query per line (default: built-in set)")
+    parser.add_argument("--types", default=",".join(SEARCH_TYPES), help="Subset of keyword,hybrid,semantic")
+    parser.add_argument("--rate", type=float, default=1.0, help="Probes per second (all types together)")
+    parser.add_argument("--window", type=float, default=300.0, help="Sliding window (s)")
+    parser.add_argument("--slots", type=int, default=10, help="Sub-windows; the window slides by window / slots")
+    parser.add_argument("--alert", action="append", default=[], help="Alert rule, e.g. hybrid:p95>800 (repeatable)")
+    parser.add_argument("--min-samples", type=int, default=20, help="Probes in the window before a rule is evaluated")
+    parser.add_argument("--eval-interval", type=float, default=15.0, help="Seconds between alert evaluations")
+    parser.add_argument("--webhook", default=None, help="POST alert state changes (JSON) to this URL")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9464, help="Metrics port (0: no endpoint)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after this many seconds (0: run until Ctrl-C)")
+    args = parser.parse_args()
+
+    search_types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = set(search_types) - set(SEARCH_TYPES)
+    if unknown:
+        raise SystemExit(f"Unknown search types: {sorted(unknown)}")
+    try:
+        rules = [AlertRule.parse(spec) for spec in args.alert]
+    except ValueError as e:
+        raise SystemExit(str(e))
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        queries = [l.strip() for l in args.queries.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+    settings = load_settings()
+    canary = SearchCanary(
+        settings.meilisearch_url, settings.meilisearch_api_key, args.index, queries, search_types,
+        rate=args.rate, window_s=args.window, slots=args.slots, rules=rules,
+        min_samples=args.min_samples, webhook=args.webhook,
+    )
+    server = serve_metrics(canary, args.host, args.port) if args.port else None
+    log(f"Probing {args.index} at {args.rate:g}/s ({len(queries)} queries × {search_types}), window {args.window:g}s"
+        + (f", metrics on http://{args.host}:{server.server_address[1]}/metrics" if server else ""))
+    for rule in rules:
+        log(f"alert rule {rule.name}")
+
+    stop = threading.Event()
+    try:
+        canary.run(stop, eval_interval_s=args.eval_interval, duration_s=args.duration)
+    except KeyboardInterrupt:
+        stop.set()
+    for t, w in canary.windows().items():
+        log(f"{t:8}: {w['count']} ok / {w['errors']} errors in window, p50 {_ms(w['p50'])} | p95 {_ms(w['p95'])} | p99 {_ms(w['p99'])} ms")
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Proxy for "which chunks were sent to the LLM".
 Usage:
   python complex_pdf_test/audit/search_chunks_for_query.py "Ta question"
   python complex_pdf_test/audit/search_chunks_for_query.py "Ta question" --limit 10
+  python complex_pdf_test/audit/search_chunks_for_query.py "Ta question" --layout shards.json   sharded (federated)
 """
 
 import sys
@@ -28,6 +29,7 @@ DEFAULT_LIMIT = 5
 
 def main() -> None:
     limit = DEFAULT_LIMIT
+    layout_path = None
     args = []
     i = 1
     while i < len(sys.argv):
@@ -35,29 +37,38 @@ def main() -> None:
             limit = int(sys.argv[i + 1])
             i += 2
             continue
+        if sys.argv[i] == "--layout" and i + 1 < len(sys.argv):
+            layout_path = sys.argv[i + 1]
+            i += 2
+            continue
         args.append(sys.argv[i])
         i += 1
     query = " ".join(args).strip() if args else "architecture Mixtral paramètres"
     if not query:
-        print("Usage: python search_chunks_for_query.py \"Your question\" [--limit N]", file=sys.stderr)
+        print("Usage: python search_chunks_for_query.py \"Your question\" [--limit N] [--layout shards.json]", file=sys.stderr)
         sys.exit(1)
 
-    settings = load_settings()
-    client = meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key or "")
-    index = client.index(PDF_INDEX)
+    params = {
+        "limit": limit,
+        "hybrid": {"semanticRatio": 0.5, "embedder": "mistral"},
+        "attributesToRetrieve": ["id", "title", "chunk_text", "page", "source_file"],
+    }
+    if layout_path:
+        from complex_pdf_test.load.sharding import ShardLayout
+        from complex_pdf_test.search import federated_search
 
-    results = index.search(
-        query,
-        {
-            "limit": limit,
-            "hybrid": {"semanticRatio": 0.5, "embedder": "mistral"},
-            "attributesToRetrieve": ["id", "title", "chunk_text", "page", "source_file"],
-        },
-    )
+        result = federated_search(ShardLayout.load(layout_path), query, params)
+        hits = result.hits
+        shards = sum(len(s["shards"]) for s in result.instances.values())
+        where = f"federated over {shards} shards on {len(result.instances)} instance(s), {result.wall_ms:.0f} ms"
+    else:
+        settings = load_settings()
+        client = meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key or "")
+        hits = client.index(PDF_INDEX).search(query, params).get("hits", [])
+        where = PDF_INDEX
 
-    hits = results.get("hits", [])
     print(f"Query: {query!r}")
-    print(f"Search: hybrid (semanticRatio=0.5, embedder=mistral) — same as chat\n")
+    print(f"Search: hybrid (semanticRatio=0.5, embedder=mistral) — same as chat — {where}\n")
     print(f"Chunks returned ({len(hits)}):\n")
     for i, hit in enumerate(hits, start=1):
         cid = hit.get("id", "?")
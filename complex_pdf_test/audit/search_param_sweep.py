@@ -0,0 +1,235 @@
+"""
+Search parameter sweep: latency / payload / result-overlap surface over search settings.
+
+All search scripts use limit 5, semanticRatio 0.5 and full chunk_text retrieval. This runs
+a query set over a grid of:
+  - semanticRatio   (keyword-only, 0.25, 0.5, 0.75, 1.0)
+  - limit           (5, 10, 20)
+  - retrieval       ids only / id+title / full chunk_text / cropped chunk_text
+  - filter          none / element_type = "text"
+and records per configuration: latency mean / p50 / p95 / p99, response bytes, and overlap
+of the returned ids with the reference configuration (current production parameters).
+
+Requests go through a raw HTTP session (not the SDK) so response bytes are the real
+payload size and every configuration uses the same keep-alive connection.
+
+Usage (from project root):
+  uv run python complex_pdf_test/audit/search_param_sweep.py
+  uv run python complex_pdf_test/audit/search_param_sweep.py --queries queries.txt --repeats 3 --ratios 0,0.5,1
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+import requests
+from config import load_settings
+from complex_pdf_test.results import latency_summary
+
+PDF_INDEX = "pdf_chunks"
+LOG_PREFIX = "[search_sweep]"
+OUT_DIR = Path(__file__).resolve().parent / "sweeps"
+DEFAULT_QUERIES = [
+    "architecture Mixtral experts routing",
+    "How many experts are used per token?",
+    "Mixtral performance on GSM8K and Humaneval",
+    "sparse mixture of experts router gating network",
+    "multilingual benchmarks French German Spanish Italian",
+    "long context passkey retrieval 32k tokens",
+    "instruction fine-tuning DPO Mixtral Instruct",
+    "comparison with Llama 2 70B and GPT-3.5",
+]
+RETRIEVAL_PROFILES = {
+    "ids": {"attributesToRetrieve": ["id"]},
+    "id_title": {"attributesToRetrieve": ["id", "title"]},
+    "full": {"attributesToRetrieve": ["id", "title", "chunk_text"]},
+    "cropped": {"attributesToRetrieve": ["id", "title", "chunk_text"], "attributesToCrop": ["chunk_text"], "cropLength": 40},
+}
+FILTERS = {"none": None, "text_only": 'element_type = "text"'}
+REFERENCE = {"semantic_ratio": 0.5, "limit": 5, "retrieval": "full", "filter": "none"}
+
+
+def build_params(semantic_ratio: float | None, limit: int, retrieval: str, filter_name: str) -> dict:
+    params: dict = {"limit": limit, **RETRIEVAL_PROFILES[retrieval]}
+    if semantic_ratio is not None:
+        params["hybrid"] = {"semanticRatio": semantic_ratio, "embedder": "mistral"}
+    if FILTERS[filter_name]:
+        params["filter"] = FILTERS[filter_name]
+    return params
+
+
+def overlap_at_k(ids: list[str], reference_ids: list[str]) -> float | None:
+    """|top-k ∩ reference top-k| / k with k = min of both result lengths (None if either is empty)."""
+    k = min(len(ids), len(reference_ids))
+    if k == 0:
+        return None
+    return len(set(ids[:k]) & set(reference_ids[:k])) / k
+
+
+def run_config(session: requests.Session, url: str, queries: list[str], params: dict, repeats: int) -> dict:
+    """Run every query `repeats` times; return latencies, bytes and the ids of the first repeat."""
+    latencies: list[float] = []
+    sizes: list[int] = []
+    ids_by_query: dict[str, list[str]] = {}
+    for rep in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            r = session.post(url, json={"q": q, **params}, timeout=60)
+            elapsed = (time.perf_counter() - t0) * 1000
+            r.raise_for_status()
+            latencies.append(elapsed)
+            sizes.append(len(r.content))
+            if rep == 0:
+                ids_by_query[q] = [h.get("id") for h in r.json().get("hits", [])]
+    return {"latencies_ms": latencies, "response_bytes": sizes, "ids": ids_by_query}
+
+
+def _config_name(c: dict) -> str:
+    ratio = "kw" if c["semantic_ratio"] is None else f"r{c['semantic_ratio']:g}"
+    return f"{ratio}/l{c['limit']}/{c['retrieval']}/{c['filter']}"
+
+
+def pareto_front(rows: list[dict]) -> list[str]:
+    """Configs not dominated on (p95 latency ↓, response bytes ↓, overlap ↑)."""
+    def key(r):
+        return (r["latency"]["p95"], r["bytes_mean"], -(r["overlap_mean"] or 0.0))
+    front = []
+    for r in rows:
+        kr = key(r)
+        dominated = any(
+            all(a <= b for a, b in zip(key(o), kr)) and any(a < b for a, b in zip(key(o), kr))
+            for o in rows if o is not r
+        )
+        if not dominated:
+            front.append(r["name"])
+    return front
+
+
+def plot_surface(rows: list[dict], out_path: Path) -> list[Path]:
+    """p95 latency vs overlap with the reference; marker size ~ response bytes."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    max_bytes = max(r["bytes_mean"] for r in rows) or 1
+    for r in rows:
+        ratio = r["config"]["semantic_ratio"]
+        color = "grey" if ratio is None else plt.cm.viridis(ratio)
+        ax.scatter(r["overlap_mean"] or 0, r["latency"]["p95"], s=20 + 300 * r["bytes_mean"] / max_bytes, color=color, alpha=0.7,
+                   edgecolors="red" if r["pareto"] else "none")
+        if r["pareto"]:
+            ax.annotate(r["name"], (r["overlap_mean"] or 0, r["latency"]["p95"]), fontsize=6)
+    ax.set_xlabel("Overlap@k with reference (r0.5/l5/full/none)")
+    ax.set_ylabel("p95 latency (ms)")
+    ax.set_title("Search parameter surface (size = response bytes, red edge = Pareto)")
+    ax.grid(alpha=0.3)
+    plt.tight_layout()
+    written = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def _floats(text: str) -> list[float | None]:
+    out: list[float | None] = []
+    for part in text.split(","):
+        part = part.strip()
+        if part in ("kw", "none", "keyword"):
+            out.append(None)
+        elif part:
+            out.append(float(part))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency / payload / overlap sweep over search parameters.")
+    parser.add_argument("--index", default=PDF_INDEX)
+    parser.add_argument("--queries", type=Path, default=None, help="File with one query per line (default: built-in set)")
+    parser.add_argument("--ratios", default="kw,0.25,0.5,0.75,1", help="semanticRatio values; 'kw' = keyword only")
+    parser.add_argument("--limits", default="5,10,20")
+    parser.add_argument("--retrieval", default=",".join(RETRIEVAL_PROFILES), help=f"Subset of {','.join(RETRIEVAL_PROFILES)}")
+    parser.add_argument("--filters", default=",".join(FILTERS), help=f"Subset of {','.join(FILTERS)}")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the query set per configuration")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="Report path stem (default: audit/sweeps/search-<ts>)")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        queries = [l.strip() for l in args.queries.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+    settings = load_settings()
+    url = f"{settings.meilisearch_url.rstrip('/')}/indexes/{args.index}/search"
+    session = requests.Session()
+    session.headers["Content-Type"] = "application/json"
+    if settings.meilisearch_api_key:
+        session.headers["Authorization"] = f"Bearer {settings.meilisearch_api_key}"
+
+    grid = [
+        {"semantic_ratio": r, "limit": int(l), "retrieval": ret.strip(), "filter": f.strip()}
+        for r, l, ret, f in itertools.product(
+            _floats(args.ratios), args.limits.split(","), args.retrieval.split(","), args.filters.split(",")
+        )
+    ]
+    if REFERENCE not in grid:
+        grid.insert(0, dict(REFERENCE))
+
+    print(f"{LOG_PREFIX} {len(grid)} configurations × {len(queries)} queries × {args.repeats} repeats on {args.index}")
+    # Warm-up pass (connection, caches, embedder) so the first configuration is not penalised
+    run_config(session, url, queries, build_params(REFERENCE["semantic_ratio"], REFERENCE["limit"], REFERENCE["retrieval"], REFERENCE["filter"]), 1)
+
+    results: dict[str, dict] = {}
+    for i, config in enumerate(grid, start=1):
+        name = _config_name(config)
+        params = build_params(config["semantic_ratio"], config["limit"], config["retrieval"], config["filter"])
+        results[name] = {"config": config, "params": params, **run_config(session, url, queries, params, args.repeats)}
+        lat = latency_summary(results[name]["latencies_ms"])
+        print(f"{LOG_PREFIX} [{i}/{len(grid)}] {name:32} p50 {lat['p50']:7.1f} ms  p95 {lat['p95']:7.1f} ms")
+
+    reference_ids = results[_config_name(REFERENCE)]["ids"]
+    rows: list[dict] = []
+    for name, res in results.items():
+        overlaps = [o for q in queries if (o := overlap_at_k(res["ids"].get(q, []), reference_ids.get(q, []))) is not None]
+        rows.append({
+            "name": name,
+            "config": res["config"],
+            "params": res["params"],
+            "latency": latency_summary(res["latencies_ms"]),
+            "bytes_mean": sum(res["response_bytes"]) / len(res["response_bytes"]),
+            "overlap_mean": sum(overlaps) / len(overlaps) if overlaps else None,
+            "latencies_ms": res["latencies_ms"],
+        })
+    front = set(pareto_front(rows))
+    for r in rows:
+        r["pareto"] = r["name"] in front
+
+    print()
+    print(f"{'CONFIG':32} {'P50':>8} {'P95':>8} {'P99':>8} {'BYTES':>9} {'OVERLAP':>8}  PARETO")
+    for r in sorted(rows, key=lambda r: r["latency"]["p95"]):
+        ov = f"{r['overlap_mean']:.2f}" if r["overlap_mean"] is not None else "-"
+        print(f"{r['name']:32} {r['latency']['p50']:8.1f} {r['latency']['p95']:8.1f} {r['latency']['p99']:8.1f} {r['bytes_mean']:9.0f} {ov:>8}  {'*' if r['pareto'] else ''}")
+
+    out = args.output or OUT_DIR / f"search-{time.strftime('%Y%m%dT%H%M%S')}"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report = {"index": args.index, "queries": queries, "repeats": args.repeats, "reference": _config_name(REFERENCE), "configs": rows}
+    out.with_suffix(".json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n{LOG_PREFIX} Report → {out.with_suffix('.json')}")
+    for path in plot_surface(rows, out):
+        print(f"{LOG_PREFIX} Chart → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Semantic answer cache in front of the native chat route.
+
+A question is normalised (Unicode NFKC, lower case, collapsed whitespace, trailing
+punctuation dropped). An exact match on the normalised text answers without any call;
+otherwise the question is embedded (Mistral embeddings, same model as the index) and
+looked up in an in-memory vector store: the nearest cached question with cosine
+similarity >= threshold is a hit, and its answer and sources are replayed as a stream of
+the same typed deltas the chat client yields. Misses stream from Meilisearch and are
+stored once the answer is complete.
+
+Entries are dropped when the pdf_chunks index changes (its updatedAt, checked at most
+every check_interval_s), so answers never outlive the chunks they were built from.
+Only first turns are cached: a question asked after earlier turns depends on them.
+
+Usage (from project root):
+  uv run python complex_pdf_test/chat/answer_cache.py "What is Mixtral?" "what is mixtral" "Explain Mixtral"
+"""
+
+import asyncio
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx
+import numpy as np
+
+from complex_pdf_test.chat.async_client import (
+    AsyncChatClient,
+    ChatDelta,
+    ContentDelta,
+    SearchSources,
+    StreamDone,
+)
+
+PDF_INDEX = "pdf_chunks"
+LOG_PREFIX = "[answer_cache]"
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_CAPACITY = 10_000
+_SPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.;:¿¡]+$")
+
+EmbedFn = Callable[[str], Awaitable[list[float]]]
+
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = _SPACE_RE.sub(" ", text).strip()
+    return _TRAILING_PUNCT_RE.sub("", text)
+
+
+class VectorStore:
+    """
+    Unit vectors in one preallocated float16 matrix (2 bytes per dimension), grown by
+    doubling; brute-force dot product on lookup (sub-millisecond for 10k × 1024).
+    Slots are reused least-recently-used once `capacity` is reached.
+    """
+
+    def __init__(self, dimensions: int, capacity: int = DEFAULT_CAPACITY, initial: int = 256):
+        self.dimensions = dimensions
+        self.capacity = capacity
+        self._vectors = np.zeros((min(initial, capacity), dimensions), dtype=np.float16)
+        self._last_used = np.zeros(len(self._vectors), dtype=np.float64)
+        self.size = 0
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def add(self, vector: list[float] | np.ndarray) -> int:
+        """Store a vector and return its slot."""
+        vec = np.asarray(vector, dtype=np.float32)
+        vec /= np.linalg.norm(vec) or 1.0
+        if self.size < len(self._vectors):
+            slot = self.size
+            self.size += 1
+        elif len(self._vectors) < self.capacity:
+            grown = min(len(self._vectors) * 2, self.capacity)
+            self._vectors = np.resize(self._vectors, (grown, self.dimensions))
+            self._last_used = np.resize(self._last_used, grown)
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self._last_used[: self.size]))
+        self._vectors[slot] = vec
+        self._last_used[slot] = time.monotonic()
+        return slot
+
+    def touch(self, slot: int) -> None:
+        self._last_used[slot] = time.monotonic()
+
+    def nearest(self, vector: list[float] | np.ndarray) -> tuple[int, float] | None:
+        """(slot, cosine) of the closest stored vector, or None when empty."""
+        if self.size == 0:
+            return None
+        vec = np.asarray(vector, dtype=np.float32)
+        vec /= np.linalg.norm(vec) or 1.0
+        scores = self._vectors[: self.size].astype(np.float32) @ vec
+        slot = int(np.argmax(scores))
+        self.touch(slot)
+        return slot, float(scores[slot])
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    parts: list[str]
+    sources: list[dict]
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    stale_answers: int = 0  # answers not stored: the index changed while they streamed
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / total if total else 0.0
+
+
+def mistral_embedder(base_url: str, api_key: str, model: str = "mistral-embed", http: httpx.AsyncClient | None = None) -> EmbedFn:
+    """Embed one question through the Mistral embeddings API (or the fake server via MISTRAL_BASE_URL)."""
+    client = http or httpx.AsyncClient(timeout=30.0)
+
+    async def embed(text: str) -> list[float]:
+        r = await client.post(
+            f"{base_url.rstrip('/')}/embeddings",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": model, "input": [text]},
+        )
+        r.raise_for_status()
+        return r.json()["data"][0]["embedding"]
+
+    return embed
+
+
+class AnswerCache:
+    """Exact + semantic question → answer cache, invalidated on index updates."""
+
+    def __init__(
+        self,
+        embed: EmbedFn,
+        dimensions: int,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        capacity: int = DEFAULT_CAPACITY,
+        index_version: Callable[[], Awaitable[str | None]] | None = None,
+        check_interval_s: float = 5.0,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.store = VectorStore(dimensions, capacity)
+        self.entries: dict[int, CachedAnswer] = {}  # slot → answer
+        self.exact: dict[str, int] = {}  # normalised question → slot
+        self.stats = CacheStats()
+        self._index_version = index_version
+        self._check_interval_s = check_interval_s
+        self._version: str | None = None
+        self._checked_at = float("-inf")
+
+    def clear(self) -> None:
+        self.store.clear()
+        self.entries.clear()
+        self.exact.clear()
+
+    @property
+    def version(self) -> str | None:
+        """Index version the cached entries were built against (as of the last check)."""
+        return self._version
+
+    async def _check_index(self, force: bool = False) -> None:
+        if self._index_version is None or (not force and time.monotonic() - self._checked_at < self._check_interval_s):
+            return
+        self._checked_at = time.monotonic()
+        version = await self._index_version()
+        if version != self._version:
+            if self._version is not None and self.entries:
+                self.stats.invalidations += 1
+                print(f"{LOG_PREFIX} Index changed ({self._version} → {version}), dropping {len(self.entries)} answers")
+            self.clear()
+            self._version = version
+
+    async def lookup(self, question: str) -> tuple[CachedAnswer | None, np.ndarray | None]:
+        """Cached answer (or None) and the question embedding when one was computed."""
+        await self._check_index()
+        key = normalize_question(question)
+        slot = self.exact.get(key)
+        if slot is not None:
+            self.stats.exact_hits += 1
+            self.store.touch(slot)
+            self.entries[slot].hits += 1
+            return self.entries[slot], None
+        vector = np.asarray(await self.embed(key), dtype=np.float32)
+        found = self.store.nearest(vector)
+        if found is not None and found[1] >= self.threshold:
+            self.stats.semantic_hits += 1
+            self.entries[found[0]].hits += 1
+            return self.entries[found[0]], vector
+        self.stats.misses += 1
+        return None, vector
+
+    async def put_if_current(self, version: str | None, question: str, vector: np.ndarray, parts: list[str], sources: list[dict]) -> bool:
+        """
+        Store an answer built while the index was at `version` (self.version at lookup time).
+        The index is re-checked first: if it changed while the answer streamed, the answer
+        may quote chunks that are gone and is not stored.
+        """
+        await self._check_index(force=True)
+        if self._version != version:
+            self.stats.stale_answers += 1
+            return False
+        self.put(question, vector, parts, sources)
+        return True
+
+    def put(self, question: str, vector: np.ndarray, parts: list[str], sources: list[dict]) -> None:
+        slot = self.store.add(vector)
+        evicted = self.entries.pop(slot, None)
+        if evicted is not None:
+            self.exact.pop(normalize_question(evicted.question), None)
+        self.entries[slot] = CachedAnswer(question, parts, sources)
+        self.exact[normalize_question(question)] = slot
+
+
+def index_updated_at(http: httpx.AsyncClient, index_uid: str = PDF_INDEX) -> Callable[[], Awaitable[str | None]]:
+    """Version probe for AnswerCache: GET /indexes/{uid} → updatedAt (http carries base_url and auth)."""
+
+    async def probe() -> str | None:
+        r = await http.get(f"/indexes/{index_uid}")
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json().get("updatedAt")
+
+    return probe
+
+
+class CachedChat:
+    """Single-question chat through an AnswerCache; same delta stream on hits and misses."""
+
+    def __init__(self, client: AsyncChatClient, cache: AnswerCache):
+        self.client = client
+        self.cache = cache
+
+    async def ask(self, question: str) -> AsyncIterator[ChatDelta]:
+        cached, vector = await self.cache.lookup(question)
+        version = self.cache.version
+        if cached is not None:
+            if cached.sources:
+                yield SearchSources(None, list(cached.sources))
+            for part in cached.parts:
+                yield ContentDelta(part)
+            yield StreamDone("stop", {"cached": True})
+            return
+        parts: list[str] = []
+        sources: list[dict] = []
+        completed = False
+        async for delta in self.client.stream([{"role": "user", "content": question}]):
+            if isinstance(delta, ContentDelta):
+                parts.append(delta.text)
+            elif isinstance(delta, SearchSources):
+                sources.extend(delta.documents)
+            elif isinstance(delta, StreamDone):
+                completed = delta.finish_reason in (None, "stop")
+            yield delta
+        if completed and parts:
+            await self.cache.put_if_current(version, question, vector, parts, sources)
+
+
+async def _main_async(questions: list[str], threshold: float) -> None:
+    from config import load_settings
+
+    settings = load_settings()
+    async with AsyncChatClient.from_settings() as client, httpx.AsyncClient(
+        base_url=settings.meilisearch_url.rstrip("/"),
+        headers={"Authorization": f"Bearer {settings.meilisearch_api_key}"},
+        timeout=10.0,
+    ) as meili:
+        cache = AnswerCache(
+            mistral_embedder(settings.mistral_base_url, settings.mistral_api_key, settings.mistral_embedding_model),
+            settings.mistral_embedding_dimensions,
+            threshold=threshold,
+            index_version=index_updated_at(meili),
+        )
+        chat = CachedChat(client, cache)
+        for q in questions:
+            t0 = time.perf_counter()
+            first = None
+            cached = False
+            async for delta in chat.ask(q):
+                if isinstance(delta, ContentDelta) and first is None:
+                    first = (time.perf_counter() - t0) * 1000
+                elif isinstance(delta, StreamDone):
+                    cached = bool((delta.usage or {}).get("cached"))
+            total = (time.perf_counter() - t0) * 1000
+            print(f"{LOG_PREFIX} {'HIT ' if cached else 'MISS'} first token {first or 0:7.1f} ms, total {total:7.1f} ms  {q!r}")
+        s = cache.stats
+        print(f"{LOG_PREFIX} exact {s.exact_hits}, semantic {s.semantic_hits}, misses {s.misses}, hit rate {s.hit_rate:.0%}, not stored (index changed) {s.stale_answers}")
+
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    parser = argparse.ArgumentParser(description="Ask questions through the semantic answer cache (shows hits / misses).")
+    parser.add_argument("questions", nargs="+")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Cosine similarity for a semantic hit")
+    args = parser.parse_args()
+    asyncio.run(_main_async(args.questions, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
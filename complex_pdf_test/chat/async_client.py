@@ -0,0 +1,430 @@
+"""
+Async streaming client for Meilisearch native chat, for serving many conversations from one process.
+
+  - one pooled httpx.AsyncClient (keep-alive connections shared by all sessions)
+  - incremental byte-level SSE parser (events split anywhere across network reads,
+    multi-byte UTF-8 included)
+  - typed deltas through an async iterator: ContentDelta, SearchProgress, SearchSources,
+    ToolCallDelta (other tools), StreamDone
+  - Conversation keeps the history (including the messages Meilisearch asks to append
+    through _meiliAppendConversationMessage)
+  - backpressure: the response body is read only as fast as the consumer iterates, and
+    max_streams bounds concurrent upstream streams (extra sessions wait for a slot)
+  - cancellation: cancelling the task closes the stream and returns the slot at once; to
+    stop early from the consumer side, iterate under contextlib.aclosing(...) and break
+
+Usage:
+    async with AsyncChatClient.from_settings() as client:
+        conv = client.conversation()
+        async for delta in conv.ask("What is Mixtral's architecture?"):
+            if isinstance(delta, ContentDelta):
+                print(delta.text, end="")
+
+CLI (from project root):
+  uv run python complex_pdf_test/chat/async_client.py "What is Mixtral's architecture?"
+  uv run python complex_pdf_test/chat/async_client.py --sessions 200 --max-streams 50 "Question"
+"""
+
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx
+
+WORKSPACE_UID = "mistral-pdf"
+LOG_PREFIX = "[async_chat]"
+MEILI_TOOLS = [
+    {"type": "function", "function": {"name": "_meiliSearchProgress", "description": "Reports real-time search progress to the user"}},
+    {"type": "function", "function": {"name": "_meiliSearchSources", "description": "Provides sources and references for the information"}},
+    {"type": "function", "function": {"name": "_meiliAppendConversationMessage", "description": "Append a new message to the conversation based on what happened internally"}},
+]
+
+
+class ChatStreamError(RuntimeError):
+    """Error status or in-stream error payload from the chat route."""
+
+
+# ---- SSE ----
+
+@dataclass
+class SSEEvent:
+    data: str
+    event: str = "message"
+    id: str | None = None
+    retry: int | None = None
+
+
+class SSEParser:
+    """
+    Incremental text/event-stream parser working on raw bytes.
+
+    feed() accepts arbitrary slices of the body and returns the events completed so far;
+    lines end with \\n, \\r\\n or \\r; comment lines (":") are skipped; multi-line data is
+    joined with \\n (per the SSE spec).
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._data: list[str] = []
+        self._event = ""
+        self._id: str | None = None
+        self._retry: int | None = None
+
+    def feed(self, chunk: bytes) -> list[SSEEvent]:
+        self._buf += chunk
+        events: list[SSEEvent] = []
+        start = 0
+        buf = self._buf
+        n = len(buf)
+        while start < n:
+            nl = buf.find(b"\n", start)
+            cr = buf.find(b"\r", start)
+            if cr != -1 and (nl == -1 or cr < nl):
+                if cr + 1 == n:
+                    break  # wait: "\r" may be the first half of "\r\n"
+                end, next_start = cr, cr + (2 if buf[cr + 1] == 0x0A else 1)
+            elif nl != -1:
+                end, next_start = nl, nl + 1
+            else:
+                break
+            event = self._line(bytes(buf[start:end]).decode("utf-8", "replace"))
+            if event is not None:
+                events.append(event)
+            start = next_start
+        del self._buf[:start]
+        return events
+
+    def _line(self, line: str) -> SSEEvent | None:
+        if not line:
+            if not self._data:
+                self._event = ""
+                return None
+            event = SSEEvent(data="\n".join(self._data), event=self._event or "message", id=self._id, retry=self._retry)
+            self._data, self._event = [], ""
+            return event
+        if line.startswith(":"):
+            return None
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id":
+            self._id = value
+        elif name == "retry" and value.isdigit():
+            self._retry = int(value)
+        return None
+
+
+# ---- typed deltas ----
+
+@dataclass
+class ContentDelta:
+    text: str
+
+
+@dataclass
+class SearchProgress:
+    """_meiliSearchProgress: Meilisearch is searching an index (function_parameters holds q / index_uid)."""
+    call_id: str | None
+    function_name: str | None
+    parameters: dict[str, Any]
+
+
+@dataclass
+class SearchSources:
+    """_meiliSearchSources: documents retrieved for the answer."""
+    call_id: str | None
+    documents: list[dict[str, Any]]
+
+
+@dataclass
+class ToolCallDelta:
+    """Any other complete tool call (including _meiliAppendConversationMessage)."""
+    call_id: str | None
+    name: str
+    arguments: dict[str, Any]
+
+
+@dataclass
+class StreamDone:
+    finish_reason: str | None
+    usage: dict[str, Any] | None = None
+
+
+ChatDelta = Union[ContentDelta, SearchProgress, SearchSources, ToolCallDelta, StreamDone]
+
+
+@dataclass
+class _PendingCall:
+    id: str | None = None
+    name: str = ""
+    arguments: str = ""
+
+
+class DeltaDecoder:
+    """
+    Turn chat.completion.chunk payloads into typed deltas. Tool-call fragments are kept per
+    `index` until their arguments parse (an empty first fragment is not a complete call);
+    calls still pending at finish_reason or at the end of the stream are emitted by flush().
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[int, _PendingCall] = {}
+        self.finish_reason: str | None = None
+        self.usage: dict[str, Any] | None = None
+
+    def decode(self, data: dict) -> list[ChatDelta]:
+        if "error" in data:
+            err = data["error"]
+            raise ChatStreamError(err if isinstance(err, str) else err.get("message", str(err)))
+        if data.get("usage"):
+            self.usage = data["usage"]
+        out: list[ChatDelta] = []
+        for choice in data.get("choices", []):
+            delta = choice.get("delta") or {}
+            content = delta.get("content")
+            if isinstance(content, str) and content:
+                out.append(ContentDelta(content))
+            for call in delta.get("tool_calls") or []:
+                done = self._accumulate(call)
+                if done is not None:
+                    out.append(done)
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+                out.extend(self.flush())
+        return out
+
+    def flush(self) -> list[ChatDelta]:
+        """Emit every pending call: empty arguments as {}, arguments that never parsed as {"raw": ...}."""
+        out: list[ChatDelta] = []
+        for idx in sorted(self._calls):
+            pending = self._calls.pop(idx)
+            try:
+                args = json.loads(pending.arguments) if pending.arguments.strip() else {}
+            except json.JSONDecodeError:
+                args = {"raw": pending.arguments}
+            out.append(_typed_call(pending.id, pending.name, args))
+        return out
+
+    def _accumulate(self, call: dict) -> ChatDelta | None:
+        idx = call.get("index", 0)
+        pending = self._calls.get(idx)
+        if pending is None or (call.get("id") and pending.id and call["id"] != pending.id):
+            pending = self._calls[idx] = _PendingCall()
+        pending.id = call.get("id") or pending.id
+        fn = call.get("function") or {}
+        pending.name = fn.get("name") or pending.name
+        pending.arguments += fn.get("arguments") or ""
+        if not pending.arguments.strip():
+            return None  # name / id only so far: arguments follow
+        try:
+            args = json.loads(pending.arguments)
+        except json.JSONDecodeError:
+            return None  # more argument fragments to come
+        del self._calls[idx]
+        return _typed_call(pending.id, pending.name, args)
+
+
+def _typed_call(call_id: str | None, name: str, args: dict) -> ChatDelta:
+    if name == "_meiliSearchProgress":
+        params = args.get("function_parameters") or {}
+        if isinstance(params, str):
+            try:
+                params = json.loads(params)
+            except json.JSONDecodeError:
+                params = {"raw": params}
+        return SearchProgress(args.get("call_id", call_id), args.get("function_name"), params)
+    if name == "_meiliSearchSources":
+        return SearchSources(args.get("call_id", call_id), list(args.get("documents") or []))
+    return ToolCallDelta(call_id, name, args)
+
+
+# ---- client ----
+
+class AsyncChatClient:
+    """Pooled async client for POST /chats/{workspace}/chat/completions."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None,
+        *,
+        workspace: str = WORKSPACE_UID,
+        model: str | None = None,
+        max_connections: int = 100,
+        max_streams: int | None = None,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+        read_size: int = 4096,
+    ):
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.workspace = workspace
+        self.model = model
+        self.read_size = read_size
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._slots = asyncio.Semaphore(max_streams or max_connections)
+
+    @classmethod
+    def from_settings(cls, **kwargs) -> "AsyncChatClient":
+        from config import load_settings
+
+        settings = load_settings()
+        if not settings.meilisearch_api_key:
+            raise SystemExit("MEILISEARCH_API_KEY is required for chat (see README).")
+        kwargs.setdefault("model", settings.mistral_chat_model)
+        return cls(settings.meilisearch_url, settings.meilisearch_api_key, **kwargs)
+
+    async def __aenter__(self) -> "AsyncChatClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    def conversation(self, system_prompt: str | None = None) -> "Conversation":
+        return Conversation(self, system_prompt)
+
+    async def stream(self, messages: list[dict], *, workspace: str | None = None) -> AsyncIterator[ChatDelta]:
+        """Stream one completion for `messages`; ends with StreamDone. Raises ChatStreamError on API errors."""
+        body: dict[str, Any] = {"messages": messages, "stream": True, "tools": MEILI_TOOLS}
+        if self.model:
+            body["model"] = self.model
+        path = f"/chats/{workspace or self.workspace}/chat/completions"
+        async with self._slots:
+            async with self._http.stream("POST", path, json=body) as response:
+                if response.status_code != 200:
+                    text = (await response.aread()).decode("utf-8", "replace")
+                    raise ChatStreamError(f"Chat API error {response.status_code}: {text[:500]}")
+                parser, decoder = SSEParser(), DeltaDecoder()
+                async for raw in response.aiter_bytes(self.read_size):  # decoded (gzip / br), unlike aiter_raw
+                    for event in parser.feed(raw):
+                        if event.data.strip() == "[DONE]":
+                            for delta in decoder.flush():
+                                yield delta
+                            yield StreamDone(decoder.finish_reason, decoder.usage)
+                            return
+                        try:
+                            payload = json.loads(event.data)
+                        except json.JSONDecodeError:
+                            continue
+                        for delta in decoder.decode(payload):
+                            yield delta
+                for delta in decoder.flush():
+                    yield delta
+                yield StreamDone(decoder.finish_reason, decoder.usage)
+
+
+class Conversation:
+    """Message history for one chat session; ask() streams the answer and records it."""
+
+    def __init__(self, client: AsyncChatClient, system_prompt: str | None = None):
+        self.client = client
+        self.messages: list[dict] = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        self.sources: list[dict] = []  # documents of the last answer
+
+    async def ask(self, question: str) -> AsyncIterator[ChatDelta]:
+        """
+        Stream the answer to `question`. The question and the answer are appended to the
+        history only when the stream completes (a cancelled turn leaves no trace).
+        """
+        turn = [{"role": "user", "content": question}]
+        appended: list[dict] = []
+        parts: list[str] = []
+        sources: list[dict] = []
+        async for delta in self.client.stream(self.messages + turn):
+            if isinstance(delta, ContentDelta):
+                parts.append(delta.text)
+            elif isinstance(delta, SearchSources):
+                sources.extend(delta.documents)
+            elif isinstance(delta, ToolCallDelta) and delta.name == "_meiliAppendConversationMessage":
+                appended.append(delta.arguments)
+            yield delta
+        self.messages += turn + appended + [{"role": "assistant", "content": "".join(parts)}]
+        self.sources = sources
+
+
+@dataclass
+class SessionResult:
+    first_token_ms: float | None = None
+    total_ms: float = 0.0
+    chars: int = 0
+    sources: int = 0
+    error: str | None = None
+    text: list[str] = field(default_factory=list)
+
+
+async def _run_session(client: AsyncChatClient, question: str, echo: bool) -> SessionResult:
+    result = SessionResult()
+    t0 = time.perf_counter()
+    try:
+        async for delta in client.conversation().ask(question):
+            if isinstance(delta, ContentDelta):
+                if result.first_token_ms is None:
+                    result.first_token_ms = (time.perf_counter() - t0) * 1000
+                result.chars += len(delta.text)
+                if echo:
+                    print(delta.text, end="", flush=True)
+            elif isinstance(delta, SearchSources):
+                result.sources += len(delta.documents)
+            elif isinstance(delta, SearchProgress) and echo:
+                print(f"[searching {delta.parameters.get('index_uid', '?')}: {delta.parameters.get('q', '')!r}]", file=sys.stderr)
+    except (ChatStreamError, httpx.HTTPError) as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.total_ms = (time.perf_counter() - t0) * 1000
+    return result
+
+
+async def _main_async(question: str, sessions: int, max_streams: int, url: str | None) -> None:
+    kwargs = {"max_connections": max(max_streams, 1), "max_streams": max_streams}
+    client = AsyncChatClient(url, None, **kwargs) if url else AsyncChatClient.from_settings(**kwargs)
+    async with client:
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(_run_session(client, question, sessions == 1) for _ in range(sessions)))
+        wall = time.perf_counter() - t0
+    if sessions == 1:
+        print()
+    ok = [r for r in results if r.error is None]
+    ttft = sorted(r.first_token_ms for r in ok if r.first_token_ms is not None)
+    if ttft:
+        print(f"{LOG_PREFIX} {len(ok)}/{sessions} sessions ok in {wall:.1f}s; first token p50 {ttft[len(ttft) // 2]:.0f} ms, max {ttft[-1]:.0f} ms")
+    for r in [r for r in results if r.error][:5]:
+        print(f"{LOG_PREFIX} FAILED: {r.error}", file=sys.stderr)
+
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    parser = argparse.ArgumentParser(description="Async native-chat client (one or many concurrent sessions).")
+    parser.add_argument("question", nargs="+")
+    parser.add_argument("--sessions", type=int, default=1, help="Concurrent sessions asking the question")
+    parser.add_argument("--max-streams", type=int, default=50, help="Upper bound on concurrent upstream streams")
+    parser.add_argument("--url", default=None, help="Chat server root URL without auth (e.g. the fake server); default: settings")
+    args = parser.parse_args()
+    asyncio.run(_main_async(" ".join(args.question), args.sessions, args.max_streams, args.url))
+
+
+if __name__ == "__main__":
+    main()
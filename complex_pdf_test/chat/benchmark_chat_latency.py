@@ -0,0 +1,240 @@
+"""
+Chat latency benchmark: time-to-first-token and token throughput on the native chat route.
+
+Runs a question set against POST /chats/{workspace}/chat/completions (streaming) with a
+configurable concurrency and records per request:
+  - connect_ms        TCP (+ TLS) connection set-up
+  - ttfb_ms           request sent → response headers
+  - first_event_ms    start → first SSE event (Meilisearch progress / tool call)
+  - first_token_ms    start → first non-empty content delta (what the user sees)
+  - total_ms          start → [DONE]
+  - tokens, tokens_per_s  content deltas (or usage.completion_tokens) / time after the first token
+
+Percentiles per metric are printed and the run is saved to the results store (kind
+"chat_latency"; latency samples = first_token_ms).
+
+Usage (from project root):
+  uv run python complex_pdf_test/chat/benchmark_chat_latency.py --requests 40 --concurrency 4
+  uv run python complex_pdf_test/chat/benchmark_chat_latency.py --standin --chat-search 120 --token-delay 20
+  uv run python complex_pdf_test/chat/benchmark_chat_latency.py --questions questions.txt --label "v1.16"
+
+--standin starts the fake Mistral server in-process (it also serves the /chats/... route)
+and benchmarks it instead of Meilisearch, to validate the harness and compare clients.
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import cycle, islice
+from pathlib import Path
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from config import load_settings
+from complex_pdf_test.chat.ask_chat import WORKSPACE_UID
+from complex_pdf_test.results import latency_summary, new_run, save_run
+
+LOG_PREFIX = "[chat_bench]"
+DEFAULT_QUESTIONS = [
+    "What is Mixtral's architecture?",
+    "How many experts are active per token in Mixtral?",
+    "How does Mixtral compare to Llama 2 70B?",
+    "What context length does Mixtral support?",
+    "How was Mixtral Instruct fine-tuned?",
+    "Which benchmarks show Mixtral's multilingual performance?",
+]
+METRICS = ("connect_ms", "ttfb_ms", "first_event_ms", "first_token_ms", "total_ms", "tokens_per_s")
+
+
+@dataclass
+class ChatTiming:
+    question: str
+    ok: bool = True
+    error: str | None = None
+    status: int | None = None
+    connect_ms: float | None = None
+    ttfb_ms: float | None = None
+    first_event_ms: float | None = None
+    first_token_ms: float | None = None
+    total_ms: float | None = None
+    events: int = 0
+    tokens: int = 0
+    tokens_per_s: float | None = None
+
+
+def timed_chat(base_url: str, api_key: str | None, workspace: str, model: str, question: str, timeout: float = 120.0) -> ChatTiming:
+    """One streaming chat request on a fresh connection; timings relative to the start of connect()."""
+    timing = ChatTiming(question=question)
+    parts = urlsplit(base_url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.hostname, parts.port, timeout=timeout)
+    path = f"{parts.path.rstrip('/')}/chats/{workspace}/chat/completions"
+    body = json.dumps({"model": model, "messages": [{"role": "user", "content": question}], "stream": True})
+    headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    t0 = time.perf_counter()
+    ms = lambda: (time.perf_counter() - t0) * 1000  # noqa: E731
+    try:
+        conn.connect()
+        timing.connect_ms = ms()
+        conn.request("POST", path, body=body, headers=headers)
+        resp = conn.getresponse()
+        timing.ttfb_ms = ms()
+        timing.status = resp.status
+        if resp.status != 200:
+            timing.ok = False
+            timing.error = f"HTTP {resp.status}: {resp.read(300).decode('utf-8', 'replace')}"
+            return timing
+        usage_tokens = None
+        last_token_ms = None
+        while True:
+            line = resp.readline()  # not resp.fp: the response decodes chunked transfer encoding
+            if not line:
+                break
+            if not line.startswith(b"data:"):
+                continue
+            payload = line[5:].strip()
+            if timing.first_event_ms is None:
+                timing.first_event_ms = ms()
+            if payload == b"[DONE]":
+                break
+            timing.events += 1
+            try:
+                data = json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+            if "error" in data:
+                err = data["error"]
+                raise RuntimeError(err if isinstance(err, str) else err.get("message", str(err)))
+            if data.get("usage"):
+                usage_tokens = data["usage"].get("completion_tokens")
+            for choice in data.get("choices", []):
+                content = (choice.get("delta") or {}).get("content")
+                if isinstance(content, str) and content:
+                    last_token_ms = ms()
+                    if timing.first_token_ms is None:
+                        timing.first_token_ms = last_token_ms
+                    timing.tokens += 1
+        timing.total_ms = ms()
+        if usage_tokens:
+            timing.tokens = usage_tokens
+        if timing.first_token_ms is not None and last_token_ms and last_token_ms > timing.first_token_ms:
+            # Rate after the first token (excludes retrieval + prompt processing)
+            timing.tokens_per_s = (timing.tokens - 1) / ((last_token_ms - timing.first_token_ms) / 1000)
+        if timing.first_token_ms is None:
+            timing.ok = False
+            timing.error = "stream ended without content"
+    except (OSError, http.client.HTTPException, RuntimeError) as e:
+        timing.ok = False
+        timing.error = f"{type(e).__name__}: {e}"
+        timing.total_ms = ms()
+    finally:
+        conn.close()
+    return timing
+
+
+def run_benchmark(base_url: str, api_key: str | None, workspace: str, model: str, questions: list[str], *, requests: int, concurrency: int) -> tuple[list[ChatTiming], float]:
+    """Send `requests` chats (cycling over questions) with `concurrency` in flight. Returns (timings, wall seconds)."""
+    batch = list(islice(cycle(questions), requests))
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(lambda q: timed_chat(base_url, api_key, workspace, model, q), batch))
+    return timings, time.perf_counter() - t0
+
+
+def summarize(timings: list[ChatTiming]) -> dict[str, dict]:
+    """latency_summary per metric over successful requests."""
+    ok = [t for t in timings if t.ok]
+    return {m: latency_summary([getattr(t, m) for t in ok if getattr(t, m) is not None]) for m in METRICS}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chat TTFT / token throughput benchmark (native chat route).")
+    parser.add_argument("--workspace", default=WORKSPACE_UID)
+    parser.add_argument("--questions", type=Path, default=None, help="File with one question per line (default: built-in set)")
+    parser.add_argument("--requests", type=int, default=None, help="Total chats (default: one per question)")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--url", default=None, help="Server root URL (default: MEILISEARCH_URL)")
+    parser.add_argument("--standin", action="store_true", help="Benchmark an in-process fake server instead of Meilisearch")
+    parser.add_argument("--chat-search", type=float, default=80.0, help="--standin: simulated search ms")
+    parser.add_argument("--latency", default="lognormal:300,0.3", help="--standin: LLM first-token latency spec")
+    parser.add_argument("--token-delay", type=float, default=15.0, help="--standin: ms between tokens")
+    parser.add_argument("--label", default="", help="Label stored with the run")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the run to the results store")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        questions = [l.strip() for l in args.questions.read_text(encoding="utf-8").splitlines() if l.strip()]
+    n_requests = args.requests or len(questions)
+
+    settings = load_settings()
+    server = None
+    if args.standin:
+        from complex_pdf_test.standin.fake_mistral import FakeMistralConfig, LatencySpec, start_in_thread
+        server = start_in_thread(FakeMistralConfig(
+            latency=LatencySpec.parse(args.latency), token_delay_ms=args.token_delay, chat_search_ms=args.chat_search,
+        ))
+        base_url, api_key, target = server.root_url, None, "standin"
+    else:
+        base_url = (args.url or settings.meilisearch_url).rstrip("/")
+        api_key = settings.meilisearch_api_key
+        if not api_key:
+            raise SystemExit("MEILISEARCH_API_KEY is required for chat (see README).")
+        target = "meilisearch"
+
+    print(f"{LOG_PREFIX} {n_requests} chats, concurrency {args.concurrency}, target {target} ({base_url}), workspace {args.workspace}")
+    try:
+        timings, wall_s = run_benchmark(
+            base_url, api_key, args.workspace, settings.mistral_chat_model, questions,
+            requests=n_requests, concurrency=args.concurrency,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    failures = [t for t in timings if not t.ok]
+    summary = summarize(timings)
+    print()
+    print(f"{'METRIC':16} {'N':>4} {'MEAN':>9} {'P50':>9} {'P95':>9} {'P99':>9} {'MAX':>9}")
+    for metric, s in summary.items():
+        if not s:  # no successful request measured this metric
+            print(f"{metric:16} {0:4d} {'n/a':>9} {'n/a':>9} {'n/a':>9} {'n/a':>9} {'n/a':>9}")
+            continue
+        print(f"{metric:16} {s['count']:4d} {s['mean']:9.1f} {s['p50']:9.1f} {s['p95']:9.1f} {s['p99']:9.1f} {s['max']:9.1f}")
+    print(f"\n{LOG_PREFIX} {len(timings) - len(failures)}/{len(timings)} ok in {wall_s:.1f}s ({len(timings) / wall_s:.2f} chats/s)")
+    for t in failures[:5]:
+        print(f"{LOG_PREFIX} FAILED {t.question[:50]!r}: {t.error}")
+
+    if not args.no_save:
+        run = new_run(
+            "chat_latency",
+            index_uid=args.workspace,
+            label=args.label or target,
+            latencies_ms=[t.first_token_ms for t in timings if t.ok and t.first_token_ms is not None],
+            extra={
+                "target": target,
+                "concurrency": args.concurrency,
+                "wall_seconds": wall_s,
+                "failures": len(failures),
+                "summary": summary,
+                "requests": [asdict(t) for t in timings],
+            },
+        )
+        print(f"{LOG_PREFIX} Saved run {run.run_id} → {save_run(run)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Client-side RAG (alternative to the native chat route): retrieve, merge, pack, stream.
+
+Native chat caps every document at documentTemplateMaxBytes (500) and sends the 120-char
+overlap of adjacent chunks twice; the prompt size is not ours to control. Here:
+  1. REWRITE (optional)  Mistral proposes N search reformulations of the question
+  2. RETRIEVE            hybrid search for the question + reformulations, in parallel
+                         (with a query_embedder, all queries are embedded in one batched
+                         request and searched with `vector`; see search/query_embedder.py;
+                         --embedding-cache reuses the vectors stored by load/prewarm.py)
+  3. MERGE               hits from the same doc_id with consecutive chunk numbers are joined
+                         into one passage, the overlap between neighbours removed
+  4. PACK                passages in rank order into a prompt-token budget (estimated at
+                         CHARS_PER_TOKEN; the last passage is cut at a sentence boundary)
+  5. GENERATE            Mistral chat completion, streamed
+Each phase is timed (ms) and the packed context size is reported.
+
+Usage (from project root):
+  uv run python complex_pdf_test/chat/rag_chat.py "What is Mixtral's architecture?"
+  uv run python complex_pdf_test/chat/rag_chat.py "Question" --rewrites 2 --budget 1200 --show-context
+  uv run python complex_pdf_test/chat/rag_chat.py "Question" --embedding-cache complex_pdf_test/search/embedding_cache.sqlite3
+"""
+
+import asyncio
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx
+
+from complex_pdf_test.chat.async_client import ChatStreamError, SSEParser
+
+PDF_INDEX = "pdf_chunks"
+LOG_PREFIX = "[rag_chat]"
+CHARS_PER_TOKEN = 4.0  # rough estimate for Mistral tokenizers on English / French prose
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_LIMIT = 8
+MAX_OVERLAP_CHARS = 400
+SYSTEM_PROMPT = (
+    "Tu es un assistant qui répond uniquement à partir des extraits de documents fournis. "
+    "Réponds en français de façon précise et concise. Si les extraits ne contiennent pas l'information, dis-le."
+)
+_CHUNK_ID_RE = re.compile(r"^(?P<doc>.+)_c(?P<n>\d+)$")
+_SENTENCE_END_RE = re.compile(r"[.!?]\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+@dataclass
+class Passage:
+    """One or more consecutive chunks of a document, merged."""
+    doc_id: str
+    chunk_ids: list[str]
+    text: str
+    title: str
+    rank: int  # best rank of its chunks over all queries (0 = best)
+    score: float
+
+
+@dataclass
+class RagResult:
+    answer: str = ""
+    queries: list[str] = field(default_factory=list)
+    passages: list[Passage] = field(default_factory=list)
+    context_tokens: int = 0
+    context_chars_saved: int = 0  # overlap removed by merging
+    usage: dict | None = None
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+# ---- merge / pack ----
+
+def _overlap(prev: str, nxt: str, max_chars: int = MAX_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of prev that is a prefix of nxt (bounded)."""
+    for n in range(min(len(prev), len(nxt), max_chars), 0, -1):
+        if prev.endswith(nxt[:n]):
+            return n
+    return 0
+
+
+def merge_hits(hits: list[dict]) -> tuple[list[Passage], int]:
+    """
+    hits: search hits in rank order (deduplicated), each with id, doc_id, chunk_text, title.
+    Consecutive chunks (…_c3, …_c4) of one doc_id become one passage. Returns passages in
+    rank order and the number of overlapping characters removed.
+    """
+    ranked: dict[str, tuple[int, dict]] = {}
+    for rank, hit in enumerate(hits):
+        ranked.setdefault(hit["id"], (rank, hit))
+
+    by_doc: dict[str, list[tuple[int, int, dict]]] = {}
+    singles: list[Passage] = []
+    for chunk_id, (rank, hit) in ranked.items():
+        m = _CHUNK_ID_RE.match(chunk_id)
+        if not m:
+            singles.append(Passage(hit.get("doc_id", ""), [chunk_id], hit.get("chunk_text", ""), hit.get("title", ""), rank, hit.get("_rankingScore", 0.0)))
+            continue
+        by_doc.setdefault(hit.get("doc_id") or m["doc"], []).append((int(m["n"]), rank, hit))
+
+    passages = singles
+    saved = 0
+    for doc_id, items in by_doc.items():
+        items.sort(key=lambda t: t[0])
+        groups = [[items[0]]]
+        for item in items[1:]:
+            if item[0] == groups[-1][-1][0] + 1:
+                groups[-1].append(item)
+            else:
+                groups.append([item])
+        for group in groups:
+            passage, cut = _join(doc_id, group)
+            passages.append(passage)
+            saved += cut
+    passages.sort(key=lambda p: p.rank)
+    return passages, saved
+
+
+def _join(doc_id: str, group: list[tuple[int, int, dict]]) -> tuple[Passage, int]:
+    text = group[0][2].get("chunk_text", "")
+    saved = 0
+    for _, _, hit in group[1:]:
+        nxt = hit.get("chunk_text", "")
+        cut = _overlap(text, nxt)
+        saved += cut
+        text = text + ("" if cut else "\n\n") + nxt[cut:]
+    titles = [h.get("title") for _, _, h in group if h.get("title")]
+    passage = Passage(
+        doc_id=doc_id,
+        chunk_ids=[h["id"] for _, _, h in group],
+        text=text,
+        title=titles[0] if titles else "",
+        rank=min(r for _, r, _ in group),
+        score=max(h.get("_rankingScore", 0.0) for _, _, h in group),
+    )
+    return passage, saved
+
+
+def pack_context(passages: list[Passage], token_budget: int, min_tail_tokens: int = 60) -> tuple[list[Passage], str, int]:
+    """Greedy packing in rank order; the passage that overflows is cut at a sentence end if enough budget remains."""
+    used = 0
+    packed: list[Passage] = []
+    blocks: list[str] = []
+    for p in passages:
+        header = f"[{len(packed) + 1}] {p.title}\n" if p.title else f"[{len(packed) + 1}]\n"
+        cost = estimate_tokens(header + p.text)
+        if used + cost <= token_budget:
+            text = p.text
+        else:
+            remaining_chars = int((token_budget - used - estimate_tokens(header)) * CHARS_PER_TOKEN)
+            if remaining_chars < min_tail_tokens * CHARS_PER_TOKEN:
+                break
+            head = p.text[:remaining_chars]
+            ends = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+            text = head[: ends[-1]].rstrip() if ends else head.rstrip()
+            cost = estimate_tokens(header + text)
+        packed.append(p)
+        blocks.append(header + text)
+        used += cost
+        if used >= token_budget:
+            break
+    return packed, "\n\n".join(blocks), used
+
+
+# ---- HTTP phases ----
+
+async def rewrite_queries(mistral: httpx.AsyncClient, model: str, question: str, n: int) -> list[str]:
+    """Ask Mistral for n short search queries (JSON array). Falls back to none on malformed output."""
+    r = await mistral.post("/chat/completions", json={
+        "model": model,
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": f'Return JSON {{"queries": [...]}} with {n} short, different keyword search queries for the question. No prose.'},
+            {"role": "user", "content": question},
+        ],
+    })
+    r.raise_for_status()
+    try:
+        content = r.json()["choices"][0]["message"]["content"]
+        queries = json.loads(content).get("queries", [])
+    except (KeyError, IndexError, json.JSONDecodeError, AttributeError):
+        return []
+    return [q for q in queries if isinstance(q, str) and q.strip()][:n]
+
+
+async def hybrid_search(
+    meili: httpx.AsyncClient, index_uid: str, query: str, limit: int, semantic_ratio: float, vector: list[float] | None = None,
+) -> list[dict]:
+    body = {
+        "q": query,
+        "limit": limit,
+        "hybrid": {"semanticRatio": semantic_ratio, "embedder": "mistral"},
+        "attributesToRetrieve": ["id", "doc_id", "title", "chunk_text", "page"],
+        "showRankingScore": True,
+    }
+    if vector is not None:
+        body["vector"] = vector  # embedded by us: Meilisearch skips its embedder call
+    r = await meili.post(f"/indexes/{index_uid}/search", json=body)
+    r.raise_for_status()
+    return r.json().get("hits", [])
+
+
+def interleave(result_lists: list[list[dict]]) -> list[dict]:
+    """Round-robin over the per-query rankings (question first), keeping the first occurrence of each id."""
+    seen: set[str] = set()
+    out: list[dict] = []
+    for i in range(max((len(r) for r in result_lists), default=0)):
+        for hits in result_lists:
+            if i < len(hits) and hits[i]["id"] not in seen:
+                seen.add(hits[i]["id"])
+                out.append(hits[i])
+    return out
+
+
+async def rag_answer(
+    question: str,
+    *,
+    meili: httpx.AsyncClient,
+    mistral: httpx.AsyncClient,
+    model: str,
+    index_uid: str = PDF_INDEX,
+    limit: int = DEFAULT_LIMIT,
+    semantic_ratio: float = 0.5,
+    rewrites: int = 0,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    on_token=None,
+    query_embedder=None,
+) -> RagResult:
+    """Run the five phases; on_token(str) is called for each streamed piece of the answer."""
+    result = RagResult()
+    t_start = time.perf_counter()
+
+    def lap(name: str, since: float) -> float:
+        now = time.perf_counter()
+        result.timings_ms[name] = (now - since) * 1000
+        return now
+
+    t = t_start
+    queries = [question]
+    if rewrites:
+        queries += await rewrite_queries(mistral, model, question, rewrites)
+        t = lap("rewrite", t)
+    result.queries = queries
+
+    vectors = [None] * len(queries)
+    if query_embedder is not None:
+        vectors = await query_embedder.embed_many(queries)
+        t = lap("embed", t)
+    result_lists = await asyncio.gather(*(
+        hybrid_search(meili, index_uid, q, limit, semantic_ratio, vector) for q, vector in zip(queries, vectors)
+    ))
+    t = lap("retrieve", t)
+
+    passages, result.context_chars_saved = merge_hits(interleave(list(result_lists)))
+    result.passages, context, result.context_tokens = pack_context(passages, token_budget)
+    t = lap("merge_pack", t)
+
+    body = {
+        "model": model,
+        "stream": True,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Extraits :\n\n{context}\n\nQuestion : {question}"},
+        ],
+    }
+    parts: list[str] = []
+    t_gen = t
+    async with mistral.stream("POST", "/chat/completions", json=body) as response:
+        if response.status_code != 200:
+            text = (await response.aread()).decode("utf-8", "replace")
+            raise ChatStreamError(f"Mistral chat error {response.status_code}: {text[:500]}")
+        parser = SSEParser()
+        done = False
+        async for raw in response.aiter_bytes():  # decoded (gzip / br), unlike aiter_raw
+            for event in parser.feed(raw):
+                if event.data.strip() == "[DONE]":
+                    done = True
+                    break
+                try:
+                    data = json.loads(event.data)
+                except json.JSONDecodeError:
+                    continue
+                if data.get("usage"):
+                    result.usage = data["usage"]
+                for choice in data.get("choices", []):
+                    content = (choice.get("delta") or {}).get("content")
+                    if isinstance(content, str) and content:
+                        if not parts:
+                            result.timings_ms["first_token"] = (time.perf_counter() - t_gen) * 1000
+                        parts.append(content)
+                        if on_token:
+                            on_token(content)
+            if done:
+                break
+    lap("generate", t_gen)
+    result.timings_ms["total"] = (time.perf_counter() - t_start) * 1000
+    result.timings_ms["time_to_first_token"] = result.timings_ms.get("first_token", 0.0) + (t_gen - t_start) * 1000
+    result.answer = "".join(parts)
+    return result
+
+
+async def _main_async(args) -> None:
+    from config import load_settings
+
+    settings = load_settings()
+    meili_headers = {"Authorization": f"Bearer {settings.meilisearch_api_key}"} if settings.meilisearch_api_key else {}
+    async with httpx.AsyncClient(base_url=settings.meilisearch_url.rstrip("/"), headers=meili_headers, timeout=30.0) as meili, \
+            httpx.AsyncClient(base_url=settings.mistral_base_url, headers={"Authorization": f"Bearer {settings.mistral_api_key}"}, timeout=120.0) as mistral:
+        query_embedder = None
+        if args.embedding_cache:
+            from complex_pdf_test.search.embedding_cache import EmbeddingCache
+            from complex_pdf_test.search.query_embedder import QueryEmbedder, mistral_batch_embedder
+
+            cache = EmbeddingCache(args.embedding_cache, settings.mistral_embedding_model)
+            embed_batch = mistral_batch_embedder(settings.mistral_base_url, settings.mistral_api_key, settings.mistral_embedding_model, http=mistral)
+            query_embedder = QueryEmbedder(embed_batch, cache=cache)
+        result = await rag_answer(
+            args.question,
+            meili=meili,
+            mistral=mistral,
+            model=settings.mistral_chat_model,
+            index_uid=args.index,
+            limit=args.limit,
+            semantic_ratio=args.semantic_ratio,
+            rewrites=args.rewrites,
+            token_budget=args.budget,
+            query_embedder=query_embedder,
+            on_token=lambda s: print(s, end="", flush=True),
+        )
+    print("\n")
+    if args.show_context:
+        for i, p in enumerate(result.passages, start=1):
+            print(f"--- [{i}] {p.doc_id} {'+'.join(p.chunk_ids)} (rank {p.rank}) ---\n{p.text[:400]}\n")
+    print(f"{LOG_PREFIX} Queries: {result.queries}")
+    if query_embedder is not None:
+        print(f"{LOG_PREFIX} Query embeddings: {query_embedder.stats.cache_hits}/{query_embedder.stats.queries} from cache")
+    print(f"{LOG_PREFIX} Context: {len(result.passages)} passages, ~{result.context_tokens} tokens (budget {args.budget}), {result.context_chars_saved} overlap chars removed")
+    if result.usage:
+        print(f"{LOG_PREFIX} Usage: {result.usage}")
+    print(f"{LOG_PREFIX} Timings: " + ", ".join(f"{k} {v:.0f} ms" for k, v in result.timings_ms.items()))
+
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    parser = argparse.ArgumentParser(description="Client-side RAG: parallel hybrid retrieval, chunk merging, token-budget packing, streamed answer.")
+    parser.add_argument("question")
+    parser.add_argument("--index", default=PDF_INDEX)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Hits per query")
+    parser.add_argument("--semantic-ratio", type=float, default=0.5)
+    parser.add_argument("--rewrites", type=int, default=0, help="Extra search queries proposed by Mistral (searched in parallel)")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Context budget in (estimated) tokens")
+    parser.add_argument("--show-context", action="store_true", help="Print the packed passages")
+    parser.add_argument("--embedding-cache", default=None, help="Embed queries client-side, reusing vectors from this cache (see load/prewarm.py)")
+    asyncio.run(_main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
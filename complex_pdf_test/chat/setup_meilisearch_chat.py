@@ -104,7 +104,7 @@ def main() -> None:
     workspace_body = {
         "source": "mistral",
         "apiKey": settings.mistral_api_key,
-        "baseUrl": "https://api.mistral.ai/v1",
+        "baseUrl": settings.meilisearch_mistral_base_url,
         "prompts": {
             "system": "Tu es un assistant qui répond uniquement à partir des extraits de documents fournis. Réponds en français de façon précise et concise. Si les extraits ne contiennent pas l'information, dis-le.",
         },
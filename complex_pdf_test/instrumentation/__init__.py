@@ -0,0 +1,28 @@
+"""Per-stage spans, metrics exporters (JSONL, Prometheus), memory tracking / budget, sliding-window histograms and opt-in cProfile / tracemalloc hooks."""
+
+from .exporters import JsonlExporter, PrometheusExporter, render_prometheus
+from .memory import MemoryBudget, MemoryBudgetExceeded, MemoryTracker, PeakRss, read_rss_bytes
+from .options import add_instrumentation_args, setup_instrumentation
+from .profiling import StageProfiler
+from .spans import MetricsRegistry, Span, configure, get_registry, span
+from .window import SlidingHistogram
+
+__all__ = [
+    "JsonlExporter",
+    "MemoryBudget",
+    "MemoryBudgetExceeded",
+    "MemoryTracker",
+    "MetricsRegistry",
+    "PeakRss",
+    "PrometheusExporter",
+    "SlidingHistogram",
+    "Span",
+    "StageProfiler",
+    "add_instrumentation_args",
+    "configure",
+    "get_registry",
+    "read_rss_bytes",
+    "render_prometheus",
+    "setup_instrumentation",
+    "span",
+]
@@ -0,0 +1,115 @@
+"""Span exporters: JSONL (one line per finished span) and Prometheus text format."""
+
+import json
+import re
+import threading
+from pathlib import Path
+
+from .spans import MetricsRegistry, Span
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Level-type attributes (bytes resident / at peak): exported as max gauges, not summed
+GAUGE_ATTRS = ("rss_start_bytes", "rss_end_bytes", "rss_peak_bytes", "py_alloc_peak_bytes")
+_METRIC_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def quantile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank quantile on a sorted list."""
+    if not sorted_values:
+        return 0.0
+    idx = min(int(len(sorted_values) * q), len(sorted_values) - 1)
+    return sorted_values[idx]
+
+
+class JsonlExporter:
+    """Append each finished span as one JSON line (aggregate later with instrumentation/report.py)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, s: Span) -> None:
+        line = json.dumps(s.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def flush(self, registry: MetricsRegistry) -> None:
+        with self._lock:
+            self._fh.flush()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(spans: list[dict], prefix: str = "pipeline") -> str:
+    """
+    Prometheus text exposition of span dicts: a duration summary per stage
+    (quantiles, _sum, _count), error counts, a _total counter per numeric attribute and
+    a _max gauge per memory level attribute (GAUGE_ATTRS).
+    """
+    by_stage: dict[str, list[dict]] = {}
+    for s in spans:
+        by_stage.setdefault(s["name"], []).append(s)
+
+    lines = [
+        f"# HELP {prefix}_stage_duration_seconds Duration of pipeline stages.",
+        f"# TYPE {prefix}_stage_duration_seconds summary",
+    ]
+    for stage, items in sorted(by_stage.items()):
+        label = f'stage="{_escape_label(stage)}"'
+        durations = sorted(i["duration_s"] for i in items)
+        for q in QUANTILES:
+            lines.append(f'{prefix}_stage_duration_seconds{{{label},quantile="{q}"}} {quantile(durations, q):.6f}')
+        lines.append(f"{prefix}_stage_duration_seconds_sum{{{label}}} {sum(durations):.6f}")
+        lines.append(f"{prefix}_stage_duration_seconds_count{{{label}}} {len(durations)}")
+
+    lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+    for stage, items in sorted(by_stage.items()):
+        errors = sum(1 for i in items if i.get("status") == "error")
+        lines.append(f'{prefix}_stage_errors_total{{stage="{_escape_label(stage)}"}} {errors}')
+
+    reserved = {"name", "run_id", "span_id", "parent_id", "start_ts", "duration_s", "status"}
+    attr_totals: dict[str, dict[str, float]] = {}
+    attr_max: dict[str, dict[str, float]] = {}
+    for stage, items in by_stage.items():
+        for i in items:
+            for key, value in i.items():
+                if key in reserved or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = _METRIC_NAME_RE.sub("_", key)
+                if key in GAUGE_ATTRS:
+                    attr_max.setdefault(metric, {})[stage] = max(attr_max.get(metric, {}).get(stage, value), value)
+                    continue
+                attr_totals.setdefault(metric, {}).setdefault(stage, 0.0)
+                attr_totals[metric][stage] += value
+    for metric, stages in sorted(attr_totals.items()):
+        lines.append(f"# TYPE {prefix}_stage_{metric}_total counter")
+        for stage, total in sorted(stages.items()):
+            lines.append(f'{prefix}_stage_{metric}_total{{stage="{_escape_label(stage)}"}} {total:g}')
+    for metric, stages in sorted(attr_max.items()):
+        lines.append(f"# TYPE {prefix}_stage_{metric}_max gauge")
+        for stage, value in sorted(stages.items()):
+            lines.append(f'{prefix}_stage_{metric}_max{{stage="{_escape_label(stage)}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """Write all spans of the registry in Prometheus text format on flush (node_exporter textfile style)."""
+
+    def __init__(self, path: str | Path, prefix: str = "pipeline"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def export(self, s: Span) -> None:
+        pass  # aggregated at flush time
+
+    def flush(self, registry: MetricsRegistry) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = render_prometheus([s.to_dict() for s in registry.spans], self.prefix)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(self.path)  # atomic for textfile collectors
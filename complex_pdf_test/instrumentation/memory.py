@@ -0,0 +1,225 @@
+"""
+Per-stage memory: resident set size (RSS) and Python allocations, plus a memory budget.
+
+MemoryTracker is a registry hook (see spans.configure) that sets on every span:
+  rss_start_bytes, rss_end_bytes, rss_peak_bytes   (/proc/self/status)
+  py_alloc_peak_bytes                              (tracemalloc, when python_allocs=True)
+
+RSS peaks come from VmHWM, reset per span through /proc/self/clear_refs where the kernel
+allows it, otherwise from sampling every SAMPLE_INTERVAL_S (short spikes can be missed).
+RSS is what gets a worker OOM-killed (Docling models, page images, native buffers);
+Python allocations show which stage holds text / dict copies. tracemalloc is process
+wide, so with concurrent pipelines in threads the allocation peaks overlap.
+
+MemoryBudget is the admission check used by run_pipeline's budget mode: before a stage
+starts, current RSS + the stage's estimate must fit under the limit.
+"""
+
+import gc
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from .spans import Span
+
+SAMPLE_INTERVAL_S = 0.05
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _proc_status(*keys: bytes) -> dict[bytes, int]:
+    out: dict[bytes, int] = {}
+    try:
+        with _PROC_STATUS.open("rb") as fh:
+            for line in fh:
+                key = line.split(b":", 1)[0]
+                if key in keys:
+                    out[key] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return out
+
+
+def read_rss_bytes() -> int:
+    """Current RSS of this process (VmRSS on Linux; peak RSS from getrusage elsewhere)."""
+    rss = _proc_status(b"VmRSS").get(b"VmRSS")
+    if rss is not None:
+        return rss
+    # Fallback (macOS / no procfs): ru_maxrss is a high-water mark, not the current RSS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def read_rss_hwm_bytes() -> int | None:
+    """RSS high-water mark since start or the last reset_rss_hwm() (None without procfs)."""
+    return _proc_status(b"VmHWM").get(b"VmHWM")
+
+
+def reset_rss_hwm() -> bool:
+    """Reset VmHWM to the current RSS (Linux >= 4.0); False when not permitted / not available."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+class PeakRss:
+    """
+    Sample RSS in a background thread while the block runs:
+
+        with PeakRss() as p:
+            ...
+        p.start_bytes, p.peak_bytes, p.end_bytes
+    """
+
+    def __init__(self, interval_s: float = SAMPLE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self.end_bytes = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.peak_bytes = max(self.peak_bytes, read_rss_bytes())
+
+    def __enter__(self) -> "PeakRss":
+        self._hwm_reset = reset_rss_hwm()
+        self.start_bytes = self.peak_bytes = read_rss_bytes()
+        self._thread = threading.Thread(target=self._sample, name="peak-rss", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.end_bytes = read_rss_bytes()
+        hwm = read_rss_hwm_bytes() if self._hwm_reset else None
+        self.peak_bytes = max(self.peak_bytes, self.end_bytes, hwm or 0)
+
+
+class MemoryTracker:
+    """Registry hook: RSS start / end / peak and (optionally) Python allocation peak per span."""
+
+    def __init__(self, *, python_allocs: bool = True, interval_s: float = SAMPLE_INTERVAL_S):
+        self.python_allocs = python_allocs
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._open: list[dict] = []  # tokens of spans still running (any thread)
+        self._stop: threading.Event | None = None
+        self._started_tracemalloc = False
+        self._hwm_reset = reset_rss_hwm()  # without a working reset, VmHWM is the process lifetime peak
+
+    def _sample(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval_s):
+            rss = read_rss_bytes()
+            with self._lock:
+                for token in self._open:
+                    token["rss_peak"] = max(token["rss_peak"], rss)
+
+    def _fold_rss_peak(self) -> None:
+        # Same for VmHWM: fold it into the open spans before it is reset
+        hwm = read_rss_hwm_bytes() if self._hwm_reset else None
+        if hwm is not None:
+            for token in self._open:
+                token["rss_peak"] = max(token["rss_peak"], hwm)
+
+    def _fold_alloc_peak(self) -> None:
+        # reset_peak() is global: before resetting for a new span, credit the peak so far to every open span
+        peak = tracemalloc.get_traced_memory()[1]
+        for token in self._open:
+            token["alloc_peak"] = max(token["alloc_peak"], peak)
+
+    def start(self, s: Span) -> dict:
+        with self._lock:
+            self._fold_rss_peak()
+            if self._hwm_reset:
+                reset_rss_hwm()
+            rss = read_rss_bytes()
+            if self.python_allocs:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(1)
+                    self._started_tracemalloc = True
+                self._fold_alloc_peak()
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+            else:
+                base = 0
+            token = {"rss_start": rss, "rss_peak": rss, "alloc_base": base, "alloc_peak": base}
+            self._open.append(token)
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._sample, args=(self._stop,), name="memory-tracker", daemon=True).start()
+        return token
+
+    def stop(self, s: Span, token: dict) -> None:
+        with self._lock:
+            self._fold_rss_peak()
+            rss = read_rss_bytes()
+            if self.python_allocs and tracemalloc.is_tracing():
+                self._fold_alloc_peak()
+            self._open.remove(token)
+            if not self._open:
+                self._stop.set()
+                self._stop = None
+                if self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+        attrs = {
+            "rss_start_bytes": token["rss_start"],
+            "rss_end_bytes": rss,
+            "rss_peak_bytes": max(token["rss_peak"], rss),
+        }
+        if self.python_allocs:
+            attrs["py_alloc_peak_bytes"] = token["alloc_peak"] - token["alloc_base"]
+        s.set(**attrs)
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """A stage would not fit in the memory budget (the caller may retry later or on a bigger worker)."""
+
+    def __init__(self, stage: str, needed_bytes: int, limit_bytes: int):
+        self.stage = stage
+        self.needed_bytes = needed_bytes
+        self.limit_bytes = limit_bytes
+        super().__init__(
+            f"{stage}: needs ~{needed_bytes / 2**20:.0f} MB, budget is {limit_bytes / 2**20:.0f} MB"
+        )
+
+
+class MemoryBudget:
+    """RSS ceiling for one pipeline process; admission checks before memory-heavy stages."""
+
+    def __init__(self, limit_bytes: int, *, wait_s: float = 0.0):
+        self.limit_bytes = limit_bytes
+        self.wait_s = wait_s  # how long admit() may wait for memory to be released before refusing
+
+    @classmethod
+    def from_mb(cls, limit_mb: float, **kwargs) -> "MemoryBudget":
+        return cls(int(limit_mb * 2**20), **kwargs)
+
+    def headroom_bytes(self) -> int:
+        return self.limit_bytes - read_rss_bytes()
+
+    def admit(self, stage: str, estimate_bytes: int) -> None:
+        """
+        Return when current RSS + estimate fits under the limit. Collects garbage first,
+        then waits up to wait_s for other work in the process to release memory, then raises
+        MemoryBudgetExceeded.
+        """
+        deadline = time.monotonic() + self.wait_s
+        gc.collect()
+        while True:
+            rss = read_rss_bytes()
+            if rss + estimate_bytes <= self.limit_bytes:
+                return
+            if time.monotonic() >= deadline:
+                raise MemoryBudgetExceeded(stage, rss + estimate_bytes, self.limit_bytes)
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+            gc.collect()
@@ -0,0 +1,42 @@
+"""Command-line switches for metrics export and profiling, shared by the pipeline entry points."""
+
+import argparse
+from pathlib import Path
+
+from .exporters import JsonlExporter, PrometheusExporter
+from .memory import MemoryTracker
+from .profiling import StageProfiler
+from .spans import MetricsRegistry, configure
+
+DEFAULT_PROFILE_DIR = Path("profiles")
+
+
+def add_instrumentation_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--metrics-jsonl", type=Path, default=None, help="Append one JSON line per stage span to this file")
+    group.add_argument("--metrics-prom", type=Path, default=None, help="Write per-stage metrics in Prometheus text format to this file")
+    group.add_argument("--track-memory", action="store_true", help="Record RSS start / end / peak and Python allocation peak per stage")
+    group.add_argument("--profile", choices=["cpu", "memory", "all"], default=None, help="Capture cProfile and/or tracemalloc per stage")
+    group.add_argument("--profile-stages", default=None, help="Comma-separated stage names to profile (default: all)")
+    group.add_argument("--profile-dir", type=Path, default=DEFAULT_PROFILE_DIR, help="Where profiles are written")
+
+
+def setup_instrumentation(args: argparse.Namespace) -> MetricsRegistry:
+    """Configure exporters / profilers from parsed args (no-op when none of the switches is set)."""
+    exporters: list = []
+    if args.metrics_jsonl:
+        exporters.append(JsonlExporter(args.metrics_jsonl))
+    if args.metrics_prom:
+        exporters.append(PrometheusExporter(args.metrics_prom))
+    hooks: list = []
+    if args.track_memory:
+        hooks.append(MemoryTracker())
+    if args.profile:
+        stages = {s.strip() for s in args.profile_stages.split(",")} if args.profile_stages else None
+        hooks.append(StageProfiler(
+            args.profile_dir,
+            cpu=args.profile in ("cpu", "all"),
+            memory=args.profile in ("memory", "all"),
+            stages=stages,
+        ))
+    return configure(exporters=exporters, hooks=hooks)
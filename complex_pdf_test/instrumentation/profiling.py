@@ -0,0 +1,87 @@
+"""
+Opt-in per-stage profiling hooks: cProfile (CPU hotspots) and tracemalloc (Python allocations).
+
+Installed as registry hooks (see spans.configure); only stages listed in `stages`
+(or all when None) are profiled. Profilers do not nest: while one stage is being
+profiled, nested stages are timed but not profiled separately.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from pathlib import Path
+
+from .spans import Span
+
+TOP_N = 25
+
+
+class StageProfiler:
+    """cProfile and/or tracemalloc capture around selected spans; artifacts written to out_dir."""
+
+    def __init__(self, out_dir: str | Path, *, cpu: bool = False, memory: bool = False, stages: set[str] | None = None):
+        self.out_dir = Path(out_dir)
+        self.cpu = cpu
+        self.memory = memory
+        self.stages = stages
+        self._lock = threading.Lock()
+        self._cpu_busy = False
+        self._mem_busy = False
+
+    def _selected(self, s: Span) -> bool:
+        return self.stages is None or s.name in self.stages
+
+    def start(self, s: Span):
+        if not self._selected(s):
+            return None
+        token: dict = {}
+        with self._lock:
+            if self.cpu and not self._cpu_busy:
+                self._cpu_busy = True
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                    token["cpu"] = profiler
+                except ValueError:  # another profiler (e.g. an IDE) is active
+                    self._cpu_busy = False
+            if self.memory and not self._mem_busy:
+                self._mem_busy = True
+                token["mem_started"] = not tracemalloc.is_tracing()
+                if token["mem_started"]:
+                    tracemalloc.start(10)
+                tracemalloc.reset_peak()
+                token["mem_base"] = tracemalloc.get_traced_memory()[0]
+        return token or None
+
+    def stop(self, s: Span, token) -> None:
+        if not token:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        # Plain string names: span names contain dots (parse.convert), which with_suffix would cut at
+        base = f"{s.run_id}-{s.name}-{s.span_id}"
+        profiler = token.get("cpu")
+        if profiler is not None:
+            profiler.disable()
+            prof_path = self.out_dir / f"{base}.prof"
+            profiler.dump_stats(prof_path)
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(TOP_N)
+            (self.out_dir / f"{base}.cpu.txt").write_text(buf.getvalue(), encoding="utf-8")
+            s.set(cpu_profile=str(prof_path))
+            with self._lock:
+                self._cpu_busy = False
+        if "mem_base" in token:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if token["mem_started"]:
+                tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:TOP_N]
+            lines = [f"peak={peak} B  current={current} B  base={token['mem_base']} B", ""]
+            lines += [str(stat) for stat in top]
+            mem_path = self.out_dir / f"{base}.mem.txt"
+            mem_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            s.set(py_alloc_peak_bytes=peak - token["mem_base"], py_alloc_net_bytes=current - token["mem_base"], memory_profile=str(mem_path))
+            with self._lock:
+                self._mem_busy = False
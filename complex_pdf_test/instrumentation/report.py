@@ -0,0 +1,82 @@
+"""
+Aggregate span JSONL files: per-stage count, mean, p50 / p95 / p99, max and, for runs with
+--track-memory, the highest RSS peak and Python allocation peak.
+
+Usage (from project root):
+  uv run python complex_pdf_test/instrumentation/report.py metrics.jsonl [more.jsonl ...]
+  uv run python complex_pdf_test/instrumentation/report.py metrics.jsonl --prom metrics.prom
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from complex_pdf_test.instrumentation.exporters import quantile, render_prometheus
+
+
+def read_spans(paths: list[Path]) -> list[dict]:
+    spans: list[dict] = []
+    for path in paths:
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    spans.append(json.loads(line))
+    return spans
+
+
+def stage_table(spans: list[dict]) -> list[dict]:
+    by_stage: dict[str, list[dict]] = {}
+    for s in spans:
+        by_stage.setdefault(s["name"], []).append(s)
+    rows = []
+    for stage, items in by_stage.items():
+        d = sorted(i["duration_s"] for i in items)
+        rows.append({
+            "stage": stage,
+            "count": len(d),
+            "errors": sum(1 for i in items if i.get("status") == "error"),
+            "mean_s": sum(d) / len(d),
+            "p50_s": quantile(d, 0.5),
+            "p95_s": quantile(d, 0.95),
+            "p99_s": quantile(d, 0.99),
+            "max_s": d[-1],
+            "total_s": sum(d),
+            "rss_peak_bytes": max((i["rss_peak_bytes"] for i in items if "rss_peak_bytes" in i), default=None),
+            "py_alloc_peak_bytes": max((i["py_alloc_peak_bytes"] for i in items if "py_alloc_peak_bytes" in i), default=None),
+        })
+    return sorted(rows, key=lambda r: -r["total_s"])
+
+
+def _mb(value: int | None) -> str:
+    return "-" if value is None else f"{value / 2**20:.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-stage summary of pipeline span JSONL files.")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--prom", type=Path, default=None, help="Also write Prometheus text format here")
+    args = parser.parse_args()
+
+    spans = read_spans(args.files)
+    print(
+        f"{'STAGE':28} {'COUNT':>7} {'ERR':>5} {'MEAN':>9} {'P50':>9} {'P95':>9} {'P99':>9} {'MAX':>9} {'TOTAL':>10}"
+        f" {'RSS PEAK MB':>12} {'PY PEAK MB':>11}"
+    )
+    for r in stage_table(spans):
+        print(
+            f"{r['stage'][:28]:28} {r['count']:7d} {r['errors']:5d} {r['mean_s']:9.3f} {r['p50_s']:9.3f} "
+            f"{r['p95_s']:9.3f} {r['p99_s']:9.3f} {r['max_s']:9.3f} {r['total_s']:10.1f}"
+            f" {_mb(r['rss_peak_bytes']):>12} {_mb(r['py_alloc_peak_bytes']):>11}"
+        )
+    if args.prom:
+        args.prom.write_text(render_prometheus(spans), encoding="utf-8")
+        print(f"Wrote {args.prom}")
+
+
+if __name__ == "__main__":
+    main()
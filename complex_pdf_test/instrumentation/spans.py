@@ -0,0 +1,134 @@
+"""
+Spans and per-stage metrics.
+
+A span times one pipeline stage and carries its sizes / counts:
+
+    with span("parse", input_bytes=path.stat().st_size) as s:
+        ...
+        s.set(output_chars=len(markdown))
+
+Finished spans go to the process-wide registry (kept in memory, aggregated per stage)
+and to every configured exporter. Without exporters or profiling this costs two
+perf_counter calls and a dict per stage.
+"""
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+
+@dataclass
+class Span:
+    """One timed stage execution."""
+    name: str
+    run_id: str
+    span_id: str
+    parent_id: str | None
+    start_ts: float  # wall clock (epoch seconds)
+    duration_s: float = 0.0
+    status: str = "ok"
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach sizes / counts (e.g. output_chars=..., chunks=...)."""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ts": self.start_ts,
+            "duration_s": self.duration_s,
+            "status": self.status,
+            **self.attrs,
+        }
+
+
+class MetricsRegistry:
+    """Collects finished spans, forwards them to exporters and runs stage hooks (profilers)."""
+
+    def __init__(self) -> None:
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans: list[Span] = []
+        self.exporters: list = []
+        self.hooks: list = []  # objects with start(span) -> token and stop(span, token)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, s: Span) -> None:
+        with self._lock:
+            self.spans.append(s)
+            exporters = list(self.exporters)
+        for exporter in exporters:
+            exporter.export(s)
+
+    def stage_durations(self) -> dict[str, list[float]]:
+        """Durations (s) grouped by span name, in recording order."""
+        out: dict[str, list[float]] = {}
+        with self._lock:
+            for s in self.spans:
+                out.setdefault(s.name, []).append(s.duration_s)
+        return out
+
+    def flush(self) -> None:
+        for exporter in list(self.exporters):
+            flush = getattr(exporter, "flush", None)
+            if flush is not None:
+                flush(self)
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def configure(*, exporters: list | None = None, hooks: list | None = None) -> MetricsRegistry:
+    """Install exporters and stage hooks (profilers) on the process-wide registry."""
+    if exporters is not None:
+        _registry.exporters = list(exporters)
+    if hooks is not None:
+        _registry.hooks = list(hooks)
+    return _registry
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a stage; nested spans record their parent. Exceptions mark the span as failed."""
+    registry = _registry
+    stack = registry._stack()
+    s = Span(
+        name=name,
+        run_id=registry.run_id,
+        span_id=uuid.uuid4().hex[:12],
+        parent_id=stack[-1].span_id if stack else None,
+        start_ts=time.time(),
+        attrs=dict(attrs),
+    )
+    tokens = [(hook, hook.start(s)) for hook in registry.hooks]
+    stack.append(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.duration_s = time.perf_counter() - t0
+        stack.pop()
+        for hook, token in reversed(tokens):
+            hook.stop(s, token)
+        registry.record(s)
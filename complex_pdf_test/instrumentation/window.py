@@ -0,0 +1,126 @@
+"""
+Sliding-window latency histogram in constant memory, for long-running probes.
+
+Values go into log-spaced buckets (relative error bound, DDSketch style): a value v is
+counted in bucket i with min_value * gamma^(i-1) < v <= min_value * gamma^i,
+gamma = (1 + e) / (1 - e), and reported as that bucket's midpoint, so every quantile is
+within e (default 1 %) of a value that was recorded. The range is fixed: values below
+min_value / above max_value fall into the first / last bucket.
+
+The window is a ring of `slots` sub-histograms, each covering window_s / slots seconds.
+A slot is cleared when time comes back around to it, so the window slides by one slot at a
+time and memory is slots × buckets counters however long the process runs.
+"""
+
+import math
+import threading
+import time
+from array import array
+
+
+class SlidingHistogram:
+    """Quantiles, count and errors over the last window_s seconds; lifetime totals for counters."""
+
+    def __init__(
+        self,
+        window_s: float = 300.0,
+        slots: int = 10,
+        *,
+        relative_error: float = 0.01,
+        min_value: float = 0.01,
+        max_value: float = 120_000.0,
+    ):
+        self.window_s = window_s
+        self.slots = max(1, slots)
+        self.slot_s = window_s / self.slots
+        self.min_value = min_value
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self.gamma)
+        self.n_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self._counts = [array("q", bytes(8 * self.n_buckets)) for _ in range(self.slots)]
+        self._epochs = [-1] * self.slots
+        self._slot_count = [0] * self.slots
+        self._slot_errors = [0] * self.slots
+        self._slot_sum = [0.0] * self.slots
+        self.total_count = 0
+        self.total_errors = 0
+        self.total_sum = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return min(int(math.ceil(math.log(value / self.min_value) / self._log_gamma)), self.n_buckets - 1)
+
+    def _value(self, bucket: int) -> float:
+        if bucket == 0:
+            return self.min_value
+        return self.min_value * 2 * self.gamma**bucket / (self.gamma + 1)
+
+    def _slot(self, now: float | None) -> int:
+        """Slot for `now`, cleared first if it still holds an older epoch (caller holds the lock)."""
+        epoch = int((time.monotonic() if now is None else now) // self.slot_s)
+        i = epoch % self.slots
+        if self._epochs[i] != epoch:
+            self._counts[i] = array("q", bytes(8 * self.n_buckets))
+            self._epochs[i] = epoch
+            self._slot_count[i] = self._slot_errors[i] = 0
+            self._slot_sum[i] = 0.0
+        return i
+
+    def _live(self, now: float | None) -> list[int]:
+        epoch = int((time.monotonic() if now is None else now) // self.slot_s)
+        return [i for i in range(self.slots) if epoch - self.slots < self._epochs[i] <= epoch]
+
+    def record(self, value: float, now: float | None = None) -> None:
+        with self._lock:
+            i = self._slot(now)
+            self._counts[i][self._bucket(value)] += 1
+            self._slot_count[i] += 1
+            self._slot_sum[i] += value
+            self.total_count += 1
+            self.total_sum += value
+
+    def record_error(self, now: float | None = None) -> None:
+        with self._lock:
+            self._slot_errors[self._slot(now)] += 1
+            self.total_errors += 1
+
+    def quantiles(self, qs: tuple[float, ...] | list[float], now: float | None = None) -> dict[float, float | None]:
+        """Value at each quantile over the window (None for every q when the window is empty)."""
+        with self._lock:
+            live = self._live(now)
+            merged = [sum(self._counts[i][b] for i in live) for b in range(self.n_buckets)]
+        total = sum(merged)
+        if total == 0:
+            return {q: None for q in qs}
+        out: dict[float, float | None] = {}
+        for q in qs:
+            rank = min(int(total * q), total - 1)  # nearest rank, as exporters.quantile
+            seen = 0
+            for b, c in enumerate(merged):
+                seen += c
+                if seen > rank:
+                    out[q] = self._value(b)
+                    break
+        return out
+
+    def quantile(self, q: float, now: float | None = None) -> float | None:
+        return self.quantiles((q,), now)[q]
+
+    def window(self, qs: tuple[float, ...] = (0.5, 0.95, 0.99), now: float | None = None) -> dict:
+        """count, errors, error_rate, mean and p<q> over the window."""
+        with self._lock:
+            live = self._live(now)
+            count = sum(self._slot_count[i] for i in live)
+            errors = sum(self._slot_errors[i] for i in live)
+            total = sum(self._slot_sum[i] for i in live)
+        out = {
+            "count": count,
+            "errors": errors,
+            "error_rate": errors / (count + errors) if count + errors else 0.0,
+            "mean": total / count if count else None,
+        }
+        for q, v in self.quantiles(qs, now).items():
+            out[f"p{q * 100:g}"] = v
+        return out
@@ -0,0 +1,19 @@
+"""Durable, resumable PDF ingestion: SQLite job queue, HTTP queue server, worker processes."""
+
+from .store import STATES, Job, JobQueue, LeaseLost, default_worker_id
+from .queue_server import RemoteJobQueue, open_queue, serve
+from .worker import WorkerConfig, process_job, run_worker
+
+__all__ = [
+    "STATES",
+    "Job",
+    "JobQueue",
+    "LeaseLost",
+    "default_worker_id",
+    "RemoteJobQueue",
+    "open_queue",
+    "serve",
+    "WorkerConfig",
+    "process_job",
+    "run_worker",
+]
@@ -0,0 +1,152 @@
+"""
+HTTP front for a JobQueue, so workers on other machines share one queue file without a
+network file system. Every call is POST /<method> with a JSON body; requests are handled
+one at a time (each is a single SQLite statement or transaction).
+
+  uv run python complex_pdf_test/jobs/run_jobs.py serve --port 8765
+  uv run python complex_pdf_test/jobs/run_jobs.py work --queue http://queue-host:8765 --workers 2
+
+Artifacts (parsed text, chunks JSON) are written by whichever worker ran the stage; put
+--artifacts on shared storage, or a worker that cannot find one re-runs that stage.
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Iterable
+
+import requests
+
+from .store import DEFAULT_LEASE_S, DEFAULT_MAX_ATTEMPTS, Job, JobQueue, LeaseLost
+
+LOG_PREFIX = "[queue_server]"
+
+
+def _dispatch(queue: JobQueue, method: str, body: dict[str, Any]) -> Any:
+    job = Job.from_row(body["job"]) if "job" in body else None
+    if method == "add":
+        return queue.add(body["paths"])
+    if method == "claim":
+        claimed = queue.claim(
+            body["worker"], lease_s=body.get("lease_s", DEFAULT_LEASE_S), max_attempts=body.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+        )
+        return claimed.to_dict() if claimed else None
+    if method == "advance":
+        return queue.advance(job, body["state"], lease_s=body.get("lease_s", DEFAULT_LEASE_S), **body.get("fields", {})).to_dict()
+    if method == "heartbeat":
+        return queue.heartbeat(job, lease_s=body.get("lease_s", DEFAULT_LEASE_S))
+    if method == "finish":
+        return queue.finish(job, **body.get("fields", {})).to_dict()
+    if method == "fail":
+        return queue.fail(job, body["error"], max_attempts=body.get("max_attempts", DEFAULT_MAX_ATTEMPTS))
+    if method == "release":
+        return queue.release(job)
+    if method == "retry_failed":
+        return queue.retry_failed()
+    if method == "counts":
+        return queue.counts()
+    if method == "jobs":
+        return [j.to_dict() for j in queue.jobs(body.get("state"), body.get("limit", 100))]
+    raise KeyError(method)
+
+
+def serve(queue: JobQueue, host: str = "0.0.0.0", port: int = 8765) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            try:
+                status, payload = 200, {"result": _dispatch(queue, self.path.strip("/"), body)}
+            except LeaseLost as e:
+                status, payload = 409, {"error": str(e)}
+            except KeyError as e:
+                status, payload = 404, {"error": f"unknown method or field {e}"}
+            raw = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = HTTPServer((host, port), Handler)
+    print(f"{LOG_PREFIX} Serving {queue.path} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class RemoteJobQueue:
+    """Same interface as JobQueue, over queue_server."""
+
+    def __init__(self, url: str, *, timeout_s: float = 30.0):
+        self.url = url.rstrip("/")
+        self.path = self.url
+        self._http = requests.Session()
+        self._timeout_s = timeout_s
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> "RemoteJobQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _call(self, method: str, **body: Any) -> Any:
+        r = self._http.post(f"{self.url}/{method}", json=body, timeout=self._timeout_s)
+        if r.status_code == 409:
+            raise LeaseLost(r.json()["error"])
+        r.raise_for_status()
+        return r.json()["result"]
+
+    def add(self, pdf_paths: Iterable[str]) -> int:
+        # Resolved here: the server's working directory is not the caller's
+        return self._call("add", paths=[str(Path(p).resolve()) for p in pdf_paths])
+
+    def claim(self, worker: str, *, lease_s: float = DEFAULT_LEASE_S, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Job | None:
+        row = self._call("claim", worker=worker, lease_s=lease_s, max_attempts=max_attempts)
+        return Job.from_row(row) if row else None
+
+    def advance(self, job: Job, state: str, *, lease_s: float = DEFAULT_LEASE_S, **fields: Any) -> Job:
+        updated = Job.from_row(self._call("advance", job=job.to_dict(), state=state, lease_s=lease_s, fields=fields))
+        job.__dict__.update(updated.__dict__)
+        return job
+
+    def heartbeat(self, job: Job, *, lease_s: float = DEFAULT_LEASE_S) -> None:
+        self._call("heartbeat", job=job.to_dict(), lease_s=lease_s)
+
+    def finish(self, job: Job, **fields: Any) -> Job:
+        updated = Job.from_row(self._call("finish", job=job.to_dict(), fields=fields))
+        job.__dict__.update(updated.__dict__)
+        return job
+
+    def fail(self, job: Job, error: str, *, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+        state = self._call("fail", job=job.to_dict(), error=error, max_attempts=max_attempts)
+        job.state, job.error = state, error
+        return state
+
+    def release(self, job: Job) -> None:
+        self._call("release", job=job.to_dict())
+
+    def retry_failed(self) -> int:
+        return self._call("retry_failed")
+
+    def counts(self) -> dict[str, int]:
+        return self._call("counts")
+
+    def jobs(self, state: str | None = None, limit: int = 100) -> list[Job]:
+        return [Job.from_row(r) for r in self._call("jobs", state=state, limit=limit)]
+
+
+def open_queue(location: str) -> "JobQueue | RemoteJobQueue":
+    """A queue file path, or the http(s) URL of a queue_server."""
+    if location.startswith(("http://", "https://")):
+        return RemoteJobQueue(location)
+    return JobQueue(location)
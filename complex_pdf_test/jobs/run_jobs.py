@@ -0,0 +1,143 @@
+"""
+Resumable ingestion of many PDFs: a durable job queue (SQLite) and worker processes.
+
+Usage (from project root):
+  uv run python complex_pdf_test/jobs/run_jobs.py add papers/ more/report.pdf      enqueue PDFs (dirs: *.pdf, recursive)
+  uv run python complex_pdf_test/jobs/run_jobs.py work --workers 4                 run until nothing is claimable
+  uv run python complex_pdf_test/jobs/run_jobs.py status [--state failed]
+  uv run python complex_pdf_test/jobs/run_jobs.py retry                            failed jobs back to pending
+  uv run python complex_pdf_test/jobs/run_jobs.py serve --port 8765                share the queue over HTTP
+  uv run python complex_pdf_test/jobs/run_jobs.py work --queue http://host:8765 --artifacts /shared/artifacts
+
+Interrupt a run (or lose a worker) and start `work` again: jobs continue from their last
+completed stage; jobs held by a dead worker are claimed again when their lease expires.
+Each worker process loads its own Docling models (budget several GB of RAM per worker).
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from complex_pdf_test.jobs.store import DEFAULT_LEASE_S, DEFAULT_MAX_ATTEMPTS, STATES, JobQueue
+from complex_pdf_test.jobs.queue_server import open_queue, serve
+from complex_pdf_test.jobs.worker import WorkerConfig, run_worker
+
+LOG_PREFIX = "[run_jobs]"
+DATA_DIR = Path(__file__).resolve().parent / "data"
+DEFAULT_QUEUE = str(DATA_DIR / "queue.db")
+DEFAULT_ARTIFACTS = str(DATA_DIR / "artifacts")
+
+
+def _pdf_paths(inputs: list[Path]) -> list[Path]:
+    paths: list[Path] = []
+    for p in inputs:
+        if p.is_dir():
+            paths.extend(sorted(p.rglob("*.pdf")))
+        elif p.suffix.lower() == ".pdf" and p.is_file():
+            paths.append(p)
+        else:
+            print(f"{LOG_PREFIX} Skipping {p} (not a PDF or directory)")
+    return paths
+
+
+def _worker_main(config: WorkerConfig, wait: bool) -> None:
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+    try:
+        done = run_worker(config, wait=wait)
+    except KeyboardInterrupt:
+        return
+    print(f"{LOG_PREFIX} worker done: {done}")
+
+
+def _print_status(queue, state: str | None) -> None:
+    counts = queue.counts()
+    print("  ".join(f"{s}: {counts.get(s, 0)}" for s in (*STATES, "leased")))
+    if state:
+        for job in queue.jobs(state):
+            error = (job.error or "").strip().splitlines()[-1:] or [""]
+            print(f"  #{job.id:<6} {job.state:9} attempts {job.attempts}  {job.pdf_path}  {error[0][:120]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Durable PDF ingestion jobs: enqueue, work, inspect.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE, help="Queue file, or http://host:port of a queue server")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="Enqueue PDFs")
+    p_add.add_argument("inputs", nargs="+", type=Path)
+
+    p_work = sub.add_parser("work", help="Run worker processes")
+    p_work.add_argument("--workers", type=int, default=1)
+    p_work.add_argument("--artifacts", default=DEFAULT_ARTIFACTS, help="Directory for parsed text and chunks JSON")
+    p_work.add_argument("--index", default="pdf_chunks")
+    p_work.add_argument("--structured", action="store_true", help="Chunk Docling elements (see run_pipeline --structured)")
+    p_work.add_argument("--parse-profile", default="auto", help="auto or fast|tables|ocr|default")
+    p_work.add_argument("--max-chars", type=int, default=1200)
+    p_work.add_argument("--overlap", type=int, default=120)
+    p_work.add_argument("--lease", type=float, default=DEFAULT_LEASE_S, help="Seconds before an unresponsive worker's job is reclaimed")
+    p_work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    p_work.add_argument("--wait", action="store_true", help="Keep polling for new jobs instead of exiting when idle")
+
+    p_status = sub.add_parser("status", help="Job counts per state")
+    p_status.add_argument("--state", choices=STATES, default=None, help="Also list jobs in this state")
+
+    sub.add_parser("retry", help="Put failed jobs back to pending")
+
+    p_serve = sub.add_parser("serve", help="Serve the queue file over HTTP for remote workers")
+    p_serve.add_argument("--host", default="0.0.0.0")
+    p_serve.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        with JobQueue(args.queue) as queue:
+            serve(queue, args.host, args.port)
+        return
+
+    if args.command == "work":
+        config = WorkerConfig(
+            queue=args.queue,
+            artifacts_dir=str(Path(args.artifacts).resolve()),
+            index_uid=args.index,
+            structured=args.structured,
+            parse_profile=args.parse_profile,
+            max_chars=args.max_chars,
+            overlap_chars=args.overlap,
+            lease_s=args.lease,
+            max_attempts=args.max_attempts,
+        )
+        t0 = time.perf_counter()
+        if args.workers == 1:
+            _worker_main(config, args.wait)
+        else:
+            # spawn, not fork: Docling / torch state must not be shared between processes
+            ctx = multiprocessing.get_context("spawn")
+            procs = [ctx.Process(target=_worker_main, args=(config, args.wait), name=f"worker-{i}") for i in range(args.workers)]
+            for p in procs:
+                p.start()
+            try:
+                for p in procs:
+                    p.join()
+            except KeyboardInterrupt:
+                for p in procs:
+                    p.join()
+        print(f"{LOG_PREFIX} {args.workers} worker(s) finished in {time.perf_counter() - t0:.1f}s")
+
+    with open_queue(args.queue) as queue:
+        if args.command == "add":
+            paths = _pdf_paths(args.inputs)
+            print(f"{LOG_PREFIX} Enqueued {queue.add(paths)} new jobs ({len(paths)} PDFs given)")
+        elif args.command == "retry":
+            print(f"{LOG_PREFIX} {queue.retry_failed()} failed jobs back to pending")
+        _print_status(queue, getattr(args, "state", None))
+
+
+if __name__ == "__main__":
+    main()
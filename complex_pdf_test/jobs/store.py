@@ -0,0 +1,242 @@
+"""
+Durable per-PDF ingestion jobs in one SQLite file.
+
+A job moves pending → parsed → chunked → submitted → indexed; each stage stores its
+artifact path (or Meilisearch task uids) before the state advances, so a worker that dies
+resumes from the last completed stage. "submitted" means the documents were accepted by
+Meilisearch (task uids recorded); embedding runs inside Meilisearch while the task is
+processed, so "indexed" is only reached once those tasks succeeded.
+
+Workers claim a job with a lease (BEGIN IMMEDIATE: one writer at a time, so two workers
+never claim the same job). A job whose lease expired (worker killed, machine lost) can be
+claimed again. Every claim counts an attempt; errors put the job back for another attempt,
+and a job that has used max_attempts (including attempts whose worker died without
+reporting) becomes "failed". The file is safe for several processes on one machine; across
+machines, serve it with queue_server.py instead of sharing it over a network file system
+(SQLite locking is not reliable there).
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+STATES = ("pending", "parsed", "chunked", "submitted", "indexed", "failed")
+DONE_STATES = ("indexed", "failed")
+DEFAULT_LEASE_S = 30 * 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pdf_path TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    parsed_path TEXT,
+    chunks_path TEXT,
+    task_uids TEXT NOT NULL DEFAULT '[]',
+    documents INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+"""
+
+
+class LeaseLost(RuntimeError):
+    """The job was claimed by another worker (our lease expired); stop working on it."""
+
+
+@dataclass
+class Job:
+    id: int
+    pdf_path: str
+    state: str
+    attempts: int = 0
+    worker: str | None = None
+    lease_until: float | None = None
+    parsed_path: str | None = None
+    chunks_path: str | None = None
+    task_uids: list[int] = field(default_factory=list)
+    documents: int | None = None
+    error: str | None = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row | dict) -> "Job":
+        data = dict(row)
+        uids = data.get("task_uids") or []
+        data["task_uids"] = json.loads(uids) if isinstance(uids, str) else list(uids)
+        return cls(**data)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """SQLite-backed job queue (one connection per process; open it after forking)."""
+
+    def __init__(self, path: str | Path, *, timeout_s: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=timeout_s, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> sqlite3.Cursor:
+        return self._conn.execute(sql, tuple(params))
+
+    def add(self, pdf_paths: Iterable[str | Path]) -> int:
+        """Enqueue PDFs (absolute paths); already queued paths are ignored. Returns how many were added."""
+        now = time.time()
+        rows = [(str(Path(p).resolve()), now, now) for p in pdf_paths]
+        self._write("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO jobs (pdf_path, created_at, updated_at) VALUES (?, ?, ?)", rows)
+            added = self._conn.total_changes - before
+            self._write("COMMIT")
+        except BaseException:
+            self._write("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker: str, *, lease_s: float = DEFAULT_LEASE_S, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Job | None:
+        """
+        Lease the oldest unfinished job that nobody holds (or whose lease expired) and count
+        the attempt. The attempt is counted here, not on error, so a job whose worker dies
+        without reporting (segfault, OOM kill) still runs out of attempts: a job that already
+        used max_attempts is marked failed instead of being handed out again.
+        """
+        now = time.time()
+        self._write("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self._write(
+                    "SELECT * FROM jobs WHERE state NOT IN (?, ?) AND (lease_until IS NULL OR lease_until < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (*DONE_STATES, now),
+                ).fetchone()
+                if row is None:
+                    self._write("COMMIT")
+                    return None
+                if row["attempts"] < max_attempts:
+                    break
+                self._write(
+                    "UPDATE jobs SET state = 'failed', error = ?, worker = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (row["error"] or f"worker lost during attempt {row['attempts']} (lease expired)", now, row["id"]),
+                )
+            self._write(
+                "UPDATE jobs SET worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker, now + lease_s, now, row["id"]),
+            )
+            self._write("COMMIT")
+        except BaseException:
+            self._write("ROLLBACK")
+            raise
+        job = Job.from_row(row)
+        job.worker, job.lease_until, job.attempts = worker, now + lease_s, row["attempts"] + 1
+        return job
+
+    def advance(self, job: Job, state: str, *, lease_s: float = DEFAULT_LEASE_S, **fields: Any) -> Job:
+        """
+        Record a completed stage (new state + its artifact fields) and renew the lease.
+        Raises LeaseLost if another worker holds the job now.
+        """
+        if state not in STATES:
+            raise ValueError(f"Unknown state {state!r}")
+        columns = {k: (json.dumps(v) if k == "task_uids" else v) for k, v in fields.items()}
+        now = time.time()
+        assignments = ", ".join(f"{k} = ?" for k in columns)
+        sql = f"UPDATE jobs SET state = ?, lease_until = ?, updated_at = ?{', ' if columns else ''}{assignments} WHERE id = ? AND worker = ?"
+        cur = self._write(sql, (state, now + lease_s, now, *columns.values(), job.id, job.worker))
+        if cur.rowcount == 0:
+            raise LeaseLost(f"job {job.id} is no longer held by {job.worker}")
+        job.state, job.lease_until, job.updated_at = state, now + lease_s, now
+        for key, value in fields.items():
+            setattr(job, key, value)
+        return job
+
+    def heartbeat(self, job: Job, *, lease_s: float = DEFAULT_LEASE_S) -> None:
+        """Extend the lease during a long stage."""
+        cur = self._write(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ?", (time.time() + lease_s, job.id, job.worker)
+        )
+        if cur.rowcount == 0:
+            raise LeaseLost(f"job {job.id} is no longer held by {job.worker}")
+
+    def finish(self, job: Job, **fields: Any) -> Job:
+        """Mark the job indexed and release it."""
+        job = self.advance(job, "indexed", **fields)
+        self._write("UPDATE jobs SET worker = NULL, lease_until = NULL, error = NULL WHERE id = ?", (job.id,))
+        return job
+
+    def fail(self, job: Job, error: str, *, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+        """
+        Record an error. The job keeps its state (completed stages are not redone) and is
+        released for another attempt, or marked failed once claim() has counted max_attempts.
+        Returns the new state.
+        """
+        state = "failed" if job.attempts >= max_attempts else job.state
+        self._write(
+            "UPDATE jobs SET state = ?, error = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ?",
+            (state, error[-2000:], time.time(), job.id, job.worker),
+        )
+        job.state, job.error = state, error
+        return state
+
+    def release(self, job: Job) -> None:
+        """Give the job back without counting an attempt (worker shutting down)."""
+        self._write(
+            "UPDATE jobs SET attempts = MAX(attempts - 1, 0), worker = NULL, lease_until = NULL WHERE id = ? AND worker = ?",
+            (job.id, job.worker),
+        )
+
+    def retry_failed(self) -> int:
+        """Put failed jobs back (from the start; attempts reset). Returns how many."""
+        cur = self._write(
+            "UPDATE jobs SET state = 'pending', attempts = 0, worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE state = 'failed'",
+            (time.time(),),
+        )
+        return cur.rowcount
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(STATES, 0)
+        for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        counts["leased"] = self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE lease_until >= ?", (time.time(),)
+        ).fetchone()[0]
+        return counts
+
+    def jobs(self, state: str | None = None, limit: int = 100) -> list[Job]:
+        if state:
+            rows = self._conn.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id LIMIT ?", (state, limit))
+        else:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id LIMIT ?", (limit,))
+        return [Job.from_row(r) for r in rows]
@@ -0,0 +1,222 @@
+"""
+Job worker: claim a PDF job, run its remaining stages, record each one, repeat.
+
+  pending   → parse (Docling, profile from the probe)  → artifact parsed.md / elements.json → parsed
+  parsed    → normalize + chunk + build                → artifact chunks.json              → chunked
+  chunked   → NDJSON batches to Meilisearch            → task uids                         → submitted
+  submitted → wait for the tasks (embedding + indexing)                                     → indexed
+
+Artifacts are written to a temporary file and renamed, so a stage either completed or did
+not. A failed Meilisearch task sends the job back to "chunked" (documents are resubmitted;
+same ids, so nothing is duplicated). Each worker process keeps its Docling converters
+(one per profile) across jobs.
+"""
+
+import json
+import os
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ..instrumentation import span
+from ..pipeline import (
+    PROFILES,
+    RawElement,
+    build_documents,
+    chunk_elements,
+    chunk_text,
+    choose_profile,
+    create_converter,
+    normalize_elements,
+    normalize_text,
+    parse_pdf,
+    parse_pdf_elements,
+)
+from .store import DEFAULT_LEASE_S, DEFAULT_MAX_ATTEMPTS, Job, LeaseLost, default_worker_id
+
+LOG_PREFIX = "[jobs.worker]"
+TASK_WAIT_TIMEOUT_MS = 30 * 60 * 1000
+
+
+class TaskFailed(RuntimeError):
+    """A Meilisearch task for the job's documents did not succeed."""
+
+
+@dataclass
+class WorkerConfig:
+    """Everything a worker process needs (picklable: passed to spawned processes)."""
+    queue: str
+    artifacts_dir: str
+    index_uid: str = "pdf_chunks"
+    structured: bool = False
+    parse_profile: str = "auto"
+    max_chars: int = 1200
+    overlap_chars: int = 120
+    lease_s: float = DEFAULT_LEASE_S
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+
+@dataclass
+class _WorkerState:
+    config: WorkerConfig
+    converters: dict[str, Any] = field(default_factory=dict)
+    client: Any = None
+    index_ready: bool = False
+
+    def converter(self, pdf_path: Path):
+        if self.config.parse_profile == "auto":
+            profile, _ = choose_profile(pdf_path)
+        else:
+            profile = PROFILES[self.config.parse_profile]
+        if profile.name not in self.converters:
+            self.converters[profile.name] = create_converter(profile)
+        return self.converters[profile.name]
+
+    def index(self):
+        from config import load_settings
+        from ..load.load_to_meilisearch import get_client, pdf_index_settings, wait_task
+
+        if self.client is None:
+            self.client = get_client()
+        index = self.client.index(self.config.index_uid)
+        if not self.index_ready:
+            wait_task(self.client, index.update_settings(pdf_index_settings(load_settings())))
+            self.index_ready = True
+        return index
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _resume_state(job: Job) -> str:
+    """Stage to resume from, stepping back when an artifact is not reachable from this machine."""
+    state = job.state
+    if state == "chunked" and not (job.chunks_path and Path(job.chunks_path).is_file()):
+        state = "parsed"
+    if state == "parsed" and not (job.parsed_path and Path(job.parsed_path).is_file()):
+        state = "pending"
+    return state
+
+
+def _parse(queue, job: Job, ws: _WorkerState, job_dir: Path) -> None:
+    pdf_path = Path(job.pdf_path)
+    converter = ws.converter(pdf_path)
+    with span("job.parse", job_id=job.id) as s:
+        if ws.config.structured:
+            _, elements = parse_pdf_elements(pdf_path, converter=converter)
+            out = job_dir / "elements.json"
+            _write_atomic(out, json.dumps([asdict(e) for e in elements], ensure_ascii=False))
+        else:
+            _, markdown = parse_pdf(pdf_path, converter=converter)
+            out = job_dir / "parsed.md"
+            _write_atomic(out, markdown)
+        s.set(output_bytes=out.stat().st_size)
+    queue.advance(job, "parsed", lease_s=ws.config.lease_s, parsed_path=str(out))
+
+
+def _chunk(queue, job: Job, ws: _WorkerState, job_dir: Path) -> None:
+    cfg = ws.config
+    pdf_path = Path(job.pdf_path)
+    parsed = Path(job.parsed_path)
+    with span("job.chunk", job_id=job.id) as s:
+        if parsed.suffix == ".json":
+            elements = [RawElement(**e) for e in json.loads(parsed.read_text(encoding="utf-8"))]
+            chunks = chunk_elements(
+                normalize_elements(elements), pdf_path.stem, max_chars=cfg.max_chars, overlap_chars=cfg.overlap_chars
+            )
+        else:
+            chunks = chunk_text(
+                normalize_text(parsed.read_text(encoding="utf-8")),
+                doc_id=pdf_path.stem,
+                source_file=pdf_path.name,
+                max_chars=cfg.max_chars,
+                overlap_chars=cfg.overlap_chars,
+            )
+        documents = build_documents(chunks)
+        out = job_dir / "chunks.json"
+        _write_atomic(out, json.dumps(documents, ensure_ascii=False))
+        s.set(documents=len(documents))
+    queue.advance(job, "chunked", lease_s=cfg.lease_s, chunks_path=str(out), documents=len(documents))
+
+
+def _submit(queue, job: Job, ws: _WorkerState) -> None:
+    from ..load.serialize import add_batches_raw, byte_batches
+    from ..load.load_to_meilisearch import task_uid
+
+    documents = json.loads(Path(job.chunks_path).read_text(encoding="utf-8"))
+    with span("job.submit", job_id=job.id, documents=len(documents)):
+        tasks = add_batches_raw(ws.index(), byte_batches(documents))
+    queue.advance(job, "submitted", lease_s=ws.config.lease_s, task_uids=[task_uid(t) for t in tasks])
+
+
+def _wait(queue, job: Job, ws: _WorkerState) -> None:
+    ws.index()
+    with span("job.wait_tasks", job_id=job.id, tasks=len(job.task_uids)):
+        for uid in job.task_uids:
+            task = ws.client.wait_for_task(uid, timeout_in_ms=TASK_WAIT_TIMEOUT_MS)
+            queue.heartbeat(job, lease_s=ws.config.lease_s)
+            status = getattr(task, "status", None) or (task.get("status") if isinstance(task, dict) else None)
+            if status != "succeeded":
+                error = getattr(task, "error", None) or (task.get("error") if isinstance(task, dict) else None)
+                queue.advance(job, "chunked", lease_s=ws.config.lease_s, task_uids=[])
+                raise TaskFailed(f"task {uid} {status}: {error}")
+    queue.finish(job)
+
+
+def process_job(queue, job: Job, ws: _WorkerState) -> None:
+    """Run the job's remaining stages; each completed stage is recorded before the next starts."""
+    job_dir = Path(ws.config.artifacts_dir) / f"{job.id:06d}-{Path(job.pdf_path).stem}"
+    state = _resume_state(job)
+    if state != job.state:
+        print(f"{LOG_PREFIX} job {job.id}: artifact of stage '{job.state}' not found here, resuming from '{state}'")
+        job.state = state
+    print(f"{LOG_PREFIX} job {job.id} ({Path(job.pdf_path).name}): resuming at '{job.state}', attempt {job.attempts}")
+    if job.state == "pending":
+        _parse(queue, job, ws, job_dir)
+    if job.state == "parsed":
+        _chunk(queue, job, ws, job_dir)
+    if job.state == "chunked":
+        _submit(queue, job, ws)
+    if job.state == "submitted":
+        _wait(queue, job, ws)
+
+
+def run_worker(config: WorkerConfig, *, worker_id: str | None = None, wait: bool = False, poll_s: float = 5.0) -> dict[str, int]:
+    """
+    Claim and process jobs until the queue has nothing claimable (or forever with wait=True).
+    Returns {"indexed": n, "retried": n, "failed": n} for this worker.
+    """
+    from .queue_server import open_queue
+
+    worker_id = worker_id or default_worker_id()
+    ws = _WorkerState(config)
+    done = {"indexed": 0, "retried": 0, "failed": 0}
+    with open_queue(config.queue) as queue:
+        while True:
+            job = queue.claim(worker_id, lease_s=config.lease_s, max_attempts=config.max_attempts)
+            if job is None:
+                if not wait:
+                    break
+                time.sleep(poll_s)
+                continue
+            t0 = time.perf_counter()
+            try:
+                process_job(queue, job, ws)
+                done["indexed"] += 1
+                print(f"{LOG_PREFIX} job {job.id} indexed ({job.documents} docs) in {time.perf_counter() - t0:.1f}s")
+            except LeaseLost as e:
+                print(f"{LOG_PREFIX} job {job.id}: {e}, dropping it")
+            except KeyboardInterrupt:
+                queue.release(job)
+                raise
+            except Exception as e:
+                state = queue.fail(job, traceback.format_exc(), max_attempts=config.max_attempts)
+                done["failed" if state == "failed" else "retried"] += 1
+                print(f"{LOG_PREFIX} job {job.id} error at '{job.state}' ({type(e).__name__}: {e}) → {state}")
+    return done
@@ -1,5 +1,25 @@
 """Load chunks into Meilisearch (index pdf_chunks, Mistral embedder)."""
 
-from .load_to_meilisearch import load_chunks_into_meilisearch, load_from_json_path
+from .load_to_meilisearch import TaskFailedError, load_chunks_into_meilisearch, load_from_json_path, pdf_index_settings
+from .migrate import export_index, import_index
+from .prewarm import prewarm_index, read_query_log
+from .serialize import add_batches_raw, byte_batches, encode_chunk, encode_document
+from .sharding import Shard, ShardLayout, load_sharded
 
-__all__ = ["load_chunks_into_meilisearch", "load_from_json_path"]
+__all__ = [
+    "TaskFailedError",
+    "load_chunks_into_meilisearch",
+    "load_from_json_path",
+    "pdf_index_settings",
+    "export_index",
+    "import_index",
+    "prewarm_index",
+    "read_query_log",
+    "add_batches_raw",
+    "byte_batches",
+    "encode_chunk",
+    "encode_document",
+    "Shard",
+    "ShardLayout",
+    "load_sharded",
+]
@@ -4,83 +4,124 @@ import json
 import sys
 import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import meilisearch
+if TYPE_CHECKING:
+    import meilisearch
 
 # Project root (complex_pdf_test/load/ -> parents[2])
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from config import load_settings
+from config import Settings, load_settings
+from complex_pdf_test.instrumentation import span
+from complex_pdf_test.load.serialize import DEFAULT_MAX_BATCH_BYTES, add_batches_raw, byte_batches
+from complex_pdf_test.pipeline.schemas import Chunk
 
 PDF_INDEX = "pdf_chunks"
 LOG_PREFIX = "[load_meilisearch]"
+# Each NDJSON batch is embedded through Mistral while its task runs: minutes, not the SDK's 5 s
+TASK_WAIT_TIMEOUT_MS = 30 * 60 * 1000
 
 
-def get_client() -> meilisearch.Client:
+def get_client() -> "meilisearch.Client":
+    import meilisearch
+
     settings = load_settings()
     if settings.meilisearch_api_key:
         return meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key)
     return meilisearch.Client(settings.meilisearch_url)
 
 
-def wait_task(client: meilisearch.Client, task) -> None:
-    task_uid = getattr(task, "task_uid", None) or getattr(task, "uid", None)
-    if task_uid is None and isinstance(task, dict):
-        task_uid = task.get("taskUid") or task.get("uid")
-    if task_uid is None:
+def task_uid(task) -> int:
+    uid = getattr(task, "task_uid", None) or getattr(task, "uid", None)
+    if uid is None and isinstance(task, dict):
+        uid = task.get("taskUid") or task.get("uid")
+    if uid is None:
         raise RuntimeError(f"Task UID not found in response: {task}")
-    client.wait_for_task(task_uid)
+    return uid
+
+
+class TaskFailedError(RuntimeError):
+    """A task finished with a status other than "succeeded" (embedder error, bad payload, ...)."""
+
+    def __init__(self, task):
+        self.task = task
+        error = task.error or {}
+        super().__init__(f"Task {task.uid} ({task.type}) {task.status}: {error.get('code')}: {error.get('message')}")
+
 
+def wait_task(client: "meilisearch.Client", task, timeout_in_ms: int = TASK_WAIT_TIMEOUT_MS, *, check: bool = True):
+    """Wait for a task and return it; raise TaskFailedError if it did not succeed, unless check=False."""
+    done = client.wait_for_task(task_uid(task), timeout_in_ms=timeout_in_ms)
+    if check and done.status != "succeeded":
+        raise TaskFailedError(done)
+    return done
 
-def load_chunks_into_meilisearch(documents: list[dict]) -> None:
-    """Configure index pdf_chunks (searchable + filterable + Mistral embedder) and add documents."""
+
+def pdf_index_settings(settings: Settings) -> dict:
+    """Index settings for chunk indexes: searchable, filterable and the Mistral REST embedder."""
+    return {
+        "searchableAttributes": ["chunk_text", "title"],
+        "filterableAttributes": ["doc_id", "page", "element_type", "source_file"],
+        "embedders": {
+            "mistral": {
+                "source": "rest",
+                "apiKey": settings.mistral_api_key,
+                "dimensions": settings.mistral_embedding_dimensions,
+                "documentTemplate": (
+                    "{% if doc.title %}Section: {{ doc.title }}. {% endif %}"
+                    "{% if doc.chunk_text %}{{ doc.chunk_text | truncatewords: 50 }}{% endif %}"
+                ),
+                "url": f"{settings.meilisearch_mistral_base_url}/embeddings",
+                "request": {
+                    "model": settings.mistral_embedding_model,
+                    "input": ["{{text}}", "{{..}}"],
+                },
+                "response": {
+                    "data": [
+                        {"embedding": "{{embedding}}"},
+                        "{{..}}",
+                    ]
+                },
+            }
+        },
+    }
+
+
+def load_chunks_into_meilisearch(documents: list[dict] | list[Chunk], *, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES) -> None:
+    """
+    Configure index pdf_chunks (searchable + filterable + Mistral embedder) and add documents
+    (dicts or Chunks), sent as pre-encoded NDJSON batches of at most max_batch_bytes.
+    """
     print(f"{LOG_PREFIX} Connecting to Meilisearch...")
     settings = load_settings()
     client = get_client()
     index = client.index(PDF_INDEX)
     print(f"{LOG_PREFIX} Updating index settings (searchable, filterable, embedder mistral)...")
     t0 = time.perf_counter()
-    settings_task = index.update_settings(
-        {
-            "searchableAttributes": ["chunk_text", "title"],
-            "filterableAttributes": ["doc_id", "page", "element_type", "source_file"],
-            "embedders": {
-                "mistral": {
-                    "source": "rest",
-                    "apiKey": settings.mistral_api_key,
-                    "dimensions": 1024,
-                    "documentTemplate": (
-                        "{% if doc.title %}Section: {{ doc.title }}. {% endif %}"
-                        "{% if doc.chunk_text %}{{ doc.chunk_text | truncatewords: 50 }}{% endif %}"
-                    ),
-                    "url": "https://api.mistral.ai/v1/embeddings",
-                    "request": {
-                        "model": settings.mistral_embedding_model,
-                        "input": ["{{text}}", "{{..}}"],
-                    },
-                    "response": {
-                        "data": [
-                            {"embedding": "{{embedding}}"},
-                            "{{..}}",
-                        ]
-                    },
-                }
-            },
-        }
-    )
-    wait_task(client, settings_task)
+    with span("load.settings", index_uid=PDF_INDEX):
+        settings_task = index.update_settings(pdf_index_settings(settings))
+        wait_task(client, settings_task)
     print(f"{LOG_PREFIX} Settings applied in {time.perf_counter() - t0:.1f}s")
     print(f"{LOG_PREFIX} Adding {len(documents)} documents (embedding via Mistral)...")
     t1 = time.perf_counter()
-    add_task = index.add_documents(documents, primary_key="id")
-    wait_task(client, add_task)
-    print(f"{LOG_PREFIX} Documents indexed in {time.perf_counter() - t1:.1f}s")
+    with span("load.add_documents", index_uid=PDF_INDEX, documents=len(documents)) as s:
+        batches = list(byte_batches(documents, max_bytes=max_batch_bytes))
+        s.set(batches=len(batches), payload_bytes=sum(len(b) for b, _ in batches))
+        for task in add_batches_raw(index, batches):
+            wait_task(client, task)
+    print(f"{LOG_PREFIX} Documents indexed in {time.perf_counter() - t1:.1f}s ({len(batches)} NDJSON batches)")
 
 
-def load_from_json_path(json_path: str | Path) -> None:
-    """Read a chunks JSON file and load it into Meilisearch."""
+def load_from_json_path(json_path: str | Path, layout_path: str | Path | None = None) -> None:
+    """Read a chunks JSON file and load it into Meilisearch (into the shards of a layout file when given)."""
     path = Path(json_path)
     documents = json.loads(path.read_text(encoding="utf-8"))
+    if layout_path is not None:
+        from complex_pdf_test.load.sharding import ShardLayout, load_sharded
+
+        load_sharded(documents, ShardLayout.load(layout_path))
+        return
     load_chunks_into_meilisearch(documents)
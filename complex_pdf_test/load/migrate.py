@@ -0,0 +1,332 @@
+"""
+Export an index with its vectors, import it elsewhere without re-embedding.
+
+Export pages through the index with POST /indexes/{uid}/documents/fetch (retrieveVectors).
+The index is split into disjoint offset ranges, one part per range, and --workers threads
+fetch parts in parallel. Each part is written to its own files:
+
+  ndjson  part-00000.ndjson   one document per line, already in import form:
+                              "_vectors": {"<embedder>": {"embeddings": [...], "regenerate": false}}
+  binary  part-00000.ndjson   documents without _vectors, same order as the vector rows
+          part-00000.f32      float32 rows, dimensions each (NaN row: document had no vector)
+
+manifest.json records the source index, its settings, the embedder, the dimensions and
+the parts. Offsets are only stable while nothing writes to the index: pause ingestion
+during an export (the document count is checked before and after).
+
+Import creates the target index with the source settings, replacing the embedder with a
+userProvided embedder of the same name and dimensions. It then posts the parts as byte-bounded
+NDJSON batches. NDJSON parts are sent line for line, without JSON parsing. With
+--rest-embedder, the Mistral REST embedder is configured once the documents are in.
+Imported vectors are marked regenerate: false and stay as they are; new documents are
+embedded by Mistral. Without it, the index has only user-provided vectors, and hybrid or
+semantic queries must pass "vector".
+
+Usage (from project root):
+  uv run python main.py migrate export --index pdf_chunks --out exports/pdf_chunks --workers 8
+  uv run python main.py migrate export --index pdf_chunks --out exports/pdf_chunks --format binary
+  uv run python main.py migrate import exports/pdf_chunks --index pdf_chunks_v2 --url http://new-host:7700 --rest-embedder
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..instrumentation import span
+from .serialize import DEFAULT_MAX_BATCH_BYTES, NDJSON, encode_document, line_batches
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+LOG_PREFIX = "[migrate]"
+FORMATS = ("ndjson", "binary")
+DEFAULT_EMBEDDER = "mistral"
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PART_DOCS = 100_000
+MAX_INFLIGHT_TASKS = 8
+
+
+def _loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+class _Http:
+    """Thread-safe Meilisearch HTTP access (one requests.Session per thread)."""
+
+    def __init__(self, url: str, api_key: str | None, timeout_s: float = 120.0):
+        self.url = url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            import requests
+
+            self._local.session = requests.Session()
+            self._local.session.headers.update(self.headers)
+        return self._local.session
+
+    def request(self, method: str, path: str, **kwargs) -> Any:
+        r = self._session().request(method, f"{self.url}/{path.lstrip('/')}", timeout=self.timeout_s, **kwargs)
+        r.raise_for_status()
+        return _loads(r.content)
+
+
+def _http(url: str | None) -> _Http:
+    from config import load_settings
+
+    settings = load_settings()
+    return _Http(url or settings.meilisearch_url, settings.meilisearch_api_key or None)
+
+
+# ---- export ----
+
+def _part_name(i: int) -> str:
+    return f"part-{i:05d}"
+
+
+def _export_part(
+    http: _Http, index_uid: str, part: int, start: int, stop: int, out_dir: Path,
+    *, fmt: str, embedder: str, dimensions: int | None, page_size: int,
+) -> dict[str, Any]:
+    """Fetch documents [start, stop) page by page and write them to the part's files."""
+    name = _part_name(part)
+    docs_path = out_dir / f"{name}.ndjson"
+    vec_path = out_dir / f"{name}.f32"
+    written = vectors = 0
+    nan_row = array("f", [math.nan] * dimensions) if dimensions else None
+    with open(docs_path, "wb") as docs_fh, (open(vec_path, "wb") if fmt == "binary" else open(os.devnull, "wb")) as vec_fh:
+        for offset in range(start, stop, page_size):
+            limit = min(page_size, stop - offset)
+            page = http.request("POST", f"indexes/{index_uid}/documents/fetch", json={"offset": offset, "limit": limit, "retrieveVectors": True})
+            for doc in page.get("results", []):
+                entry = (doc.pop("_vectors", None) or {}).get(embedder) or {}
+                embeddings = entry.get("embeddings") if isinstance(entry, dict) else entry
+                if embeddings and not isinstance(embeddings[0], list):
+                    embeddings = [embeddings]
+                if fmt == "binary":
+                    if embeddings and len(embeddings) > 1:
+                        raise ValueError(f"document {doc.get('id')!r} has {len(embeddings)} vectors; use --format ndjson")
+                    if embeddings:
+                        vec_fh.write(array("f", embeddings[0]).tobytes())
+                        vectors += 1
+                    else:
+                        vec_fh.write(nan_row.tobytes())
+                elif embeddings:
+                    doc["_vectors"] = {embedder: {"embeddings": embeddings, "regenerate": False}}
+                    vectors += len(embeddings)
+                docs_fh.write(encode_document(doc) + b"\n")
+                written += 1
+    files = [docs_path.name] + ([vec_path.name] if fmt == "binary" else [])
+    return {"name": name, "files": files, "documents": written, "vectors": vectors, "offset": start}
+
+
+def _dimensions(settings: dict[str, Any], embedder: str) -> int | None:
+    conf = (settings.get("embedders") or {}).get(embedder) or {}
+    return conf.get("dimensions")
+
+
+def export_index(
+    index_uid: str,
+    out_dir: str | Path,
+    *,
+    url: str | None = None,
+    fmt: str = "ndjson",
+    embedder: str = DEFAULT_EMBEDDER,
+    workers: int = 4,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    part_docs: int = DEFAULT_PART_DOCS,
+) -> dict[str, Any]:
+    """Write every document of the index with its vectors to out_dir; returns the manifest."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    http = _http(url)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    settings = http.request("GET", f"indexes/{index_uid}/settings")
+    dimensions = _dimensions(settings, embedder)
+    if fmt == "binary" and not dimensions:
+        raise ValueError(f"embedder {embedder!r} has no dimensions in the index settings; use --format ndjson")
+    total = http.request("GET", f"indexes/{index_uid}/stats")["numberOfDocuments"]
+    ranges = [(i, start, min(start + part_docs, total)) for i, start in enumerate(range(0, total, part_docs))]
+    print(f"{LOG_PREFIX} Exporting {total} documents of {index_uid} ({fmt}) in {len(ranges)} parts, {workers} workers...")
+    t0 = time.perf_counter()
+    with span("migrate.export", index_uid=index_uid, documents=total, parts=len(ranges)) as s:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(_export_part, http, index_uid, i, start, stop, out,
+                            fmt=fmt, embedder=embedder, dimensions=dimensions, page_size=page_size)
+                for i, start, stop in ranges
+            ]
+            parts = [f.result() for f in futures]
+        s.set(bytes=sum((out / f).stat().st_size for p in parts for f in p["files"]))
+    after = http.request("GET", f"indexes/{index_uid}/stats")["numberOfDocuments"]
+    if after != total:
+        print(f"{LOG_PREFIX} WARNING: the index changed during the export ({total} → {after} documents); export again with ingestion paused")
+    manifest = {
+        "index_uid": index_uid,
+        "source_url": http.url,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "format": fmt,
+        "embedder": embedder,
+        "dimensions": dimensions,
+        "documents": sum(p["documents"] for p in parts),
+        "vectors": sum(p["vectors"] for p in parts),
+        "settings": settings,
+        "parts": parts,
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    elapsed = time.perf_counter() - t0
+    print(f"{LOG_PREFIX} {manifest['documents']} documents, {manifest['vectors']} vectors in {elapsed:.1f}s "
+          f"({manifest['documents'] / elapsed if elapsed else 0:.0f} docs/s) → {out}")
+    return manifest
+
+
+# ---- import ----
+
+def _vector_rows(path: Path, dimensions: int, rows_per_read: int = 4096) -> Iterator[array]:
+    row_bytes = dimensions * 4
+    with open(path, "rb") as fh:
+        while block := fh.read(row_bytes * rows_per_read):
+            values = array("f")
+            values.frombytes(block)
+            for i in range(0, len(values), dimensions):
+                yield values[i : i + dimensions]
+
+
+def _vector_json(row: array) -> bytes:
+    # %.9g round-trips float32 and keeps lines short (float32 → double repr would not)
+    return ("[" + ",".join(format(x, ".9g") for x in row) + "]").encode("ascii")
+
+
+def _binary_lines(part_dir: Path, part: dict[str, Any], embedder: str, dimensions: int) -> Iterator[bytes]:
+    docs_file, vec_file = part["files"]
+    prefix = b',"_vectors":{' + json.dumps(embedder).encode("utf-8") + b':{"embeddings":['
+    with open(part_dir / docs_file, "rb") as docs_fh:
+        for line, row in zip(docs_fh, _vector_rows(part_dir / vec_file, dimensions)):
+            line = line.rstrip(b"\n")
+            if math.isnan(row[0]):
+                yield line
+            else:
+                yield line[:-1] + prefix + _vector_json(row) + b'],"regenerate":false}}}'
+
+
+def _ndjson_lines(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        for line in fh:
+            line = line.rstrip(b"\n")
+            if line:
+                yield line
+
+
+def _import_part(client, index, part_dir: Path, part: dict[str, Any], manifest: dict[str, Any], max_batch_bytes: int) -> int:
+    from .load_to_meilisearch import wait_task
+
+    if manifest["format"] == "binary":
+        lines = _binary_lines(part_dir, part, manifest["embedder"], manifest["dimensions"])
+    else:
+        lines = _ndjson_lines(part_dir / part["files"][0])
+    inflight: list = []
+    sent = 0
+    for payload, count in line_batches(lines, max_bytes=max_batch_bytes):
+        if len(inflight) >= MAX_INFLIGHT_TASKS:
+            wait_task(client, inflight.pop(0))
+        inflight.append(index.add_documents_raw(payload, primary_key="id", content_type=NDJSON))
+        sent += count
+    for task in inflight:
+        wait_task(client, task)
+    return sent
+
+
+def _target_settings(manifest: dict[str, Any]) -> dict[str, Any]:
+    """Source settings with the embedder replaced by a userProvided one (same name, same dimensions)."""
+    settings = {k: v for k, v in manifest["settings"].items() if v is not None and k != "embedders"}
+    settings["embedders"] = {manifest["embedder"]: {"source": "userProvided", "dimensions": manifest["dimensions"]}}
+    return settings
+
+
+def import_index(
+    export_dir: str | Path,
+    index_uid: str | None = None,
+    *,
+    url: str | None = None,
+    workers: int = 4,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    rest_embedder: bool = False,
+) -> int:
+    """
+    Load an export into index_uid (default: the source uid); returns the number of documents
+    indexed. Raises TaskFailedError (with the task's error code) if any task did not succeed.
+    """
+    import meilisearch
+    from config import load_settings
+
+    from .load_to_meilisearch import pdf_index_settings, wait_task
+
+    part_dir = Path(export_dir)
+    manifest = json.loads((part_dir / "manifest.json").read_text(encoding="utf-8"))
+    if not manifest.get("dimensions"):
+        raise ValueError("manifest has no embedder dimensions: cannot declare the userProvided embedder")
+    settings = load_settings()
+    client = meilisearch.Client(url or settings.meilisearch_url, settings.meilisearch_api_key or None)
+    index_uid = index_uid or manifest["index_uid"]
+    index = client.index(index_uid)
+    print(f"{LOG_PREFIX} Importing {manifest['documents']} documents ({manifest['format']}, {len(manifest['parts'])} parts) into {index_uid}...")
+    wait_task(client, index.update_settings(_target_settings(manifest)))
+    t0 = time.perf_counter()
+    with span("migrate.import", index_uid=index_uid, documents=manifest["documents"]):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(_import_part, client, index, part_dir, p, manifest, max_batch_bytes) for p in manifest["parts"]]
+            sent = sum(f.result() for f in futures)
+    elapsed = time.perf_counter() - t0
+    print(f"{LOG_PREFIX} {sent} documents indexed in {elapsed:.1f}s ({sent / elapsed if elapsed else 0:.0f} docs/s)")
+    if rest_embedder:
+        rest = {**pdf_index_settings(settings)["embedders"]["mistral"], "dimensions": manifest["dimensions"]}
+        print(f"{LOG_PREFIX} Switching embedder {manifest['embedder']!r} to the Mistral REST source...")
+        wait_task(client, index.update_settings({"embedders": {manifest["embedder"]: rest}}))
+    return sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export an index with its vectors / import it without re-embedding.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_exp = sub.add_parser("export", help="Index → NDJSON or NDJSON + float32 vector files")
+    p_exp.add_argument("--index", default="pdf_chunks")
+    p_exp.add_argument("--out", type=Path, required=True, help="Output directory")
+    p_exp.add_argument("--url", default=None, help="Source Meilisearch (default: MEILISEARCH_URL)")
+    p_exp.add_argument("--format", choices=FORMATS, default="ndjson")
+    p_exp.add_argument("--embedder", default=DEFAULT_EMBEDDER)
+    p_exp.add_argument("--workers", type=int, default=4, help="Parts fetched in parallel")
+    p_exp.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Documents per fetch request")
+    p_exp.add_argument("--part-docs", type=int, default=DEFAULT_PART_DOCS, help="Documents per part (offset range)")
+
+    p_imp = sub.add_parser("import", help="Export directory → index with a userProvided embedder")
+    p_imp.add_argument("export_dir", type=Path)
+    p_imp.add_argument("--index", default=None, help="Target index (default: the source uid)")
+    p_imp.add_argument("--url", default=None, help="Target Meilisearch (default: MEILISEARCH_URL)")
+    p_imp.add_argument("--workers", type=int, default=4, help="Parts posted in parallel")
+    p_imp.add_argument("--batch-bytes", type=int, default=DEFAULT_MAX_BATCH_BYTES)
+    p_imp.add_argument("--rest-embedder", action="store_true", help="Afterwards, switch the embedder to the Mistral REST source")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_index(args.index, args.out, url=args.url, fmt=args.format, embedder=args.embedder,
+                     workers=args.workers, page_size=args.page_size, part_docs=args.part_docs)
+    else:
+        import_index(args.export_dir, args.index, url=args.url, workers=args.workers,
+                     max_batch_bytes=args.batch_bytes, rest_embedder=args.rest_embedder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Prewarm a freshly loaded index with the most frequent queries of a query log.
+
+Right after a reload or an index swap, the first users of the popular queries pay the
+cold path: an embedder round trip for `q`, then database pages read from disk into the
+page cache. Before traffic arrives, prewarm:
+
+  1. reads the query log and keeps the top --top queries by frequency,
+  2. embeds those not yet in the EmbeddingCache (search/embedding_cache.py), batched,
+     one Mistral request per --embed-batch queries,
+  3. replays them against the index, most frequent first:
+       cold pass   `q` only: Meilisearch embeds the query and reads cold pages, which is
+                   what the first user of each query paid without a prewarm,
+       warm passes `q` + the cached `vector` (same search otherwise), which is what they
+                   pay once the index is warm and the application reads the cache
+                   (QueryEmbedder(cache=...), chat/rag_chat.py --embedding-cache),
+  4. with --swap-with, swaps the warmed index with the live one (POST /swap-indexes).
+     Each index has its own LMDB environment and a swap only exchanges the names, so the
+     warmed environment, and its pages in the page cache, serve the live name afterwards.
+
+It prints cold vs warm p50 / p95 / p99 and saves the run to the results store (kind
+"prewarm", latencies = last warm pass, the cold pass in extra).
+
+Query log: one query per line (repeated lines count as frequency), or JSON lines with
+"q" or "query" and an optional "count".
+
+Usage (from project root):
+  uv run python main.py prewarm queries.log --index pdf_chunks_v2 --top 200
+  uv run python main.py prewarm queries.jsonl --index pdf_chunks_v2 --swap-with pdf_chunks --passes 3
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from ..instrumentation import span
+
+LOG_PREFIX = "[prewarm]"
+DEFAULT_TOP = 200
+DEFAULT_EMBED_BATCH = 32
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / "search" / "embedding_cache.sqlite3"
+TASK_WAIT_TIMEOUT_MS = 5 * 60 * 1000
+
+
+def read_query_log(path: str | Path) -> Counter:
+    """Query → frequency from a plain-text or JSON-lines query log."""
+    counts: Counter = Counter()
+    with Path(path).open(encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                query = entry.get("q") or entry.get("query")
+                if isinstance(query, str) and query.strip():
+                    counts[query.strip()] += int(entry.get("count") or 1)
+            else:
+                counts[line] += 1
+    return counts
+
+
+def top_queries(counts: Counter, n: int, min_count: int = 1) -> list[tuple[str, int]]:
+    return [(q, c) for q, c in counts.most_common(n) if c >= min_count]
+
+
+async def embed_missing(queries: list[str], cache, embed_batch, *, batch_size: int = DEFAULT_EMBED_BATCH, refresh: bool = False) -> dict[str, Any]:
+    """Embed the queries without a cached vector (all with refresh) and store them; returns counts and request times."""
+    cached = {} if refresh else cache.get_many(queries)
+    missing = [q for q in queries if q not in cached]
+    request_ms: list[float] = []
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i : i + batch_size]
+        t0 = time.perf_counter()
+        vectors = await embed_batch(batch)
+        request_ms.append((time.perf_counter() - t0) * 1000)
+        cache.put_many(dict(zip(batch, vectors)))
+    return {"queries": len(queries), "cached": len(queries) - len(missing), "embedded": len(missing), "requests": len(request_ms), "request_ms": request_ms}
+
+
+async def _embed_missing_mistral(settings, queries: list[str], cache, **kwargs: Any) -> dict[str, Any]:
+    """embed_missing through the Mistral embeddings API, on a client closed when done."""
+    import httpx
+
+    from ..search.query_embedder import mistral_batch_embedder
+
+    async with httpx.AsyncClient(timeout=30.0) as http:
+        embed_batch = mistral_batch_embedder(settings.mistral_base_url, settings.mistral_api_key, settings.mistral_embedding_model, http=http)
+        return await embed_missing(queries, cache, embed_batch, **kwargs)
+
+
+def replay(session, url: str, queries: list[str], params: dict[str, Any], vectors: dict[str, list[float]] | None) -> tuple[list[float], int]:
+    """One pass over the queries; returns per-query latency (ms) and the number of failed searches."""
+    latencies: list[float] = []
+    errors = 0
+    for q in queries:
+        body = {"q": q, **params}
+        if vectors is not None and q in vectors:
+            body["vector"] = vectors[q]
+        t0 = time.perf_counter()
+        r = session.post(url, json=body, timeout=60)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if r.status_code >= 400:
+            errors += 1
+            continue
+        latencies.append(elapsed)
+    return latencies, errors
+
+
+def prewarm_index(
+    log_path: str | Path,
+    index_uid: str,
+    *,
+    top: int = DEFAULT_TOP,
+    min_count: int = 1,
+    passes: int = 2,
+    limit: int = 5,
+    semantic_ratio: float = 0.5,
+    use_vectors: bool = True,
+    cache_path: str | Path = DEFAULT_CACHE_PATH,
+    embed_batch_size: int = DEFAULT_EMBED_BATCH,
+    refresh: bool = False,
+    swap_with: str | None = None,
+) -> dict[str, Any]:
+    """Embed, cache and replay the top queries of a log against index_uid (see module docstring)."""
+    import requests
+    from config import load_settings
+
+    from ..results import latency_summary
+    from ..search.embedding_cache import EmbeddingCache
+
+    settings = load_settings()
+    ranked = top_queries(read_query_log(log_path), top, min_count)
+    queries = [q for q, _ in ranked]
+    if not queries:
+        raise ValueError(f"No queries in {log_path}")
+    print(f"{LOG_PREFIX} {len(queries)} queries from {log_path} (top {top}, counts {ranked[0][1]}..{ranked[-1][1]})")
+
+    vectors = None
+    embedding: dict[str, Any] = {}
+    if use_vectors:
+        with EmbeddingCache(cache_path, settings.mistral_embedding_model) as cache, span("prewarm.embed", queries=len(queries)) as s:
+            embedding = asyncio.run(_embed_missing_mistral(settings, queries, cache, batch_size=embed_batch_size, refresh=refresh))
+            vectors = cache.get_many(queries)
+            s.set(embedded=embedding["embedded"], cached=embedding["cached"])
+        print(f"{LOG_PREFIX} Embeddings: {embedding['cached']} cached, {embedding['embedded']} embedded in {embedding['requests']} requests → {cache_path}")
+
+    url = f"{settings.meilisearch_url.rstrip('/')}/indexes/{index_uid}/search"
+    session = requests.Session()
+    if settings.meilisearch_api_key:
+        session.headers["Authorization"] = f"Bearer {settings.meilisearch_api_key}"
+    params: dict[str, Any] = {"limit": limit, "attributesToRetrieve": ["id", "title", "chunk_text"]}
+    if semantic_ratio > 0:
+        params["hybrid"] = {"semanticRatio": semantic_ratio, "embedder": "mistral"}
+
+    with span("prewarm.replay", index_uid=index_uid, queries=len(queries), passes=passes):
+        cold, cold_errors = replay(session, url, queries, params, None)
+        warm_passes = [replay(session, url, queries, params, vectors) for _ in range(max(1, passes - 1))]
+    warm, warm_errors = warm_passes[-1]
+    report = {
+        "index_uid": index_uid,
+        "queries": len(queries),
+        "top": ranked[:20],
+        "embedding": embedding,
+        "cold": latency_summary(cold),
+        "warm": latency_summary(warm),
+        "warm_passes": [latency_summary(p) for p, _ in warm_passes],
+        "errors": {"cold": cold_errors, "warm": sum(e for _, e in warm_passes)},
+        "cold_ms": cold,
+        "warm_ms": warm,
+    }
+    c, w = report["cold"], report["warm"]
+    if c and w:
+        print(f"{LOG_PREFIX} cold (q only, first pass): p50 {c['p50']:.1f} | p95 {c['p95']:.1f} | p99 {c['p99']:.1f} ms")
+        print(f"{LOG_PREFIX} warm ({'cached vector' if vectors else 'q only'}, pass {passes}): p50 {w['p50']:.1f} | p95 {w['p95']:.1f} | p99 {w['p99']:.1f} ms"
+              f"  → p99 {c['p99'] / w['p99'] if w['p99'] else float('inf'):.1f}x lower")
+    if cold_errors or warm_errors:
+        print(f"{LOG_PREFIX} Failed searches: {report['errors']}")
+
+    if swap_with:
+        import meilisearch
+
+        from .load_to_meilisearch import wait_task
+
+        client = meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key or None)
+        # TaskFailedError when the swap is rejected (e.g. index_not_found for a misspelled live index)
+        wait_task(client, client.swap_indexes([{"indexes": [index_uid, swap_with]}]), TASK_WAIT_TIMEOUT_MS)
+        report["swapped_with"] = swap_with
+        print(f"{LOG_PREFIX} Swapped {index_uid} ↔ {swap_with}")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed, cache and replay the top queries of a log against a new index before traffic.")
+    parser.add_argument("log", type=Path, help="Query log: one query per line, or JSON lines with q/query (+ count)")
+    parser.add_argument("--index", required=True, help="Index to warm (e.g. the shadow index before a swap)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Most frequent queries to replay")
+    parser.add_argument("--min-count", type=int, default=1, help="Ignore queries seen fewer times")
+    parser.add_argument("--passes", type=int, default=2, help="Replay passes (first = cold)")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--semantic-ratio", type=float, default=0.5, help="0 = keyword only")
+    parser.add_argument("--no-vectors", action="store_true", help="Do not embed / cache: warm passes send q only")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH, help="Embedding cache (SQLite)")
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH, help="Queries per embeddings request")
+    parser.add_argument("--refresh", action="store_true", help="Re-embed queries already in the cache")
+    parser.add_argument("--swap-with", default=None, help="Afterwards, swap --index with this (live) index")
+    parser.add_argument("--label", default="", help="Label stored with the run")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the run to the results store")
+    args = parser.parse_args()
+
+    report = prewarm_index(
+        args.log, args.index, top=args.top, min_count=args.min_count, passes=args.passes, limit=args.limit,
+        semantic_ratio=args.semantic_ratio, use_vectors=not args.no_vectors and args.semantic_ratio > 0,
+        cache_path=args.cache, embed_batch_size=args.embed_batch, refresh=args.refresh, swap_with=args.swap_with,
+    )
+    if not args.no_save:
+        from ..results import new_run, save_run
+
+        run = new_run(
+            "prewarm",
+            index_uid=args.swap_with or args.index,
+            label=args.label,
+            latencies_ms=report.pop("warm_ms"),
+            extra={k: v for k, v in report.items()},
+        )
+        print(f"{LOG_PREFIX} Saved run {run.run_id} → {save_run(run)}")
+
+
+if __name__ == "__main__":
+    main()
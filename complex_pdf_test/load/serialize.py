@@ -0,0 +1,118 @@
+"""
+Pre-serialised document batches for Meilisearch: chunks → NDJSON (or JSON array) bytes,
+batches bounded by bytes, posted as-is with index.add_documents_raw.
+
+The SDK path (build_documents → list of dicts → add_documents) sends everything as one
+JSON array, however large. Here each chunk is encoded once, straight from the Chunk
+fields, and batches are cut on encoded size, so no request exceeds the payload limit and
+retries resend ready-made bytes. orjson is used when installed (optional: pip install
+orjson, several times faster); the fallback uses the C string encoder of the stdlib json
+module and costs about the same as json.dumps.
+"""
+
+import json
+from json.encoder import encode_basestring
+from typing import Any, Iterable, Iterator
+
+from ..pipeline.schemas import Chunk
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+# Meilisearch rejects payloads above --http-payload-size-limit (100 MB by default); smaller
+# batches also keep each indexing task (and its embedding requests) short.
+DEFAULT_MAX_BATCH_BYTES = 8 * 1024 * 1024
+NDJSON = "application/x-ndjson"
+JSON = "application/json"
+
+
+def _json_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return encode_basestring(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def encode_chunk(chunk: Chunk) -> bytes:
+    """One Meilisearch document (same fields as chunk_to_meilisearch_doc), compact JSON, UTF-8."""
+    if orjson is not None:
+        return orjson.dumps({
+            "id": chunk.chunk_id,
+            "doc_id": chunk.doc_id,
+            "chunk_text": chunk.chunk_text,
+            "title": chunk.section_heading or "",
+            "page": chunk.page,
+            "element_type": chunk.element_type,
+            "source_file": chunk.source_file,
+        })
+    return (
+        f'{{"id":{encode_basestring(chunk.chunk_id)},"doc_id":{encode_basestring(chunk.doc_id)},'
+        f'"chunk_text":{encode_basestring(chunk.chunk_text)},"title":{encode_basestring(chunk.section_heading or "")},'
+        f'"page":{_json_value(chunk.page)},"element_type":{encode_basestring(chunk.element_type)},'
+        f'"source_file":{encode_basestring(chunk.source_file)}}}'
+    ).encode("utf-8")
+
+
+def encode_document(doc: dict) -> bytes:
+    """Compact JSON for an already-built document dict."""
+    if orjson is not None:
+        return orjson.dumps(doc)
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_item(item: Chunk | dict) -> bytes:
+    return encode_chunk(item) if isinstance(item, Chunk) else encode_document(item)
+
+
+def byte_batches(
+    items: Iterable[Chunk | dict],
+    *,
+    max_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    max_docs: int | None = None,
+    content_type: str = NDJSON,
+) -> Iterator[tuple[bytes, int]]:
+    """
+    Yield (payload, document count) batches of at most max_bytes (and max_docs documents).
+    A single document larger than max_bytes is sent alone. Works on a lazy iterable.
+    """
+    return line_batches(map(encode_item, items), max_bytes=max_bytes, max_docs=max_docs, content_type=content_type)
+
+
+def line_batches(
+    lines: Iterable[bytes],
+    *,
+    max_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    max_docs: int | None = None,
+    content_type: str = NDJSON,
+) -> Iterator[tuple[bytes, int]]:
+    """byte_batches for documents already encoded as JSON lines (no trailing newline)."""
+    is_ndjson = content_type == NDJSON
+    framing = 0 if is_ndjson else 2  # "[" + "]"
+    batch: list[bytes] = []
+    size = framing
+    for line in lines:
+        cost = len(line) + 1  # "\n" or ","
+        if batch and (size + cost > max_bytes or (max_docs and len(batch) >= max_docs)):
+            yield _payload(batch, is_ndjson), len(batch)
+            batch, size = [], framing
+        batch.append(line)
+        size += cost
+    if batch:
+        yield _payload(batch, is_ndjson), len(batch)
+
+
+def _payload(lines: list[bytes], is_ndjson: bool) -> bytes:
+    if is_ndjson:
+        return b"\n".join(lines) + b"\n"
+    return b"[" + b",".join(lines) + b"]"
+
+
+def add_batches_raw(index, batches: Iterable[tuple[bytes, int]], *, primary_key: str = "id", content_type: str = NDJSON) -> list:
+    """Post every batch with index.add_documents_raw; returns the task infos (not waited for)."""
+    return [
+        index.add_documents_raw(payload, primary_key=primary_key, content_type=content_type)
+        for payload, _ in batches
+    ]
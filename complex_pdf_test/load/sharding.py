@@ -0,0 +1,210 @@
+"""
+Sharded chunk layout: spread documents over N indexes, on one Meilisearch or on several
+instances, by a stable hash of a routing key.
+
+  key "doc_id"  (default) all chunks of a source PDF land on the same shard, so a doc_id
+                filter or a per-document delete touches one shard.
+  key "tenant"  (any document field) one tenant's chunks stay together; a search scoped to
+                a tenant queries only its shard (ShardLayout.shards_for).
+
+Routing uses jump consistent hashing over blake2b (not Python's salted hash()): the same
+key maps to the same shard in every process, and growing from N to N+1 shards moves only
+about 1/(N+1) of the keys. The layout is saved as JSON and read back by the search side
+(complex_pdf_test/search/federated.py), so loading and searching agree on the shards.
+
+Usage (from project root):
+  uv run python main.py shards --shards 4 -o shards.json                          4 indexes, one instance
+  uv run python main.py shards --urls http://localhost:7700,http://localhost:7701 -o shards.json
+  uv run python main.py load complex_pdf_test/mistral-doc.chunks.json --layout shards.json
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from ..instrumentation import span
+from ..pipeline.schemas import Chunk, chunk_to_meilisearch_doc
+from .serialize import DEFAULT_MAX_BATCH_BYTES, add_batches_raw, byte_batches
+
+LOG_PREFIX = "[sharding]"
+
+
+def stable_hash(value: Any) -> int:
+    """64-bit hash of str(value), identical across processes and machines."""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): bucket in [0, buckets) for a 64-bit key."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One index on one Meilisearch instance."""
+    url: str
+    index_uid: str
+    api_key: str | None = None  # None: MEILISEARCH_API_KEY from the settings
+
+    @property
+    def name(self) -> str:
+        return f"{self.url.rstrip('/')}/{self.index_uid}"
+
+
+@dataclass
+class ShardLayout:
+    """Ordered shards and the document field used to route to them."""
+    shards: list[Shard]
+    key: str = "doc_id"
+    meta: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.shards:
+            raise ValueError("ShardLayout needs at least one shard")
+
+    @classmethod
+    def create(
+        cls, *, index_uid: str = "pdf_chunks", shards: int = 1, urls: list[str] | None = None, key: str = "doc_id",
+    ) -> "ShardLayout":
+        """
+        `shards` indexes spread round-robin over `urls` (default: MEILISEARCH_URL). With one
+        shard the index keeps its plain uid; otherwise shard i is "<index_uid>_s<i>".
+        """
+        if not urls:
+            from config import load_settings
+            urls = [load_settings().meilisearch_url]
+        n = max(shards, len(urls))
+        uids = [index_uid] if n == 1 else [f"{index_uid}_s{i}" for i in range(n)]
+        return cls([Shard(urls[i % len(urls)], uids[i]) for i in range(n)], key=key)
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def shard_index(self, key_value: Any) -> int:
+        return jump_hash(stable_hash(key_value), len(self.shards))
+
+    def route(self, document: dict) -> int:
+        """Shard position of a document (dict with the routing field)."""
+        try:
+            value = document[self.key]
+        except KeyError:
+            raise ValueError(f"document {document.get('id')!r} has no routing field {self.key!r}") from None
+        return self.shard_index(value)
+
+    def split(self, documents: Iterable[dict | Chunk]) -> list[list[dict]]:
+        """Documents grouped per shard, in layout order."""
+        out: list[list[dict]] = [[] for _ in self.shards]
+        for doc in documents:
+            if isinstance(doc, Chunk):
+                doc = chunk_to_meilisearch_doc(doc)
+            out[self.route(doc)].append(doc)
+        return out
+
+    def shards_for(self, key_value: Any | None = None) -> list[Shard]:
+        """Shards a search must query: the key's shard, or all of them."""
+        if key_value is None:
+            return list(self.shards)
+        return [self.shards[self.shard_index(key_value)]]
+
+    def by_instance(self, shards: list[Shard] | None = None) -> dict[str, list[Shard]]:
+        """Shards grouped by instance URL (one multi-search request per instance)."""
+        out: dict[str, list[Shard]] = {}
+        for shard in shards if shards is not None else self.shards:
+            out.setdefault(shard.url, []).append(shard)
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        # API keys stay in the environment, not in layout files
+        return {"key": self.key, "shards": [{"url": s.url, "index_uid": s.index_uid} for s in self.shards], "meta": self.meta}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ShardLayout":
+        return cls([Shard(**s) for s in data["shards"]], key=data.get("key", "doc_id"), meta=data.get("meta", {}))
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ShardLayout":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def shard_client(shard: Shard):
+    """Meilisearch client for the shard's instance."""
+    import meilisearch
+    from config import load_settings
+
+    api_key = shard.api_key if shard.api_key is not None else load_settings().meilisearch_api_key
+    return meilisearch.Client(shard.url, api_key or None)
+
+
+def load_shard(shard: Shard, documents: list[dict], *, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES) -> dict[str, Any]:
+    """Apply the chunk index settings to one shard, add its documents and wait for the tasks (TaskFailedError if one failed)."""
+    from config import load_settings
+    from .load_to_meilisearch import pdf_index_settings, wait_task
+
+    client = shard_client(shard)
+    index = client.index(shard.index_uid)
+    t0 = time.perf_counter()
+    with span("load.shard", shard=shard.name, documents=len(documents)) as s:
+        wait_task(client, index.update_settings(pdf_index_settings(load_settings())))
+        batches = list(byte_batches(documents, max_bytes=max_batch_bytes))
+        s.set(batches=len(batches), payload_bytes=sum(len(b) for b, _ in batches))
+        for task in add_batches_raw(index, batches):
+            wait_task(client, task)
+    return {"shard": shard.name, "documents": len(documents), "seconds": time.perf_counter() - t0}
+
+
+def load_sharded(
+    documents: Iterable[dict | Chunk], layout: ShardLayout, *, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+) -> list[dict[str, Any]]:
+    """
+    Route documents to their shards and load every shard concurrently (one thread per
+    shard: the work is server-side). Returns {"shard", "documents", "seconds"} per shard.
+    """
+    parts = layout.split(documents)
+    print(f"{LOG_PREFIX} {sum(map(len, parts))} documents over {len(layout)} shards (key {layout.key!r}): {[len(p) for p in parts]}")
+    with ThreadPoolExecutor(max_workers=len(layout)) as pool:
+        futures = [pool.submit(load_shard, shard, part, max_batch_bytes=max_batch_bytes) for shard, part in zip(layout.shards, parts)]
+        results = [f.result() for f in futures]
+    for r in results:
+        print(f"{LOG_PREFIX}   {r['shard']}: {r['documents']} docs in {r['seconds']:.1f}s")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a shard layout file (indexes / instances + routing key).")
+    parser.add_argument("--index", default="pdf_chunks", help="Base index uid")
+    parser.add_argument("--shards", type=int, default=1, help="Number of shards (at least one per URL)")
+    parser.add_argument("--urls", default="", help="Comma-separated Meilisearch URLs (default: MEILISEARCH_URL)")
+    parser.add_argument("--key", default="doc_id", help="Routing field: doc_id, or a tenant field")
+    parser.add_argument("--preview", type=Path, default=None, help="Chunks JSON: print how its documents would be spread")
+    parser.add_argument("-o", "--output", type=Path, default=Path("shards.json"))
+    args = parser.parse_args()
+
+    urls = [u.strip() for u in args.urls.split(",") if u.strip()]
+    layout = ShardLayout.create(index_uid=args.index, shards=args.shards, urls=urls, key=args.key)
+    print(f"{LOG_PREFIX} Layout → {layout.save(args.output)}")
+    for i, shard in enumerate(layout.shards):
+        print(f"  {i}: {shard.name}")
+    if args.preview:
+        documents = json.loads(args.preview.read_text(encoding="utf-8"))
+        counts = Counter(layout.route(d) for d in documents)
+        print(f"{LOG_PREFIX} {args.preview.name}: " + ", ".join(f"shard {i}: {counts.get(i, 0)}" for i in range(len(layout))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,27 @@
 """PDF pipeline: parse → normalize → chunk → build documents."""
 
-from .parse_pdf import parse_pdf
-from .normalize_elements import normalize_text
-from .chunk_pdf import chunk_text
+from .parse_pdf import count_pages, create_converter, document_elements, parse_pdf, parse_pdf_elements
+from .probe_pdf import PROFILES, ParseProfile, PdfProbe, choose_profile, probe_pdf
+from .normalize_elements import normalize_elements, normalize_text
+from .chunk_pdf import chunk_elements, chunk_text
 from .build_documents import build_documents
 from .schemas import Chunk, RawElement, chunk_to_meilisearch_doc
 
 __all__ = [
     "parse_pdf",
+    "parse_pdf_elements",
+    "document_elements",
+    "count_pages",
+    "create_converter",
+    "probe_pdf",
+    "choose_profile",
+    "ParseProfile",
+    "PdfProbe",
+    "PROFILES",
     "normalize_text",
+    "normalize_elements",
     "chunk_text",
+    "chunk_elements",
     "build_documents",
     "Chunk",
     "RawElement",
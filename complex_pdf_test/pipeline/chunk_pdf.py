@@ -1,6 +1,7 @@
 """Chunk normalized document text into retrieval-sized units with optional overlap."""
 
-from .schemas import Chunk
+from ..instrumentation import span
+from .schemas import Chunk, RawElement
 
 LOG_PREFIX = "[chunk]"
 
@@ -13,15 +14,33 @@ def chunk_text(
     max_chars: int = 1200,
     overlap_chars: int = 120,
     split_on_headers: bool = True,
+    start_index: int = 0,
 ) -> list[Chunk]:
     """
     Split text into chunks. Prefer splitting on markdown headers (## / ###) when
     split_on_headers is True; otherwise use fixed-size windows with overlap.
+    Chunk ids are numbered from start_index (so parts of one document do not collide).
     """
     if not text.strip():
         print(f"{LOG_PREFIX} Empty text, no chunks.")
         return []
 
+    with span("chunk", input_chars=len(text), max_chars=max_chars, overlap_chars=overlap_chars) as s:
+        chunks = _chunk_sections(text, doc_id, source_file, max_chars, overlap_chars, split_on_headers, start_index)
+        s.set(chunks=len(chunks), output_chars=sum(len(c.chunk_text) for c in chunks))
+    print(f"{LOG_PREFIX} Produced {len(chunks)} chunks for doc_id={doc_id}")
+    return chunks
+
+
+def _chunk_sections(
+    text: str,
+    doc_id: str,
+    source_file: str,
+    max_chars: int,
+    overlap_chars: int,
+    split_on_headers: bool,
+    start_index: int,
+) -> list[Chunk]:
     chunks: list[Chunk] = []
     if split_on_headers:
         sections = _split_by_headers(text)
@@ -30,7 +49,7 @@ def chunk_text(
         sections = [text]
         print(f"{LOG_PREFIX} Single block (no header split), max_chars={max_chars}, overlap={overlap_chars}")
 
-    chunk_index = 0
+    chunk_index = start_index
     for section in sections:
         section = section.strip()
         if not section:
@@ -67,8 +86,84 @@ def chunk_text(
                     )
                 )
                 chunk_index += 1
+    return chunks
 
-    print(f"{LOG_PREFIX} Produced {len(chunks)} chunks for doc_id={doc_id}")
+
+def chunk_elements(
+    elements: list[RawElement],
+    doc_id: str,
+    *,
+    max_chars: int = 1200,
+    overlap_chars: int = 120,
+    start_index: int = 0,
+) -> list[Chunk]:
+    """
+    Group parsed elements into chunks without a markdown round trip. Titles and section
+    headers start a new section (and become the chunk heading); consecutive elements of a
+    section are packed up to max_chars; a table is always its own chunk. Only an element
+    longer than max_chars is split by size (with overlap). Each chunk keeps the page of
+    its first element and the element type shared by its elements ("text" when mixed).
+    """
+    if not elements:
+        print(f"{LOG_PREFIX} No elements, no chunks.")
+        return []
+
+    with span("chunk", elements=len(elements), max_chars=max_chars, overlap_chars=overlap_chars) as s:
+        chunks = _chunk_elements(elements, doc_id, max_chars, overlap_chars, start_index)
+        s.set(chunks=len(chunks), output_chars=sum(len(c.chunk_text) for c in chunks))
+    print(f"{LOG_PREFIX} Produced {len(chunks)} chunks from {len(elements)} elements for doc_id={doc_id}")
+    return chunks
+
+
+def _chunk_elements(
+    elements: list[RawElement],
+    doc_id: str,
+    max_chars: int,
+    overlap_chars: int,
+    start_index: int,
+) -> list[Chunk]:
+    chunks: list[Chunk] = []
+    heading: str | None = None
+    group: list[RawElement] = []
+    group_len = 0
+
+    def emit(text: str, page: int | None, element_type: str, source_file: str) -> None:
+        chunks.append(
+            Chunk(
+                chunk_id=f"{doc_id}_c{start_index + len(chunks)}",
+                doc_id=doc_id,
+                chunk_text=text,
+                page=page,
+                element_type=element_type,
+                source_file=source_file,
+                section_heading=heading,
+            )
+        )
+
+    def flush() -> None:
+        nonlocal group, group_len
+        if group:
+            types = {e.element_type for e in group}
+            emit("\n\n".join(e.text for e in group), group[0].page, types.pop() if len(types) == 1 else "text", group[0].source_file)
+        group, group_len = [], 0
+
+    for el in elements:
+        if el.element_type in ("title", "section_header"):
+            flush()
+            heading = el.text
+            continue
+        if el.element_type == "table" or len(el.text) > max_chars:
+            flush()
+            pieces = [el.text] if len(el.text) <= max_chars else _split_by_size(el.text, max_chars, overlap_chars)
+            for piece in pieces:
+                if piece.strip():
+                    emit(piece.strip(), el.page, el.element_type, el.source_file)
+            continue
+        if group and group_len + 2 + len(el.text) > max_chars:
+            flush()
+        group.append(el)
+        group_len += len(el.text) + (2 if group_len else 0)
+    flush()
     return chunks
 
 
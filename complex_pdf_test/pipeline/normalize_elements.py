@@ -1,6 +1,10 @@
 """Normalize raw text: clean whitespace, strip noise, optional truncation."""
 
 import re
+from dataclasses import replace
+
+from ..instrumentation import span
+from .schemas import RawElement
 
 LOG_PREFIX = "[normalize]"
 
@@ -11,9 +15,26 @@ def normalize_text(text: str) -> str:
         print(f"{LOG_PREFIX} Empty input, skipping.")
         return ""
     in_len = len(text)
-    # Collapse multiple newlines and spaces
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = text.strip()
+    with span("normalize", input_chars=in_len) as s:
+        # Collapse multiple newlines and spaces
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        text = re.sub(r"[ \t]+", " ", text)
+        text = text.strip()
+        s.set(output_chars=len(text))
     print(f"{LOG_PREFIX} {in_len} → {len(text)} chars (whitespace normalized)")
     return text
+
+
+def normalize_elements(elements: list[RawElement]) -> list[RawElement]:
+    """Same cleanup per element (each is short, so no pass over the whole document); drops empty ones."""
+    in_len = sum(len(e.text) for e in elements)
+    out: list[RawElement] = []
+    with span("normalize", input_chars=in_len, elements=len(elements)) as s:
+        for e in elements:
+            text = re.sub(r"[ \t]+", " ", re.sub(r"\n{3,}", "\n\n", e.text)).strip()
+            if text:
+                out.append(e if text == e.text else replace(e, text=text))
+        out_len = sum(len(e.text) for e in out)
+        s.set(output_chars=out_len)
+    print(f"{LOG_PREFIX} {len(elements)} elements, {in_len} → {out_len} chars (whitespace normalized)")
+    return out
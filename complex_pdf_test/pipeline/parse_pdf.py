@@ -1,29 +1,158 @@
-"""Parse a PDF with Docling: extract full document as markdown (text + tables + structure)."""
+"""
+Parse a PDF with Docling: extract the full document as markdown (text + tables + structure),
+or as a list of RawElements read straight from the Docling document tree.
+"""
 
 import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from docling.document_converter import DocumentConverter
+from ..instrumentation import span
+from .schemas import RawElement
+
+if TYPE_CHECKING:
+    from .probe_pdf import ParseProfile
+    from docling.document_converter import DocumentConverter
+    from docling_core.types.doc import DoclingDocument
 
 LOG_PREFIX = "[parse_pdf]"
 
+# Docling item label → RawElement.element_type (other labels with text become "text";
+# page headers / footers are furniture and are not iterated)
+_ELEMENT_TYPES = {
+    "title": "title",
+    "section_header": "section_header",
+    "caption": "figure_caption",
+    "list_item": "list_item",
+    "table": "table",
+}
+
+
+def count_pages(path: str | Path) -> int:
+    """Page count without parsing (pypdfium2, installed with Docling)."""
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(str(path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
 
-def parse_pdf(path: str | Path) -> tuple[str, str]:
+
+def create_converter(profile: "ParseProfile | None" = None) -> "DocumentConverter":
     """
-    Parse a PDF file with Docling. Returns (source_file_stem, full_markdown_text).
+    Docling converter (loads layout / table models on first conversion; reuse it across calls).
+    profile (see probe_pdf) sets OCR and the table model; None keeps Docling's defaults.
     """
+    # Imported here: docling (torch, models) takes seconds to import and most callers of
+    # the pipeline package only chunk or load
+    from docling.document_converter import DocumentConverter
+
+    with span("parse.init_converter", profile=profile.name if profile else "default"):
+        if profile is None or profile.name == "default":
+            return DocumentConverter()
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+        from docling.document_converter import PdfFormatOption
+
+        options = PdfPipelineOptions()
+        options.do_ocr = profile.do_ocr
+        options.do_table_structure = profile.do_table_structure
+        options.table_structure_options.mode = TableFormerMode.FAST if profile.table_mode == "fast" else TableFormerMode.ACCURATE
+        return DocumentConverter(format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)})
+
+
+def _convert(path: Path, converter: "DocumentConverter | None", page_range: tuple[int, int] | None):
+    pages_note = f", pages {page_range[0]}-{page_range[1]}" if page_range else ""
+    print(f"{LOG_PREFIX} Input: {path.name} ({path.stat().st_size / 1024:.1f} KB{pages_note})")
+    if converter is None:
+        print(f"{LOG_PREFIX} Initializing Docling (first run may download models)...")
+        converter = create_converter()
+    print(f"{LOG_PREFIX} Converting PDF (layout + tables + text)...")
+    with span("parse.convert", input_bytes=path.stat().st_size) as s:
+        result = converter.convert(path, page_range=page_range) if page_range else converter.convert(path)
+        s.set(pages=len(getattr(result.document, "pages", None) or {}))
+    return result
+
+
+def _check_pdf(path: str | Path) -> Path:
     path = Path(path)
     if path.suffix.lower() != ".pdf":
         raise ValueError(f"Expected a PDF file, got {path.suffix}")
+    return path
+
 
-    print(f"{LOG_PREFIX} Input: {path.name} ({path.stat().st_size / 1024:.1f} KB)")
-    print(f"{LOG_PREFIX} Initializing Docling (first run may download models)...")
+def parse_pdf(
+    path: str | Path,
+    *,
+    converter: "DocumentConverter | None" = None,
+    page_range: tuple[int, int] | None = None,
+) -> tuple[str, str]:
+    """
+    Parse a PDF file with Docling. Returns (source_file_stem, full_markdown_text).
+    page_range (1-based, inclusive) converts only those pages, e.g. one part of a large PDF.
+    """
+    path = _check_pdf(path)
     t0 = time.perf_counter()
-    converter = DocumentConverter()
-    print(f"{LOG_PREFIX} Converting PDF to markdown (layout + tables + text)...")
-    result = converter.convert(path)
-    doc = result.document
-    full_md = doc.export_to_markdown() or ""
+    result = _convert(path, converter, page_range)
+    with span("parse.export_markdown") as s:
+        full_md = result.document.export_to_markdown() or ""
+        s.set(output_chars=len(full_md))
+    # The Docling document (page images, layout clusters) is much larger than the markdown
+    del result
     elapsed = time.perf_counter() - t0
     print(f"{LOG_PREFIX} Done in {elapsed:.1f}s — {len(full_md)} chars extracted")
     return path.stem, full_md
+
+
+def parse_pdf_elements(
+    path: str | Path,
+    *,
+    converter: "DocumentConverter | None" = None,
+    page_range: tuple[int, int] | None = None,
+) -> tuple[str, list[RawElement]]:
+    """
+    Parse a PDF file with Docling. Returns (source_file_stem, elements in reading order),
+    each with its type and page; no markdown export.
+    """
+    path = _check_pdf(path)
+    t0 = time.perf_counter()
+    result = _convert(path, converter, page_range)
+    with span("parse.extract_elements") as s:
+        elements = document_elements(result.document, path.name)
+        s.set(elements=len(elements), output_chars=sum(len(e.text) for e in elements))
+    del result
+    elapsed = time.perf_counter() - t0
+    print(f"{LOG_PREFIX} Done in {elapsed:.1f}s — {len(elements)} elements extracted")
+    return path.stem, elements
+
+
+def document_elements(doc: "DoclingDocument", source_file: str) -> list[RawElement]:
+    """
+    Walk the Docling document tree (body, reading order) into RawElements.
+    Tables are exported as markdown with their caption; figures contribute their caption.
+    """
+    elements: list[RawElement] = []
+    attached: set[str] = set()  # caption refs already emitted with their table / figure
+    for item, _level in doc.iterate_items():
+        label = getattr(item.label, "value", str(item.label))
+        page = item.prov[0].page_no if getattr(item, "prov", None) else None
+        if label == "table" or label in ("picture", "chart"):
+            attached.update(ref.cref for ref in getattr(item, "captions", []))
+            caption = item.caption_text(doc) if hasattr(item, "caption_text") else ""
+            if label == "table":
+                body = item.export_to_markdown(doc=doc)
+                # Recent docling-core versions already put the caption above the table
+                text = f"{caption}\n\n{body}" if caption and caption not in body else body
+            else:
+                text, label = caption, "caption"
+            if text.strip():
+                elements.append(RawElement(text=text, page=page, element_type=_ELEMENT_TYPES[label], source_file=source_file))
+            continue
+        text = getattr(item, "text", "")
+        if not text or not text.strip() or item.self_ref in attached:
+            continue
+        elements.append(
+            RawElement(text=text, page=page, element_type=_ELEMENT_TYPES.get(label, "text"), source_file=source_file)
+        )
+    return elements
@@ -0,0 +1,467 @@
+"""
+Resident parse service: Docling converters stay loaded in a pool of worker processes, so a
+document costs its parse time only (no interpreter start, docling import, converter init
+or model load per call).
+
+  POST /parse?format=markdown|elements&profile=auto|fast|tables|ocr|default&pages=1-5&name=x.pdf
+       body: the PDF bytes (application/pdf), or {"path": "/abs/file.pdf"} (application/json)
+       → {"doc_id", "source_file", "profile", "markdown" | "elements", "queue_ms", "parse_ms", "worker_pid"}
+  GET  /health → workers, requests in flight, counters, mean parse time
+
+Each worker process loads the converters for --warm profiles and converts a blank page at
+start (that is what loads the layout / table models), then caches one converter per
+profile it meets. At most workers + max_queue requests are accepted at once; beyond that
+the answer is 503 with Retry-After. A crashed worker (Docling segfault, OOM kill) fails its
+request with 500 and the pool is restarted; requests get 503 until the new workers are
+warm. A request that times out gets 504, but its parse keeps its place in the admission
+count until the worker has finished it.
+
+Usage (from project root):
+  uv run python complex_pdf_test/pipeline/parse_server.py --workers 2 --port 8090
+  uv run python complex_pdf_test/pipeline/parse_server.py --client complex_pdf_test/mistral-doc.pdf --format elements
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlencode, urlparse
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from complex_pdf_test.pipeline.probe_pdf import PROFILES, choose_profile
+from complex_pdf_test.pipeline.schemas import RawElement
+
+LOG_PREFIX = "[parse_server]"
+DEFAULT_PORT = 8090
+FORMATS = ("markdown", "elements")
+
+# ---- worker process side ----
+
+_converters: dict[str, Any] = {}
+
+
+def _converter(profile_name: str):
+    from complex_pdf_test.pipeline.parse_pdf import create_converter
+
+    if profile_name not in _converters:
+        _converters[profile_name] = create_converter(PROFILES[profile_name])
+    return _converters[profile_name]
+
+
+def _init_worker(warm_profiles: list[str], started) -> None:
+    """Load converters and run one blank page through each, so models are resident before the first request."""
+    import pypdfium2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        blank = Path(tmp) / "warmup.pdf"
+        pdf = pypdfium2.PdfDocument.new()
+        pdf.new_page(595, 842)
+        pdf.save(str(blank))
+        pdf.close()
+        for name in warm_profiles:
+            t0 = time.perf_counter()
+            _converter(name).convert(blank)
+            print(f"{LOG_PREFIX} worker {os.getpid()}: profile '{name}' warm in {time.perf_counter() - t0:.1f}s", flush=True)
+    # Wait for the other workers: otherwise the first warm one takes every startup call
+    # and the server reports ready while the others are still loading models
+    try:
+        started.wait(timeout=600)
+    except threading.BrokenBarrierError:
+        pass
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _parse_job(pdf: bytes | str, name: str, fmt: str, profile: str, page_range: tuple[int, int] | None) -> dict:
+    from complex_pdf_test.pipeline.parse_pdf import parse_pdf, parse_pdf_elements
+
+    t0 = time.perf_counter()
+    tmp_dir = None
+    if isinstance(pdf, bytes):
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = Path(tmp_dir.name) / "upload.pdf"
+        path.write_bytes(pdf)
+    else:
+        path = Path(pdf)
+    try:
+        chosen = choose_profile(path)[0] if profile == "auto" else PROFILES[profile]
+        converter = _converter(chosen.name)
+        result: dict[str, Any] = {"doc_id": Path(name).stem, "source_file": name, "profile": chosen.name}
+        if fmt == "elements":
+            _, elements = parse_pdf_elements(path, converter=converter, page_range=page_range)
+            result["elements"] = [{**asdict(e), "source_file": name} for e in elements]
+        else:
+            _, markdown = parse_pdf(path, converter=converter, page_range=page_range)
+            result["markdown"] = markdown
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    result["parse_ms"] = (time.perf_counter() - t0) * 1000
+    result["worker_pid"] = os.getpid()
+    return result
+
+
+# ---- server side ----
+
+class ServerBusy(RuntimeError):
+    pass
+
+
+class ParseServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        *,
+        workers: int = 1,
+        max_queue: int = 8,
+        warm_profiles: list[str] | None = None,
+        request_timeout_s: float = 600.0,
+    ):
+        super().__init__(address, _Handler)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.warm_profiles = warm_profiles if warm_profiles is not None else ["fast"]
+        self.request_timeout_s = request_timeout_s
+        self.lock = threading.Lock()
+        self.in_flight = 0  # queued + running (including parses whose request timed out)
+        self.restarting = False
+        self.stats: dict[str, float] = {"parsed": 0, "errors": 0, "rejected_busy": 0, "timeouts": 0, "pool_restarts": 0, "parse_ms_total": 0.0}
+        self.pool = self._start_pool()
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        import multiprocessing
+
+        # spawn: forking a process that already imported torch is not safe
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.warm_profiles, ctx.Barrier(self.workers)),
+        )
+        t0 = time.perf_counter()
+        # One call per worker: the pool starts a process for each call while none is idle
+        pids = {f.result() for f in [pool.submit(_ready) for _ in range(self.workers)]}
+        print(f"{LOG_PREFIX} {len(pids)} worker(s) ready in {time.perf_counter() - t0:.1f}s (warm profiles: {self.warm_profiles})", flush=True)
+        return pool
+
+    def count(self, key: str, n: float = 1) -> None:
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def _release_slot(self, _future=None) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a broken pool. The new one is built outside the lock (warm-up can take minutes)."""
+        with self.lock:
+            if self.pool is not broken or self.restarting:
+                return
+            self.restarting = True
+            self.stats["pool_restarts"] += 1
+        print(f"{LOG_PREFIX} A worker died, restarting the pool", flush=True)
+        broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            pool = self._start_pool()
+            with self.lock:
+                self.pool = pool
+        finally:
+            with self.lock:
+                self.restarting = False
+
+    def parse(self, pdf: bytes | str, name: str, fmt: str, profile: str, page_range: tuple[int, int] | None) -> dict:
+        """Run one parse on the pool (blocks until done); raises ServerBusy when the queue is full or the pool restarts."""
+        with self.lock:
+            if self.restarting:
+                self.stats["rejected_busy"] += 1
+                raise ServerBusy("worker pool restarting")
+            if self.in_flight >= self.workers + self.max_queue:
+                self.stats["rejected_busy"] += 1
+                raise ServerBusy(f"{self.in_flight} requests in flight")
+            self.in_flight += 1
+            pool = self.pool
+        t0 = time.perf_counter()
+        future = None
+        try:
+            future = pool.submit(_parse_job, pdf, name, fmt, profile, page_range)
+            result = future.result(timeout=self.request_timeout_s)
+        except BrokenProcessPool:
+            self._release_slot()
+            self._restart_pool(pool)
+            raise
+        except FutureTimeout:
+            # The worker is still parsing: its slot stays taken until it is really done,
+            # so admission keeps bounding the load on the pool
+            self.count("timeouts")
+            future.add_done_callback(self._release_slot)
+            raise
+        except BaseException:
+            self._release_slot()
+            raise
+        self._release_slot()
+        result["queue_ms"] = max((time.perf_counter() - t0) * 1000 - result["parse_ms"], 0.0)
+        self.count("parsed")
+        self.count("parse_ms_total", result["parse_ms"])
+        return result
+
+    def health(self) -> dict:
+        with self.lock:
+            stats = dict(self.stats)
+            in_flight = self.in_flight
+            restarting = self.restarting
+        parsed = stats["parsed"]
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "warm_profiles": self.warm_profiles,
+            "parsed": int(parsed),
+            "errors": int(stats["errors"]),
+            "rejected_busy": int(stats["rejected_busy"]),
+            "timeouts": int(stats["timeouts"]),
+            "restarting": restarting,
+            "pool_restarts": int(stats["pool_restarts"]),
+            "mean_parse_ms": stats["parse_ms_total"] / parsed if parsed else None,
+        }
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_pages(value: str | None) -> tuple[int, int] | None:
+    if not value:
+        return None
+    first, _, last = value.partition("-")
+    return int(first), int(last or first)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ParseServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:  # quiet by default
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path.rstrip("/") == "/health":
+            self._send_json(200, self.server.health())
+        else:
+            self._send_json(404, {"message": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/parse":
+            self._send_json(404, {"message": f"Not found: {url.path}"})
+            return
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        fmt = query.get("format", "markdown")
+        profile = query.get("profile", "auto")
+        if fmt not in FORMATS or (profile != "auto" and profile not in PROFILES):
+            self._send_json(400, {"message": f"format must be one of {FORMATS}, profile auto or one of {list(PROFILES)}"})
+            return
+        try:
+            page_range = _parse_pages(query.get("pages"))
+            if (self.headers.get("Content-Type") or "").startswith("application/json"):
+                path = Path(json.loads(body)["path"])
+                if not path.is_file():
+                    self._send_json(404, {"message": f"No such file on the server: {path}"})
+                    return
+                pdf: bytes | str = str(path)
+                name = query.get("name", path.name)
+            else:
+                if not body.startswith(b"%PDF"):
+                    self._send_json(400, {"message": "Body is not a PDF"})
+                    return
+                pdf, name = body, query.get("name", "upload.pdf")
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"message": f"Bad request: {e}"})
+            return
+        try:
+            result = self.server.parse(pdf, name, fmt, profile, page_range)
+        except ServerBusy as e:
+            self._send_json(503, {"message": f"Busy: {e}"}, {"Retry-After": "1"})
+        except FutureTimeout:
+            self.server.count("errors")
+            self._send_json(504, {"message": f"Parse did not finish in {self.server.request_timeout_s:.0f}s"})
+        except Exception as e:
+            self.server.count("errors")
+            self._send_json(500, {"message": f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, result)
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0, **kwargs: Any) -> ParseServer:
+    """Start a parse server on a background thread (port 0 = pick a free port). Call .shutdown() to stop."""
+    server = ParseServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, name="parse-server", daemon=True).start()
+    return server
+
+
+# ---- client ----
+
+@dataclass
+class ParseResult:
+    doc_id: str
+    source_file: str
+    profile: str
+    markdown: str | None = None
+    elements: list[RawElement] = field(default_factory=list)
+    queue_ms: float = 0.0
+    parse_ms: float = 0.0
+    total_ms: float = 0.0
+
+
+class ParseClient:
+    """Small client for the parse server; retries while the server answers 503 (busy)."""
+
+    def __init__(self, base_url: str = f"http://127.0.0.1:{DEFAULT_PORT}", *, timeout_s: float = 900.0, busy_retries: int = 30):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.busy_retries = busy_retries
+        self._http = requests.Session()
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> "ParseClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def health(self) -> dict:
+        r = self._http.get(f"{self.base_url}/health", timeout=10)
+        r.raise_for_status()
+        return r.json()
+
+    def parse(
+        self,
+        pdf: str | Path | bytes,
+        *,
+        format: str = "markdown",
+        profile: str = "auto",
+        page_range: tuple[int, int] | None = None,
+        name: str | None = None,
+        send_path: bool = False,
+    ) -> ParseResult:
+        """
+        Parse a PDF (a path: uploaded, or only its path with send_path=True when the server
+        shares the file system; or the PDF bytes).
+        """
+        query = {"format": format, "profile": profile}
+        if page_range:
+            query["pages"] = f"{page_range[0]}-{page_range[1]}"
+        if isinstance(pdf, bytes):
+            kwargs: dict[str, Any] = {"data": pdf, "headers": {"Content-Type": "application/pdf"}}
+            query["name"] = name or "upload.pdf"
+        else:
+            path = Path(pdf)
+            query["name"] = name or path.name
+            if send_path:
+                kwargs = {"json": {"path": str(path.resolve())}}
+            else:
+                kwargs = {"data": path.read_bytes(), "headers": {"Content-Type": "application/pdf"}}
+        url = f"{self.base_url}/parse?{urlencode(query)}"
+        t0 = time.perf_counter()
+        for attempt in range(self.busy_retries + 1):
+            r = self._http.post(url, timeout=self.timeout_s, **kwargs)
+            if r.status_code != 503 or attempt == self.busy_retries:
+                break
+            time.sleep(float(r.headers.get("Retry-After") or 1))
+        if r.status_code != 200:
+            raise RuntimeError(f"Parse server {r.status_code}: {r.text[:300]}")
+        data = r.json()
+        return ParseResult(
+            doc_id=data["doc_id"],
+            source_file=data["source_file"],
+            profile=data["profile"],
+            markdown=data.get("markdown"),
+            elements=[RawElement(**e) for e in data.get("elements", [])],
+            queue_ms=data["queue_ms"],
+            parse_ms=data["parse_ms"],
+            total_ms=(time.perf_counter() - t0) * 1000,
+        )
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident Docling parse service (or --client to call one).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (each holds its own models)")
+    parser.add_argument("--max-queue", type=int, default=8, help="Requests waiting for a worker before 503")
+    parser.add_argument("--warm", default="fast", help="Comma-separated profiles loaded at start (fast,tables,ocr,default)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds per request before 504")
+    parser.add_argument("--client", nargs="+", type=Path, default=None, metavar="PDF", help="Parse these PDFs with a running server")
+    parser.add_argument("--format", choices=FORMATS, default="markdown")
+    parser.add_argument("--profile", default="auto")
+    args = parser.parse_args()
+
+    if args.client:
+        with ParseClient(f"http://{args.host}:{args.port}") as client:
+            for pdf in args.client:
+                res = client.parse(pdf, format=args.format, profile=args.profile)
+                size = f"{len(res.markdown or '')} chars" if args.format == "markdown" else f"{len(res.elements)} elements"
+                print(
+                    f"{LOG_PREFIX} {pdf.name}: {size}, profile {res.profile}, "
+                    f"queue {res.queue_ms:.0f} ms, parse {res.parse_ms:.0f} ms, total {res.total_ms:.0f} ms"
+                )
+        return
+
+    warm = [p.strip() for p in args.warm.split(",") if p.strip()]
+    unknown = set(warm) - set(PROFILES)
+    if unknown:
+        raise SystemExit(f"Unknown profiles: {sorted(unknown)}")
+    server = ParseServer(
+        (args.host, args.port), workers=args.workers, max_queue=args.max_queue, warm_profiles=warm, request_timeout_s=args.timeout
+    )
+    print(f"{LOG_PREFIX} Listening on {server.root_url} ({args.workers} workers, queue {args.max_queue})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{LOG_PREFIX} Stopped. {server.health()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
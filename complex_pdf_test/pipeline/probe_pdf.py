@@ -0,0 +1,161 @@
+"""
+Pre-parse probe: sample a few pages with pypdfium2 (milliseconds, no models), classify the
+PDF and pick a Docling converter profile for it.
+
+  born_digital  text layer on every sampled page           → "fast"   (no OCR, fast table model)
+  table_heavy   born digital, many ruled / drawn pages      → "tables" (no OCR, accurate table model)
+  scanned       little or no extractable text, page images → "ocr"    (OCR, accurate table model)
+  mixed         text layer missing on some pages           → "default" (Docling defaults)
+
+OCR is what costs the most on a born-digital PDF and adds nothing there: the text layer is
+already exact. Encrypted or unreadable files fall back to "default".
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+LOG_PREFIX = "[probe_pdf]"
+DEFAULT_SAMPLE_PAGES = 8
+# A page with fewer extractable characters has no usable text layer (blank, scanned, figure only)
+MIN_TEXT_CHARS = 200
+# Share of printable characters below which the text layer is treated as broken (bad font encoding)
+MIN_PRINTABLE_RATIO = 0.9
+# Vector path objects from which a page is treated as ruled (tables; also dense charts)
+RULED_PAGE_PATHS = 100
+TABLE_HEAVY_RATIO = 0.5
+SCANNED_IMAGE_COVERAGE = 0.6
+
+
+@dataclass(frozen=True)
+class ParseProfile:
+    """Docling PDF pipeline options for one class of document."""
+    name: str
+    do_ocr: bool = True
+    do_table_structure: bool = True
+    table_mode: str = "accurate"  # "fast" | "accurate" (TableFormer)
+
+
+PROFILES: dict[str, ParseProfile] = {
+    "default": ParseProfile("default"),
+    "fast": ParseProfile("fast", do_ocr=False, table_mode="fast"),
+    "tables": ParseProfile("tables", do_ocr=False, table_mode="accurate"),
+    "ocr": ParseProfile("ocr", do_ocr=True, table_mode="accurate"),
+}
+
+
+@dataclass
+class PdfProbe:
+    """What the sampled pages look like."""
+    pages: int
+    sampled: list[int] = field(default_factory=list)  # 0-based page indexes
+    text_pages: int = 0
+    ruled_pages: int = 0
+    chars_per_page: float = 0.0
+    printable_ratio: float = 1.0
+    image_coverage: float = 0.0  # mean share of the page area covered by images
+    kind: str = "unknown"
+    reason: str = ""
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _sample_indexes(pages: int, n: int) -> list[int]:
+    if n < 1:
+        raise ValueError(f"sample_pages must be >= 1, got {n}")
+    if pages <= n:
+        return list(range(pages))
+    if n == 1:
+        return [pages // 2]
+    step = (pages - 1) / (n - 1)
+    return sorted({round(i * step) for i in range(n)})
+
+
+def _image_area(page, image_type: int) -> float:
+    width, height = page.get_size()
+    area = 0.0
+    for obj in page.get_objects(filter=[image_type], max_depth=2):
+        # pypdfium2 5.x renamed get_pos to get_bounds
+        left, bottom, right, top = obj.get_bounds() if hasattr(obj, "get_bounds") else obj.get_pos()
+        area += max(right - left, 0) * max(top - bottom, 0)
+    return min(area / (width * height), 1.0) if width and height else 0.0
+
+
+def probe_pdf(path: str | Path, *, sample_pages: int = DEFAULT_SAMPLE_PAGES) -> PdfProbe:
+    """Sample up to sample_pages pages spread over the document and classify the PDF."""
+    import pypdfium2
+    import pypdfium2.raw as pdfium_c
+
+    t0 = time.perf_counter()
+    pdf = pypdfium2.PdfDocument(str(path))
+    try:
+        probe = PdfProbe(pages=len(pdf), sampled=_sample_indexes(len(pdf), sample_pages))
+        chars = printable = total = 0
+        coverage = 0.0
+        for i in probe.sampled:
+            page = pdf[i]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                n_chars = len(text.strip())
+                chars += n_chars
+                total += len(text)
+                printable += sum(1 for ch in text if ch.isprintable() or ch.isspace())
+                if n_chars >= MIN_TEXT_CHARS:
+                    probe.text_pages += 1
+                paths = sum(1 for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=2))
+                if paths >= RULED_PAGE_PATHS:
+                    probe.ruled_pages += 1
+                coverage += _image_area(page, pdfium_c.FPDF_PAGEOBJ_IMAGE)
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+    n = len(probe.sampled) or 1
+    probe.chars_per_page = chars / n
+    probe.printable_ratio = printable / total if total else 1.0
+    probe.image_coverage = coverage / n
+    probe.kind, probe.reason = _classify(probe)
+    probe.seconds = time.perf_counter() - t0
+    return probe
+
+
+def _classify(p: PdfProbe) -> tuple[str, str]:
+    n = len(p.sampled)
+    if n == 0:
+        return "mixed", "no pages"
+    if p.text_pages == 0:
+        return "scanned", f"no text layer on {n} sampled pages (images cover {p.image_coverage:.0%})"
+    if p.printable_ratio < MIN_PRINTABLE_RATIO:
+        return "scanned", f"text layer unreadable ({p.printable_ratio:.0%} printable characters)"
+    if p.text_pages < n:
+        if p.text_pages / n < 0.5 and p.image_coverage >= SCANNED_IMAGE_COVERAGE:
+            return "scanned", f"text on {p.text_pages}/{n} sampled pages, images cover {p.image_coverage:.0%}"
+        return "mixed", f"text on {p.text_pages}/{n} sampled pages"
+    if p.ruled_pages / n >= TABLE_HEAVY_RATIO:
+        return "table_heavy", f"text on all {n} sampled pages, {p.ruled_pages} ruled"
+    return "born_digital", f"text on all {n} sampled pages ({p.chars_per_page:.0f} chars/page), {p.ruled_pages} ruled"
+
+
+_KIND_PROFILES = {"born_digital": "fast", "table_heavy": "tables", "scanned": "ocr", "mixed": "default"}
+
+
+def choose_profile(path: str | Path, *, sample_pages: int = DEFAULT_SAMPLE_PAGES) -> tuple[ParseProfile, PdfProbe | None]:
+    """Probe the PDF and return (profile, probe); Docling defaults when the probe fails."""
+    if sample_pages < 1:  # a caller error, not a PDF the probe cannot read
+        raise ValueError(f"sample_pages must be >= 1, got {sample_pages}")
+    try:
+        probe = probe_pdf(path, sample_pages=sample_pages)
+    except Exception as e:  # encrypted, damaged: let Docling deal with it
+        print(f"{LOG_PREFIX} {Path(path).name}: probe failed ({e}), using profile 'default'")
+        return PROFILES["default"], None
+    profile = PROFILES[_KIND_PROFILES[probe.kind]]
+    print(
+        f"{LOG_PREFIX} {Path(path).name}: {probe.kind} ({probe.reason}) → profile '{profile.name}' "
+        f"[probe {probe.seconds * 1000:.0f} ms]"
+    )
+    return profile, probe
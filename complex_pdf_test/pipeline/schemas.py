@@ -9,7 +9,7 @@ class RawElement:
     """One piece of content extracted from the PDF (paragraph, table, caption, etc.)."""
     text: str
     page: int | None
-    element_type: str  # "text" | "table" | "figure_caption" | "title" | "section_header"
+    element_type: str  # "text" | "table" | "figure_caption" | "list_item" | "title" | "section_header"
     source_file: str
 
 
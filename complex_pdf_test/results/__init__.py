@@ -0,0 +1,29 @@
+"""Benchmark results store: save runs, compare baseline vs candidate, render charts."""
+
+from .store import (
+    BenchmarkRun,
+    collect_environment,
+    describe_index,
+    ingestion_summary,
+    latency_summary,
+    list_runs,
+    load_run,
+    new_run,
+    percentile,
+    save_run,
+    settings_hash,
+)
+
+__all__ = [
+    "BenchmarkRun",
+    "collect_environment",
+    "describe_index",
+    "ingestion_summary",
+    "latency_summary",
+    "list_runs",
+    "load_run",
+    "new_run",
+    "percentile",
+    "save_run",
+    "settings_hash",
+]
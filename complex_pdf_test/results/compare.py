@@ -0,0 +1,248 @@
+"""
+Compare stored benchmark runs: list them, flag regressions, render charts.
+
+Regression check (baseline vs candidate):
+  - Latency: one-sided Mann-Whitney U test on the raw samples (candidate slower?),
+    flagged when p < alpha AND the median grew by more than --min-change.
+  - Ingestion: same test on per-batch seconds when both runs have them; otherwise
+    throughput drop larger than --min-change is flagged (no significance possible).
+
+Usage (from project root):
+  uv run python complex_pdf_test/results/compare.py list
+  uv run python complex_pdf_test/results/compare.py compare BASELINE_ID CANDIDATE_ID
+  uv run python complex_pdf_test/results/compare.py plot RUN_ID [RUN_ID ...] -o out.png
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from complex_pdf_test.results.store import DEFAULT_STORE_DIR, BenchmarkRun, list_runs, load_run
+
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_CHANGE = 0.10  # 10 % relative change before we call it a regression
+
+
+def mann_whitney_greater(baseline: list[float], candidate: list[float]) -> tuple[float, float]:
+    """
+    One-sided Mann-Whitney U test, H1: candidate values tend to be larger than baseline.
+    Normal approximation with tie correction. Returns (U statistic of candidate, p-value).
+    """
+    n1, n2 = len(candidate), len(baseline)
+    if n1 == 0 or n2 == 0:
+        return 0.0, 1.0
+    pooled = sorted([(v, 0) for v in candidate] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        avg_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = avg_rank
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+    rank_sum = sum(r for r, (_, group) in zip(ranks, pooled) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean_u = n1 * n2 / 2
+    var_u = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if var_u <= 0:
+        return u, 1.0
+    z = (u - mean_u - 0.5) / math.sqrt(var_u)  # continuity correction
+    p = 0.5 * math.erfc(z / math.sqrt(2))
+    return u, p
+
+
+def _relative_change(base: float, cand: float) -> float:
+    return (cand - base) / base if base else 0.0
+
+
+def compare_runs(
+    baseline: BenchmarkRun,
+    candidate: BenchmarkRun,
+    *,
+    alpha: float = DEFAULT_ALPHA,
+    min_change: float = DEFAULT_MIN_CHANGE,
+) -> list[dict]:
+    """Return one finding dict per compared metric; finding["regression"] is True when flagged."""
+    findings: list[dict] = []
+
+    if baseline.latency and candidate.latency:
+        for metric in ("mean", "p50", "p95"):
+            if metric in baseline.latency and metric in candidate.latency:
+                b, c = baseline.latency[metric], candidate.latency[metric]
+                findings.append({"metric": f"latency_{metric}_ms", "baseline": b, "candidate": c, "change": _relative_change(b, c)})
+        if baseline.latencies_ms and candidate.latencies_ms:
+            _, p = mann_whitney_greater(baseline.latencies_ms, candidate.latencies_ms)
+            median_change = _relative_change(baseline.latency["p50"], candidate.latency["p50"])
+            findings.append({
+                "metric": "latency_distribution",
+                "baseline": baseline.latency["p50"],
+                "candidate": candidate.latency["p50"],
+                "change": median_change,
+                "p_value": p,
+                "regression": p < alpha and median_change > min_change,
+            })
+        else:
+            # Summary-only runs (e.g. historic numbers): fall back to a relative threshold on p95
+            for f in findings:
+                if f["metric"] == "latency_p95_ms":
+                    f["regression"] = f["change"] > min_change
+                    f["note"] = "no raw samples, threshold only"
+
+    if baseline.ingestion and candidate.ingestion:
+        b_tp = baseline.ingestion.get("docs_per_s", 0.0)
+        c_tp = candidate.ingestion.get("docs_per_s", 0.0)
+        finding = {"metric": "ingestion_docs_per_s", "baseline": b_tp, "candidate": c_tp, "change": _relative_change(b_tp, c_tp)}
+        b_batches = _per_doc_batch_seconds(baseline.ingestion)
+        c_batches = _per_doc_batch_seconds(candidate.ingestion)
+        if b_batches and c_batches:
+            _, p = mann_whitney_greater(b_batches, c_batches)
+            finding["p_value"] = p
+            finding["regression"] = p < alpha and -finding["change"] > min_change
+        else:
+            finding["regression"] = -finding["change"] > min_change
+            finding["note"] = "no per-batch timings, threshold only"
+        findings.append(finding)
+
+    return findings
+
+
+def _per_doc_batch_seconds(ingestion: dict) -> list[float]:
+    """Per-batch seconds normalised by batch size, so different batch sizes stay comparable."""
+    batches = ingestion.get("batch_seconds") or []
+    sizes = ingestion.get("batch_docs") or []
+    if sizes and len(sizes) == len(batches):
+        return [s / n for s, n in zip(batches, sizes) if n]
+    return list(batches)
+
+
+def _print_runs(runs: list[BenchmarkRun]) -> None:
+    print(f"{'RUN_ID':55} {'KIND':16} {'CORPUS':>8} {'SETTINGS':12} {'P50':>8} {'P95':>8} {'DOCS/S':>8}")
+    print("-" * 121)
+    for r in runs:
+        p50 = f"{r.latency['p50']:.0f}" if r.latency else "-"
+        p95 = f"{r.latency['p95']:.0f}" if r.latency else "-"
+        tp = f"{r.ingestion['docs_per_s']:.1f}" if r.ingestion else "-"
+        print(f"{r.run_id[:55]:55} {r.kind[:16]:16} {str(r.corpus_size or '-'):>8} {str(r.settings_hash or '-'):12} {p50:>8} {p95:>8} {tp:>8}")
+
+
+def _run_name(run: BenchmarkRun) -> str:
+    if run.label:
+        return run.label
+    return f"{run.corpus_size} docs" if run.corpus_size else run.run_id
+
+
+def plot_runs(runs: list[BenchmarkRun], out_path: Path) -> list[Path]:
+    """Latency (mean/p50/p95) and ingestion throughput bars for the selected runs; writes PNG + SVG."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    labels = ["Mean", "p50", "p95"]
+    latency_runs = [r for r in runs if r.latency]
+    ingest_runs = [r for r in runs if r.ingestion]
+    n_axes = 1 + (1 if ingest_runs else 0)
+    fig, axes = plt.subplots(1, n_axes, figsize=(5 * n_axes, 4), squeeze=False)
+
+    ax1 = axes[0][0]
+    x = np.arange(len(labels))
+    width = 0.8 / max(len(latency_runs), 1)
+    for i, run in enumerate(latency_runs):
+        values = [run.latency["mean"], run.latency["p50"], run.latency["p95"]]
+        bars = ax1.bar(x - 0.4 + width * (i + 0.5), values, width, label=_run_name(run))
+        for b in bars:
+            ax1.text(b.get_x() + b.get_width() / 2, b.get_height(), f"{b.get_height():.0f}", ha="center", va="bottom", fontsize=8)
+    ax1.set_ylabel("Latency (ms)")
+    ax1.set_title("Search latency")
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(labels)
+    ax1.legend()
+    ax1.grid(axis="y", alpha=0.3)
+
+    if ingest_runs:
+        ax2 = axes[0][1]
+        names = [_run_name(r) for r in ingest_runs]
+        values = [r.ingestion["docs_per_s"] for r in ingest_runs]
+        bars = ax2.bar(range(len(values)), values, width=0.5, color=[f"C{i}" for i in range(len(values))])
+        for b, run in zip(bars, ingest_runs):
+            ax2.text(b.get_x() + b.get_width() / 2, b.get_height(), f"{b.get_height():.1f}\n({run.ingestion['seconds']:.1f} s)", ha="center", va="bottom", fontsize=8)
+        ax2.set_ylabel("Throughput (docs/s)")
+        ax2.set_title("Ingestion throughput (docs/s)")
+        ax2.set_xticks(range(len(values)))
+        ax2.set_xticklabels(names)
+        ax2.set_ylim(0, max(values) * 1.25 if values else 1)
+        ax2.grid(axis="y", alpha=0.3)
+
+    plt.tight_layout()
+    written: list[Path] = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List, compare and plot stored benchmark runs.")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_DIR, help="Results store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="List stored runs")
+    p_list.add_argument("--kind", default=None, help="Only runs of this kind")
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions of CANDIDATE against BASELINE")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("candidate")
+    p_cmp.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="Significance level")
+    p_cmp.add_argument("--min-change", type=float, default=DEFAULT_MIN_CHANGE, help="Minimum relative change to flag")
+
+    p_plot = sub.add_parser("plot", help="Render latency/throughput charts for the given runs")
+    p_plot.add_argument("runs", nargs="+")
+    p_plot.add_argument("-o", "--output", type=Path, default=Path("benchmark_comparison.png"), help="Output path (.png and .svg written)")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        _print_runs(list_runs(args.store, kind=args.kind))
+        return
+
+    if args.command == "plot":
+        runs = [load_run(r, args.store) for r in args.runs]
+        for out in plot_runs(runs, args.output):
+            print(f"Saved {out}")
+        return
+
+    baseline = load_run(args.baseline, args.store)
+    candidate = load_run(args.candidate, args.store)
+    if baseline.settings_hash != candidate.settings_hash:
+        print(f"Note: index settings differ ({baseline.settings_hash} → {candidate.settings_hash})")
+    if baseline.corpus_size != candidate.corpus_size:
+        print(f"Note: corpus size differs ({baseline.corpus_size} → {candidate.corpus_size})")
+    findings = compare_runs(baseline, candidate, alpha=args.alpha, min_change=args.min_change)
+    regressions = 0
+    for f in findings:
+        flag = "REGRESSION" if f.get("regression") else "ok"
+        p = f" p={f['p_value']:.4f}" if "p_value" in f else ""
+        note = f" ({f['note']})" if "note" in f else ""
+        print(f"  {f['metric']:24} {f['baseline']:10.1f} → {f['candidate']:10.1f}  ({f['change']:+.1%}){p}  {flag}{note}")
+        regressions += bool(f.get("regression"))
+    if regressions:
+        print(f"→ {regressions} regression(s) flagged.")
+        sys.exit(1)
+    print("→ No regression flagged.")
+
+
+if __name__ == "__main__":
+    main()
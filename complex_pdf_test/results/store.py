@@ -0,0 +1,219 @@
+"""
+Local results store: one JSON file per benchmark / scale-test run.
+
+A run records where it was measured (environment, index settings hash, corpus size),
+the raw latency samples and, for ingestion runs, per-batch timings. Charts and
+regression checks (compare.py) are computed from these files, never from constants.
+"""
+
+import hashlib
+import json
+import platform
+import re
+import socket
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_STORE_DIR = Path(__file__).resolve().parent / "runs"
+
+
+@dataclass
+class BenchmarkRun:
+    """One measured run (search latency benchmark or scale test)."""
+    run_id: str
+    kind: str  # "keyword_latency" | "hybrid_latency" | "scale_test" | ...
+    label: str
+    created_at: str
+    index_uid: str
+    corpus_size: int | None
+    settings_hash: str | None
+    environment: dict[str, Any] = field(default_factory=dict)
+    latencies_ms: list[float] = field(default_factory=list)
+    latency: dict[str, float] = field(default_factory=dict)
+    ingestion: dict[str, Any] | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile on an already sorted list (same rule as the original benchmarks)."""
+    if not sorted_values:
+        return 0.0
+    idx = int(len(sorted_values) * q)
+    return sorted_values[idx] if idx < len(sorted_values) else sorted_values[-1]
+
+
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    """Mean / p50 / p95 / p99 / min / max of latency samples (ms)."""
+    if not latencies_ms:
+        return {}
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": values[len(values) // 2],
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "min": values[0],
+        "max": values[-1],
+    }
+
+
+def ingestion_summary(
+    num_docs: int,
+    total_seconds: float,
+    batch_seconds: list[float] | None = None,
+    batch_docs: list[int] | None = None,
+) -> dict[str, Any]:
+    """Ingestion block for a run: totals, throughput and optional per-batch wall-clock times / sizes."""
+    out: dict[str, Any] = {
+        "docs": num_docs,
+        "seconds": total_seconds,
+        "docs_per_s": num_docs / total_seconds if total_seconds > 0 else 0.0,
+    }
+    if batch_seconds:
+        out["batch_seconds"] = list(batch_seconds)
+    if batch_docs:
+        out["batch_docs"] = list(batch_docs)
+    return out
+
+
+def _strip_secrets(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_secrets(v) for k, v in value.items() if k != "apiKey"}
+    if isinstance(value, list):
+        return [_strip_secrets(v) for v in value]
+    return value
+
+
+def settings_hash(index_settings: dict[str, Any]) -> str:
+    """Stable short hash of index settings (API keys removed), to tell config changes apart."""
+    canonical = json.dumps(_strip_secrets(index_settings), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def collect_environment(client=None) -> dict[str, Any]:
+    """Host, Python, git commit and (if a client is given) Meilisearch server version."""
+    env: dict[str, Any] = {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "git_commit": _git_commit(),
+    }
+    if client is not None:
+        try:
+            version = client.get_version()
+            env["meilisearch_version"] = version.get("pkgVersion") or version.get("version")
+        except Exception as e:  # version is informative only
+            env["meilisearch_version"] = None
+            env["meilisearch_version_error"] = str(e)
+    return env
+
+
+def describe_index(client, index_uid: str) -> tuple[str | None, int | None]:
+    """Return (settings_hash, number_of_documents) for a live index; (None, None) on failure."""
+    index = client.index(index_uid)
+    try:
+        s_hash = settings_hash(index.get_settings())
+    except Exception:
+        s_hash = None
+    try:
+        stats = index.get_stats()
+        corpus_size = getattr(stats, "number_of_documents", None)
+        if corpus_size is None and isinstance(stats, dict):
+            corpus_size = stats.get("numberOfDocuments")
+    except Exception:
+        corpus_size = None
+    return s_hash, corpus_size
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]+", "-", text).strip("-").lower() or "run"
+
+
+def new_run(
+    kind: str,
+    *,
+    index_uid: str,
+    label: str = "",
+    client=None,
+    corpus_size: int | None = None,
+    index_settings_hash: str | None = None,
+    latencies_ms: list[float] | None = None,
+    ingestion: dict[str, Any] | None = None,
+    extra: dict[str, Any] | None = None,
+) -> BenchmarkRun:
+    """Build a run record; environment, settings hash and corpus size are read from the server when a client is given."""
+    now = datetime.now(timezone.utc)
+    if client is not None and (index_settings_hash is None or corpus_size is None):
+        live_hash, live_size = describe_index(client, index_uid)
+        index_settings_hash = index_settings_hash or live_hash
+        corpus_size = corpus_size if corpus_size is not None else live_size
+    samples = list(latencies_ms or [])
+    run_id = f"{now:%Y%m%dT%H%M%S}-{_slug(kind)}" + (f"-{_slug(label)}" if label else "")
+    return BenchmarkRun(
+        run_id=run_id,
+        kind=kind,
+        label=label,
+        created_at=now.isoformat(timespec="seconds"),
+        index_uid=index_uid,
+        corpus_size=corpus_size,
+        settings_hash=index_settings_hash,
+        environment=collect_environment(client),
+        latencies_ms=samples,
+        latency=latency_summary(samples),
+        ingestion=ingestion,
+        extra=dict(extra or {}),
+    )
+
+
+def save_run(run: BenchmarkRun, store_dir: str | Path = DEFAULT_STORE_DIR) -> Path:
+    """Write a run to <store_dir>/<run_id>.json and return the path."""
+    store = Path(store_dir)
+    store.mkdir(parents=True, exist_ok=True)
+    path = store / f"{run.run_id}.json"
+    path.write_text(json.dumps(asdict(run), ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_run(run_id_or_path: str | Path, store_dir: str | Path = DEFAULT_STORE_DIR) -> BenchmarkRun:
+    """Load a run by id (file stem in the store) or by explicit path."""
+    path = Path(run_id_or_path)
+    if not path.is_file():
+        path = Path(store_dir) / f"{run_id_or_path}.json"
+    if not path.is_file():
+        raise FileNotFoundError(f"No run {run_id_or_path!r} in {store_dir}")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    run = BenchmarkRun(**data)
+    if run.latencies_ms and not run.latency:
+        run.latency = latency_summary(run.latencies_ms)
+    return run
+
+
+def list_runs(store_dir: str | Path = DEFAULT_STORE_DIR, kind: str | None = None) -> list[BenchmarkRun]:
+    """All runs in the store (oldest first), optionally filtered by kind."""
+    store = Path(store_dir)
+    if not store.is_dir():
+        return []
+    runs = [load_run(p, store) for p in sorted(store.glob("*.json"))]
+    if kind is not None:
+        runs = [r for r in runs if r.kind == kind]
+    return sorted(runs, key=lambda r: r.created_at)
@@ -1,6 +1,23 @@
 """
 Run the full PDF pipeline: parse -> normalize -> chunk -> build -> output JSON.
 Optionally load the resulting chunks into Meilisearch.
+
+With --memory-budget-mb the PDF is converted in page ranges sized to fit the budget
+(estimated RSS growth per page, refined after each part); each part is normalized and
+chunked before the next one is parsed, so only the built documents accumulate. A part
+that cannot fit even at one page is refused (exit code 75, EX_TEMPFAIL: retry later or
+on a bigger worker).
+
+With --structured the Docling document tree is read directly into typed elements
+(text, list items, tables, captions, headings, each with its page) and grouped into
+chunks by section, instead of exporting markdown and re-splitting it on headers.
+
+Before parsing, a few pages are probed (text layer, images, ruled pages) and a Docling
+profile is chosen: born-digital PDFs skip OCR and use the fast table model, scanned ones
+get OCR (--parse-profile forces one; "default" is Docling's own configuration).
+
+With --parse-server URL the PDF is parsed by a running parse_server (models already
+loaded) and only normalize / chunk / build run here.
 """
 
 import json
@@ -12,10 +29,37 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from complex_pdf_test.pipeline import parse_pdf, normalize_text, chunk_text, build_documents
+from complex_pdf_test.pipeline import (
+    build_documents,
+    chunk_elements,
+    chunk_text,
+    count_pages,
+    create_converter,
+    choose_profile,
+    normalize_elements,
+    normalize_text,
+    parse_pdf,
+    parse_pdf_elements,
+    PROFILES,
+    ParseProfile,
+)
+from complex_pdf_test.pipeline.parse_server import ParseClient
 from complex_pdf_test.load import load_chunks_into_meilisearch
+from complex_pdf_test.instrumentation import (
+    MemoryBudget,
+    MemoryBudgetExceeded,
+    PeakRss,
+    add_instrumentation_args,
+    get_registry,
+    setup_instrumentation,
+    span,
+)
 
 LOG_PREFIX = "[run_pipeline]"
+# Initial estimate of RSS growth per page while Docling converts (page images + layout / table
+# models); replaced by the observed growth after each part
+DEFAULT_MB_PER_PAGE = 60.0
+EX_TEMPFAIL = 75
 
 
 def run_pipeline(
@@ -25,10 +69,19 @@ def run_pipeline(
     load_to_meilisearch: bool = False,
     max_chars: int = 1200,
     overlap_chars: int = 120,
+    memory_budget: MemoryBudget | None = None,
+    mb_per_page: float = DEFAULT_MB_PER_PAGE,
+    structured: bool = False,
+    parse_profile: str = "auto",
+    parse_server: str | None = None,
 ) -> list[dict]:
     """
     Parse PDF, normalize, chunk, build documents. Optionally write JSON and/or load to Meilisearch.
     Returns the list of chunk documents (list of dicts).
+    With memory_budget, parse page ranges that fit the budget (raises MemoryBudgetExceeded otherwise).
+    With structured, chunk Docling's elements directly (pages and element types filled in).
+    parse_profile: "auto" (probe the PDF) or a name from PROFILES.
+    With parse_server (URL of pipeline/parse_server.py), parsing runs there; memory_budget does not apply.
     """
     pdf_path = Path(pdf_path)
     if not pdf_path.is_file():
@@ -36,12 +89,47 @@ def run_pipeline(
 
     total_start = time.perf_counter()
     print(f"{LOG_PREFIX} Starting pipeline for {pdf_path.name}")
-    print(f"{LOG_PREFIX} --- Step 1/4: Parse PDF (Docling) ---")
+    with span("pipeline", source_file=pdf_path.name, input_bytes=pdf_path.stat().st_size, structured=structured) as root:
+        if parse_server:
+            documents = _build_remote(pdf_path, max_chars, overlap_chars, structured, parse_profile, parse_server)
+        else:
+            profile = _resolve_profile(pdf_path, parse_profile)
+            root.set(parse_profile=profile.name)
+            if memory_budget is None:
+                documents = _build_whole(pdf_path, max_chars, overlap_chars, structured, profile)
+            else:
+                documents = _build_in_parts(pdf_path, max_chars, overlap_chars, memory_budget, mb_per_page, structured, profile)
+        _write_and_load(documents, output_json_path, load_to_meilisearch)
+        root.set(documents=len(documents))
+
+    elapsed = time.perf_counter() - total_start
+    print(f"{LOG_PREFIX} Pipeline finished in {elapsed:.1f}s total")
+    return documents
+
+
+def _resolve_profile(pdf_path: Path, name: str) -> ParseProfile:
+    if name != "auto":
+        print(f"{LOG_PREFIX} Parse profile '{name}' (forced)")
+        return PROFILES[name]
+    with span("probe") as s:
+        profile, probe = choose_profile(pdf_path)
+        s.set(profile=profile.name, **({"kind": probe.kind, "pages": probe.pages} if probe else {}))
+    return profile
 
-    doc_id, raw_md = parse_pdf(pdf_path)
+
+def _build_whole(pdf_path: Path, max_chars: int, overlap_chars: int, structured: bool, profile: ParseProfile) -> list[dict]:
+    print(f"{LOG_PREFIX} Initializing Docling (profile '{profile.name}', first run may download models)...")
+    converter = create_converter(profile)
+    if structured:
+        return _build_structured(pdf_path, max_chars, overlap_chars, converter=converter)
+    print(f"{LOG_PREFIX} --- Step 1/4: Parse PDF (Docling) ---")
+    with span("parse", input_bytes=pdf_path.stat().st_size) as s:
+        doc_id, raw_md = parse_pdf(pdf_path, converter=converter)
+        s.set(output_chars=len(raw_md))
 
     print(f"{LOG_PREFIX} --- Step 2/4: Normalize text ---")
     normalized = normalize_text(raw_md)
+    del raw_md
 
     print(f"{LOG_PREFIX} --- Step 3/4: Chunk (max_chars={max_chars}, overlap={overlap_chars}) ---")
     chunks = chunk_text(
@@ -52,22 +140,141 @@ def run_pipeline(
         overlap_chars=overlap_chars,
         split_on_headers=True,
     )
-    documents = build_documents(chunks)
+    del normalized
+    with span("build_documents", chunks=len(chunks)):
+        documents = build_documents(chunks)
     print(f"{LOG_PREFIX} --- Step 4/4: Build documents → {len(documents)} docs ---")
+    return documents
+
+
+def _build_remote(
+    pdf_path: Path, max_chars: int, overlap_chars: int, structured: bool, parse_profile: str, url: str
+) -> list[dict]:
+    print(f"{LOG_PREFIX} --- Step 1/4: Parse PDF on {url} ---")
+    with span("parse", input_bytes=pdf_path.stat().st_size, remote=True) as s, ParseClient(url) as client:
+        res = client.parse(pdf_path, format="elements" if structured else "markdown", profile=parse_profile)
+        s.set(profile=res.profile, queue_ms=res.queue_ms, parse_ms=res.parse_ms)
+    print(f"{LOG_PREFIX} Parsed with profile '{res.profile}': queue {res.queue_ms:.0f} ms, parse {res.parse_ms:.0f} ms")
+
+    if structured:
+        chunks = chunk_elements(normalize_elements(res.elements), res.doc_id, max_chars=max_chars, overlap_chars=overlap_chars)
+    else:
+        chunks = chunk_text(
+            normalize_text(res.markdown or ""),
+            doc_id=res.doc_id,
+            source_file=pdf_path.name,
+            max_chars=max_chars,
+            overlap_chars=overlap_chars,
+            split_on_headers=True,
+        )
+    with span("build_documents", chunks=len(chunks)):
+        documents = build_documents(chunks)
+    print(f"{LOG_PREFIX} --- Build documents → {len(documents)} docs ---")
+    return documents
 
+
+def _build_structured(
+    pdf_path: Path,
+    max_chars: int,
+    overlap_chars: int,
+    *,
+    converter=None,
+    page_range: tuple[int, int] | None = None,
+    start_index: int = 0,
+) -> list[dict]:
+    print(f"{LOG_PREFIX} --- Step 1/4: Parse PDF into elements (Docling) ---")
+    pages = {"first_page": page_range[0], "last_page": page_range[1]} if page_range else {}
+    with span("parse", input_bytes=pdf_path.stat().st_size, **pages) as s:
+        doc_id, elements = parse_pdf_elements(pdf_path, converter=converter, page_range=page_range)
+        s.set(elements=len(elements), output_chars=sum(len(e.text) for e in elements))
+
+    print(f"{LOG_PREFIX} --- Step 2/4: Normalize elements ---")
+    elements = normalize_elements(elements)
+
+    print(f"{LOG_PREFIX} --- Step 3/4: Chunk elements (max_chars={max_chars}, overlap={overlap_chars}) ---")
+    chunks = chunk_elements(elements, doc_id, max_chars=max_chars, overlap_chars=overlap_chars, start_index=start_index)
+    del elements
+    with span("build_documents", chunks=len(chunks)):
+        documents = build_documents(chunks)
+    print(f"{LOG_PREFIX} --- Step 4/4: Build documents → {len(documents)} docs ---")
+    return documents
+
+
+def _build_in_parts(
+    pdf_path: Path,
+    max_chars: int,
+    overlap_chars: int,
+    budget: MemoryBudget,
+    mb_per_page: float,
+    structured: bool,
+    profile: ParseProfile,
+) -> list[dict]:
+    """
+    Parse → normalize → chunk → build one page range at a time; only documents accumulate.
+    Sections that cross a part boundary are chunked as two sections.
+    """
+    total_pages = count_pages(pdf_path)
+    print(f"{LOG_PREFIX} Memory budget {budget.limit_bytes / 2**20:.0f} MB, {total_pages} pages")
+    budget.admit("parse.init_converter", 0)
+    converter = create_converter(profile)
+    doc_id = pdf_path.stem
+    per_page = mb_per_page * 2**20
+    documents: list[dict] = []
+    first = 1
+    while first <= total_pages:
+        pages = max(1, min(total_pages - first + 1, int(budget.headroom_bytes() // per_page)))
+        last = first + pages - 1
+        budget.admit(f"parse pages {first}-{last}", int(pages * per_page))
+        print(f"{LOG_PREFIX} --- Part: pages {first}-{last} of {total_pages} (~{per_page / 2**20:.0f} MB/page) ---")
+        if structured:
+            with PeakRss() as rss:
+                documents.extend(_build_structured(
+                    pdf_path, max_chars, overlap_chars,
+                    converter=converter, page_range=(first, last), start_index=len(documents),
+                ))
+            per_page = max((rss.peak_bytes - rss.start_bytes) / pages, 2**20)
+        else:
+            with span("parse", input_bytes=pdf_path.stat().st_size, first_page=first, last_page=last) as s, PeakRss() as rss:
+                _, raw_md = parse_pdf(pdf_path, converter=converter, page_range=(first, last))
+                s.set(output_chars=len(raw_md))
+            # The first part also pays for loading the models, so early estimates err on the safe side
+            per_page = max((rss.peak_bytes - rss.start_bytes) / pages, 2**20)
+
+            normalized = normalize_text(raw_md)
+            del raw_md
+            chunks = chunk_text(
+                normalized,
+                doc_id=doc_id,
+                source_file=pdf_path.name,
+                max_chars=max_chars,
+                overlap_chars=overlap_chars,
+                split_on_headers=True,
+                start_index=len(documents),
+            )
+            del normalized
+            with span("build_documents", chunks=len(chunks)):
+                documents.extend(build_documents(chunks))
+            del chunks
+        first = last + 1
+    print(f"{LOG_PREFIX} Built {len(documents)} docs from {total_pages} pages")
+    return documents
+
+
+def _write_and_load(documents: list[dict], output_json_path: str | Path | None, load_to_meilisearch: bool) -> None:
     if output_json_path is not None:
         out = Path(output_json_path)
         print(f"{LOG_PREFIX} Writing JSON to {out}...")
-        out.write_text(json.dumps(documents, ensure_ascii=False, indent=2), encoding="utf-8")
+        with span("write_json", documents=len(documents)) as s:
+            # Stream to the file rather than building the whole JSON string in memory
+            with out.open("w", encoding="utf-8") as fh:
+                json.dump(documents, fh, ensure_ascii=False, indent=2)
+            s.set(output_bytes=out.stat().st_size)
         print(f"{LOG_PREFIX} Wrote {out.stat().st_size / 1024:.1f} KB")
 
     if load_to_meilisearch:
         print(f"{LOG_PREFIX} --- Load to Meilisearch (index pdf_chunks) ---")
-        load_chunks_into_meilisearch(documents)
-
-    elapsed = time.perf_counter() - total_start
-    print(f"{LOG_PREFIX} Pipeline finished in {elapsed:.1f}s total")
-    return documents
+        with span("load", documents=len(documents)):
+            load_chunks_into_meilisearch(documents)
 
 
 def main() -> None:
@@ -76,21 +283,44 @@ def main() -> None:
     parser.add_argument("pdf", type=Path, help="Path to PDF file")
     parser.add_argument("-o", "--output", type=Path, default=None, help="Output JSON path (default: next to PDF)")
     parser.add_argument("--load", action="store_true", help="Load chunks into Meilisearch after building")
-    parser.add_argument("--max-chars", type=int, default=1200, help="Max characters per chunk")
+    parser.add_argument("--max-chars", type=int, default=1200, help="Max characters per chunk (audit/chunking_sweep.py compares values)")
     parser.add_argument("--overlap", type=int, default=120, help="Overlap between chunks")
+    parser.add_argument("--memory-budget-mb", type=float, default=None, help="RSS budget: parse in page ranges that fit, refuse otherwise")
+    parser.add_argument("--mb-per-page", type=float, default=DEFAULT_MB_PER_PAGE, help="Initial RSS estimate per page in budget mode")
+    parser.add_argument("--budget-wait", type=float, default=0.0, help="Seconds to wait for memory to be released before refusing")
+    parser.add_argument("--structured", action="store_true", help="Chunk Docling's document elements (typed, with pages) instead of markdown")
+    parser.add_argument(
+        "--parse-profile", choices=["auto", *PROFILES], default="auto",
+        help="Docling configuration: auto (probe the PDF) or a fixed profile",
+    )
+    parser.add_argument("--parse-server", default=None, metavar="URL", help="Parse on a running parse_server (e.g. http://127.0.0.1:8090)")
+    add_instrumentation_args(parser)
     args = parser.parse_args()
+    setup_instrumentation(args)
+    budget = MemoryBudget.from_mb(args.memory_budget_mb, wait_s=args.budget_wait) if args.memory_budget_mb else None
 
     output_path = args.output
     if output_path is None:
         output_path = args.pdf.with_suffix(".chunks.json")
 
-    docs = run_pipeline(
-        args.pdf,
-        output_json_path=output_path,
-        load_to_meilisearch=args.load,
-        max_chars=args.max_chars,
-        overlap_chars=args.overlap,
-    )
+    try:
+        docs = run_pipeline(
+            args.pdf,
+            output_json_path=output_path,
+            load_to_meilisearch=args.load,
+            max_chars=args.max_chars,
+            overlap_chars=args.overlap,
+            memory_budget=budget,
+            mb_per_page=args.mb_per_page,
+            structured=args.structured,
+            parse_profile=args.parse_profile,
+            parse_server=args.parse_server,
+        )
+    except MemoryBudgetExceeded as e:
+        print(f"{LOG_PREFIX} Refused: {e}", file=sys.stderr)
+        sys.exit(EX_TEMPFAIL)
+    finally:
+        get_registry().flush()
     print(f"Chunks: {len(docs)}")
     print(f"Output: {output_path}")
     if args.load:
@@ -0,0 +1,54 @@
+"""Shared helpers for scale-test scripts: client, task waiting, timestamped logging."""
+
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import meilisearch
+from config import load_settings
+from complex_pdf_test.load.load_to_meilisearch import TaskFailedError
+
+# Per-batch indexation with embedder can take minutes (Mistral API). Default SDK timeout is 5s.
+TASK_WAIT_TIMEOUT_MS = 30 * 60 * 1000  # 30 min per batch
+
+# Logging: elapsed seconds since script start
+_script_start = time.perf_counter()
+
+
+def _elapsed() -> float:
+    return time.perf_counter() - _script_start
+
+
+def log(msg: str) -> None:
+    print(f"[{_elapsed():.1f}s] [scale_test] {msg}", flush=True)
+
+
+def get_client() -> meilisearch.Client:
+    settings = load_settings()
+    if settings.meilisearch_api_key:
+        return meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key)
+    return meilisearch.Client(settings.meilisearch_url)
+
+
+def _task_uid(task) -> int:
+    uid = getattr(task, "task_uid", None) or getattr(task, "uid", None)
+    if uid is None and hasattr(task, "task_uid"):
+        uid = task.task_uid
+    if uid is None and isinstance(task, dict):
+        uid = task.get("taskUid") or task.get("uid")
+    if uid is None:
+        raise RuntimeError(f"Task UID not found in response: {task}")
+    return uid
+
+
+def wait_task(client: meilisearch.Client, task, timeout_in_ms: int = TASK_WAIT_TIMEOUT_MS, *, check: bool = True):
+    """Wait for a task and return it; raise TaskFailedError if it did not succeed, unless check=False."""
+    task_uid = _task_uid(task)
+    done = client.wait_for_task(task_uid, timeout_in_ms=timeout_in_ms)
+    if check and done.status != "succeeded":
+        raise TaskFailedError(done)
+    return done
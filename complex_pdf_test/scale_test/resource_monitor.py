@@ -0,0 +1,392 @@
+"""
+Index footprint and Meilisearch server resources, sampled in a background thread.
+
+Each sample combines:
+  - GET /stats: databaseSize, usedDatabaseSize, and for the index numberOfDocuments,
+    numberOfEmbeddings (fieldDistribution is kept from the last sample only),
+  - the local Meilisearch process (/proc/<pid>, found by name or given with --meili-pid):
+      status  VmRSS split into RssAnon (heap: indexing buffers, HNSW search state)
+              and RssFile (file-backed pages: the memory-mapped LMDB environment),
+      io      read_bytes / write_bytes that actually hit the block device,
+      stat    major page faults (a mmap'd page read from disk) and CPU time,
+  - with --db-path (the data.ms directory), the bytes of its files currently held in the
+    page cache (mincore), whether or not the process has touched them.
+
+Meilisearch serves reads from LMDB through mmap, so "the index is served from memory" is
+visible as: RssFile / cached bytes close to usedDatabaseSize, and few major faults during
+the search phase. When the database outgrows the RAM, cached bytes stay flat while the
+database grows, and major faults and read_bytes rise with search latency.
+
+/proc/<pid>/io needs the same user as Meilisearch (or root). With Meilisearch in
+a container, run this on the Docker host (Linux), not inside another container; on macOS
+only the /stats part is available. Missing readings are None.
+
+Usage (from project root), while something else ingests:
+  uv run python complex_pdf_test/scale_test/resource_monitor.py --index pdf_chunks_sweep --duration 120
+  uv run python complex_pdf_test/scale_test/resource_monitor.py --index pdf_chunks_sweep --db-path ./meili_data/data.ms
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+DEFAULT_INTERVAL_S = 2.0
+PROCESS_NAME = "meilisearch"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def find_pid(name: str = PROCESS_NAME) -> int | None:
+    """Pid of the first process whose command name is `name` (None without procfs / not found)."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    for entry in sorted(proc.iterdir(), key=lambda p: p.name):
+        if not entry.name.isdigit():
+            continue
+        try:
+            if (entry / "comm").read_text().strip() == name:
+                return int(entry.name)
+        except OSError:
+            continue
+    return None
+
+
+def _read_kv(path: Path, keys: tuple[str, ...], scale: int = 1) -> dict[str, int]:
+    out: dict[str, int] = {}
+    try:
+        with path.open() as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                if key in keys:
+                    out[key] = int(value.split()[0]) * scale
+    except (OSError, ValueError):
+        pass
+    return out
+
+
+def read_process(pid: int) -> dict[str, Any]:
+    """RSS split, disk I/O, major faults and CPU seconds of one process (None where unreadable)."""
+    base = Path(f"/proc/{pid}")
+    status = _read_kv(base / "status", ("VmRSS", "VmHWM", "RssAnon", "RssFile", "RssShmem"), 1024)
+    io = _read_kv(base / "io", ("read_bytes", "write_bytes"))
+    major_faults = cpu_s = None
+    try:
+        # Fields after the ")" closing comm: state is field 3, majflt 12, utime 14, stime 15
+        fields = (base / "stat").read_text().rsplit(")", 1)[1].split()
+        major_faults = int(fields[9])
+        cpu_s = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    except (OSError, IndexError, ValueError):
+        pass
+    return {
+        "rss_bytes": status.get("VmRSS"),
+        "rss_hwm_bytes": status.get("VmHWM"),
+        "rss_anon_bytes": status.get("RssAnon"),
+        "rss_file_bytes": status.get("RssFile"),
+        "read_bytes": io.get("read_bytes"),
+        "write_bytes": io.get("write_bytes"),
+        "major_faults": major_faults,
+        "cpu_s": cpu_s,
+    }
+
+
+def _libc():
+    name = ctypes.util.find_library("c")
+    if not name:
+        return None
+    libc = ctypes.CDLL(name, use_errno=True)
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+    libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+    return libc
+
+
+_LIBC = _libc() if sys.platform.startswith("linux") else None
+
+
+def cached_bytes(path: Path) -> int | None:
+    """Bytes of `path` (a file, or every file under a directory) resident in the page cache."""
+    if _LIBC is None:
+        return None
+    files = [path] if path.is_file() else [p for p in path.rglob("*") if p.is_file()]
+    total = 0
+    for file in files:
+        try:
+            size = file.stat().st_size
+            fd = os.open(file, os.O_RDONLY) if size else None
+        except OSError:
+            return None
+        if fd is None:
+            continue
+        try:
+            addr = _LIBC.mmap(None, size, 0x1, 0x01, fd, 0)  # PROT_READ, MAP_SHARED
+            if addr in (None, ctypes.c_void_p(-1).value):
+                return None
+            try:
+                pages = (size + _PAGE_SIZE - 1) // _PAGE_SIZE
+                vec = (ctypes.c_ubyte * pages)()
+                if _LIBC.mincore(addr, size, vec) != 0:
+                    return None
+                data = bytes(vec)
+                total += (pages - data.count(0)) * _PAGE_SIZE  # only bit 0 (resident) is defined
+            finally:
+                _LIBC.munmap(addr, size)
+        finally:
+            os.close(fd)
+    return total
+
+
+def read_stats(client, index_uid: str) -> dict[str, Any]:
+    """Database size and the index's document / embedding counts and field distribution (GET /stats)."""
+    stats = client.get_all_stats()
+    idx = (stats.get("indexes") or {}).get(index_uid, {})
+    return {
+        "database_size_bytes": stats.get("databaseSize"),
+        "used_database_size_bytes": stats.get("usedDatabaseSize"),
+        "number_of_documents": idx.get("numberOfDocuments"),
+        "number_of_embeddings": idx.get("numberOfEmbeddings"),
+        "number_of_embedded_documents": idx.get("numberOfEmbeddedDocuments"),
+        "is_indexing": idx.get("isIndexing"),
+        "field_distribution": idx.get("fieldDistribution") or {},
+    }
+
+
+def vector_dimensions(client, index_uid: str, embedder: str | None = None) -> int | None:
+    """Dimensions of the stored vectors, read from one document with retrieveVectors (None if none)."""
+    try:
+        page = client.http.post(f"indexes/{index_uid}/documents/fetch", body={"limit": 1, "retrieveVectors": True})
+    except Exception:
+        return None
+    for doc in page.get("results", []):
+        vectors = doc.get("_vectors") or {}
+        for name, entry in vectors.items():
+            if embedder and name != embedder:
+                continue
+            embeddings = entry.get("embeddings") if isinstance(entry, dict) else entry
+            if embeddings and isinstance(embeddings[0], (int, float)):
+                return len(embeddings)
+            if embeddings:
+                return len(embeddings[0])
+    return None
+
+
+def _delta(first: dict, last: dict, key: str) -> float | None:
+    a, b = first.get(key), last.get(key)
+    return b - a if a is not None and b is not None else None
+
+
+def _peak(samples: list[dict], key: str) -> int | None:
+    values = [s[key] for s in samples if s.get(key) is not None]
+    return max(values) if values else None
+
+
+def _ratio(a: float | None, b: float | None) -> float | None:
+    return a / b if a is not None and b else None
+
+
+class ResourceMonitor:
+    """
+    Samples read_stats + read_process (+ cached_bytes) every interval_s while running:
+
+        with ResourceMonitor(client, "pdf_chunks_sweep") as mon:
+            mon.phase("ingest")
+            ...
+            mon.phase("search")
+            ...
+        mon.summary(phases=["search"], vector_dimensions=1024)
+
+    Samples are labelled with the current phase; each phase change takes a sample at once,
+    so short phases have a start reading.
+    """
+
+    def __init__(
+        self,
+        client,
+        index_uid: str,
+        *,
+        pid: int | None = None,
+        db_path: Path | None = None,
+        interval_s: float = DEFAULT_INTERVAL_S,
+        process_name: str = PROCESS_NAME,
+    ):
+        self.client = client
+        self.index_uid = index_uid
+        self.pid = pid if pid is not None else find_pid(process_name)
+        self.db_path = Path(db_path) if db_path else None
+        self.interval_s = interval_s
+        self.samples: list[dict[str, Any]] = []
+        self.field_distribution: dict[str, int] = {}
+        self._phase = "idle"
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> dict[str, Any]:
+        s: dict[str, Any] = {"t": round(time.perf_counter() - self._t0, 3), "phase": self._phase}
+        try:
+            s.update(read_stats(self.client, self.index_uid))
+            self.field_distribution = s.pop("field_distribution")
+        except Exception as e:  # keep sampling the process when /stats is briefly unavailable
+            s["stats_error"] = str(e)
+        if self.pid is not None:
+            s.update(read_process(self.pid))
+        if self.db_path is not None:
+            s["db_cached_bytes"] = cached_bytes(self.db_path)
+        with self._lock:
+            self.samples.append(s)
+        return s
+
+    def phase(self, name: str) -> None:
+        self._phase = name
+        self.sample()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def start(self) -> "ResourceMonitor":
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._loop, name="resource-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+
+    def __enter__(self) -> "ResourceMonitor":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def summary(self, *, phases: list[str] | None = None, vector_dimensions: int | None = None) -> dict[str, Any]:
+        """
+        Peaks and deltas per phase, plus the footprint at the last selected sample scaled by
+        documents, embeddings and vector dimensions.
+        """
+        with self._lock:
+            samples = [s for s in self.samples if phases is None or s["phase"] in phases]
+        if not samples:
+            return {}
+        last = samples[-1]
+        by_phase: dict[str, dict[str, Any]] = {}
+        for name in dict.fromkeys(s["phase"] for s in samples):
+            part = [s for s in samples if s["phase"] == name]
+            by_phase[name] = {
+                "samples": len(part),
+                "seconds": part[-1]["t"] - part[0]["t"],
+                "rss_peak_bytes": _peak(part, "rss_bytes"),
+                "rss_anon_peak_bytes": _peak(part, "rss_anon_bytes"),
+                "rss_file_peak_bytes": _peak(part, "rss_file_bytes"),
+                "db_cached_peak_bytes": _peak(part, "db_cached_bytes"),
+                "read_bytes": _delta(part[0], part[-1], "read_bytes"),
+                "write_bytes": _delta(part[0], part[-1], "write_bytes"),
+                "major_faults": _delta(part[0], part[-1], "major_faults"),
+                "cpu_s": _delta(part[0], part[-1], "cpu_s"),
+            }
+        docs = last.get("number_of_documents")
+        embeddings = last.get("number_of_embeddings")
+        db_size = last.get("database_size_bytes")
+        used = last.get("used_database_size_bytes")
+        vector_bytes = embeddings * vector_dimensions * 4 if embeddings and vector_dimensions else None
+        resident = last.get("db_cached_bytes")
+        if resident is None:
+            resident = last.get("rss_file_bytes")
+        return {
+            "pid": self.pid,
+            "documents": docs,
+            "embeddings": embeddings,
+            "vector_dimensions": vector_dimensions,
+            "database_size_bytes": db_size,
+            "used_database_size_bytes": used,
+            "field_distribution": self.field_distribution,
+            "bytes_per_document": _ratio(used, docs),
+            "bytes_per_embedding": _ratio(used, embeddings),
+            "bytes_per_vector_dimension": _ratio(used, embeddings * vector_dimensions if embeddings and vector_dimensions else None),
+            "raw_vector_bytes": vector_bytes,
+            "raw_vector_share": _ratio(vector_bytes, used),
+            "rss_bytes": last.get("rss_bytes"),
+            "rss_file_bytes": last.get("rss_file_bytes"),
+            "db_cached_bytes": last.get("db_cached_bytes"),
+            "resident_fraction": _ratio(resident, used),
+            "rss_per_document": _ratio(last.get("rss_bytes"), docs),
+            "phases": by_phase,
+        }
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    """One line for logs: sizes in MiB, per-document bytes, resident fraction."""
+    if not summary:
+        return "no samples"
+
+    def mib(v):
+        return f"{v / 2**20:.1f} MiB" if v is not None else "n/a"
+
+    parts = [
+        f"db {mib(summary['used_database_size_bytes'])} used / {mib(summary['database_size_bytes'])}",
+        f"{summary['bytes_per_document']:.0f} B/doc" if summary["bytes_per_document"] else "B/doc n/a",
+        f"RSS {mib(summary['rss_bytes'])} (file-backed {mib(summary['rss_file_bytes'])})",
+    ]
+    if summary["db_cached_bytes"] is not None:
+        parts.append(f"cached {mib(summary['db_cached_bytes'])}")
+    if summary["resident_fraction"] is not None:
+        parts.append(f"resident {summary['resident_fraction']:.0%} of used db")
+    if summary["raw_vector_share"] is not None:
+        parts.append(f"raw vectors {summary['raw_vector_share']:.0%} of used db")
+    return ", ".join(parts)
+
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    from complex_pdf_test.scale_test._common import get_client, log
+
+    parser = argparse.ArgumentParser(description="Sample Meilisearch /stats and process resources for an index.")
+    parser.add_argument("--index", required=True)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to sample (Ctrl-C stops early)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_S)
+    parser.add_argument("--meili-pid", type=int, default=None, help="Meilisearch pid (default: found by process name)")
+    parser.add_argument("--db-path", type=Path, default=None, help="data.ms directory, for page-cache residency")
+    parser.add_argument("--embedder", default=None, help="Embedder whose vector dimensions are reported")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="Write samples + summary JSON here")
+    args = parser.parse_args()
+
+    client = get_client()
+    monitor = ResourceMonitor(client, args.index, pid=args.meili_pid, db_path=args.db_path, interval_s=args.interval)
+    log(f"Sampling {args.index} every {args.interval:g}s for {args.duration:g}s (pid {monitor.pid or 'not found: /stats only'})")
+    monitor.start()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    monitor.stop()
+    summary = monitor.summary(vector_dimensions=vector_dimensions(client, args.index, args.embedder))
+    log(format_summary(summary))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"summary": summary, "samples": monitor.samples}, indent=2), encoding="utf-8")
+        log(f"Samples → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
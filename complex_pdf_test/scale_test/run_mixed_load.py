@@ -0,0 +1,318 @@
+"""
+Mixed read/write load: search latency while batches are embedded and indexed.
+
+run_scale_test.py ingests first and searches afterwards; in production both happen at once.
+Here a search load generator (--search-threads, optionally paced at --qps per thread) runs
+through three phases against the same index:
+
+  idle      searches only (the index holds --preload documents)
+  indexing  --docs more documents are streamed in batches (ingest_stream, same knobs as the
+            sweep: --batch-size, --max-inflight, --batch-pause to throttle) until every task
+            has finished (batches whose task failed are counted apart, ingestion.failed_*)
+  post      searches only again, for --post-s seconds
+
+Every search is recorded with its start time and latency. Afterwards the ingestion tasks'
+startedAt / finishedAt (task_timeline.py) are put on the same clock, so each sample is also
+flagged as "during task processing" or not. Server timestamps are compared with the local
+clock: run the script next to Meilisearch, or keep both clocks NTP-synchronised.
+
+Output: percentiles per phase (and indexing split into task processing / between tasks),
+a per-second series (count, p50, p95, max, errors), a chart (latency over time with the
+task processing intervals shaded and documents indexed below), and a results-store run
+(kind "mixed_load"). The p95 ratio indexing / idle is the number to watch; if it is too
+high, compare runs with --batch-pause or a lower --max-inflight.
+
+Usage (from project root):
+  uv run python complex_pdf_test/scale_test/run_mixed_load.py --preload 5000 --docs 20000
+  uv run python complex_pdf_test/scale_test/run_mixed_load.py --search-type keyword --search-threads 8 --qps 20 --batch-pause 2
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from config import load_settings
+from complex_pdf_test.load.load_to_meilisearch import pdf_index_settings
+from complex_pdf_test.results import latency_summary, new_run, save_run
+from complex_pdf_test.scale_test._common import get_client, log, wait_task
+from complex_pdf_test.scale_test.run_scale_sweep import SEARCH_TYPES, _search_params, ingest_stream
+from complex_pdf_test.scale_test.synthetic_corpus import SyntheticCorpus
+from complex_pdf_test.scale_test.task_timeline import collect_timeline, parse_timestamp
+
+INDEX_UID = "pdf_chunks_mixed"
+OUT_DIR = Path(__file__).resolve().parent / "mixed"
+PHASES = ("idle", "indexing", "post")
+
+
+class SearchLoad:
+    """Threads searching in a loop; samples are (start epoch s, latency ms, ok)."""
+
+    def __init__(self, index_uid: str, queries: list[str], params: dict, *, threads: int, qps: float | None):
+        self.index_uid = index_uid
+        self.queries = queries
+        self.params = params
+        self.threads = threads
+        self.interval_s = 1.0 / qps if qps else 0.0
+        self.samples: list[tuple[float, float, bool]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    def _run(self, seed: int) -> None:
+        index = get_client().index(self.index_uid)
+        rng = random.Random(seed)
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            q = rng.choice(self.queries)
+            started = time.time()
+            t0 = time.perf_counter()
+            try:
+                index.search(q, self.params)
+                ok = True
+            except Exception:
+                ok = False
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                self.samples.append((started, elapsed_ms, ok))
+            if self.interval_s:
+                # open loop: keep the rate even when a search was slow
+                next_at = max(next_at + self.interval_s, time.perf_counter() - self.interval_s)
+                self._stop.wait(max(0.0, next_at - time.perf_counter()))
+
+    def start(self) -> None:
+        self._workers = [threading.Thread(target=self._run, args=(i,), daemon=True, name=f"search-{i}") for i in range(self.threads)]
+        for t in self._workers:
+            t.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for t in self._workers:
+            t.join()
+
+
+def task_intervals(timeline: dict) -> list[tuple[float, float]]:
+    """(startedAt, finishedAt) of each task as epoch seconds."""
+    out = []
+    for row in timeline["tasks"]:
+        start, end = parse_timestamp(row.get("started_at")), parse_timestamp(row.get("finished_at"))
+        if start and end:
+            out.append((start.timestamp(), end.timestamp()))
+    return sorted(out)
+
+
+def classify(samples: list[tuple[float, float, bool]], ingest_start: float, ingest_end: float, intervals: list[tuple[float, float]]) -> dict[str, list[float]]:
+    """Latencies of successful searches per phase, plus indexing split by task processing."""
+    groups: dict[str, list[float]] = {name: [] for name in (*PHASES, "indexing_processing", "indexing_between_tasks")}
+    for started, ms, ok in samples:
+        if not ok:
+            continue
+        if started < ingest_start:
+            groups["idle"].append(ms)
+        elif started < ingest_end:
+            groups["indexing"].append(ms)
+            busy = any(a <= started < b for a, b in intervals)
+            groups["indexing_processing" if busy else "indexing_between_tasks"].append(ms)
+        else:
+            groups["post"].append(ms)
+    return groups
+
+
+def per_second(samples: list[tuple[float, float, bool]], t0: float) -> list[dict]:
+    buckets: dict[int, list[tuple[float, bool]]] = {}
+    for started, ms, ok in samples:
+        buckets.setdefault(int(started - t0), []).append((ms, ok))
+    series = []
+    for second in sorted(buckets):
+        values = [ms for ms, ok in buckets[second] if ok]
+        s = latency_summary(values)
+        series.append({
+            "t": second,
+            "count": len(buckets[second]),
+            "errors": sum(1 for _, ok in buckets[second] if not ok),
+            "p50": s.get("p50"),
+            "p95": s.get("p95"),
+            "max": s.get("max"),
+        })
+    return series
+
+
+def plot_mixed(report: dict, out_path: Path) -> list[Path]:
+    """Latency samples + per-second p95 over time, task processing shaded; documents indexed below."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    t0 = report["t0"]
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(11, 6), sharex=True, gridspec_kw={"height_ratios": [3, 1]})
+    xs = [s[0] - t0 for s in report["samples"] if s[2]]
+    ys = [s[1] for s in report["samples"] if s[2]]
+    ax1.scatter(xs, ys, s=3, alpha=0.3, color="C0", label="search")
+    series = [p for p in report["series"] if p["p95"] is not None]
+    ax1.plot([p["t"] + 0.5 for p in series], [p["p95"] for p in series], color="C3", label="p95 per second")
+    for i, (a, b) in enumerate(report["task_intervals"]):
+        ax1.axvspan(a - t0, b - t0, color="C1", alpha=0.15, label="task processing" if i == 0 else None)
+    for name in ("ingest_start", "ingest_end"):
+        ax1.axvline(report[name] - t0, color="k", ls="--", lw=0.8)
+    ax1.set_ylabel("Latency (ms)")
+    ax1.set_title(f"Search latency during ingestion ({report['search_type']})")
+    ax1.legend(fontsize=8, loc="upper left")
+    ax1.grid(alpha=0.3)
+
+    done = sorted((parse_timestamp(r["finished_at"]).timestamp() - t0, r["documents"] or 0)
+                  for r in report["timeline_tasks"] if r.get("finished_at"))
+    total, steps_x, steps_y = 0, [report["ingest_start"] - t0], [0]
+    for x, n in done:
+        total += n
+        steps_x.append(x)
+        steps_y.append(total)
+    ax2.step(steps_x, steps_y, where="post", color="C2")
+    ax2.set_ylabel("Docs indexed")
+    ax2.set_xlabel("Seconds since start")
+    ax2.grid(alpha=0.3)
+
+    plt.tight_layout()
+    written = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search latency during ingestion: idle / indexing / post phases.")
+    parser.add_argument("--index", default=INDEX_UID, help="Index uid (deleted first unless --keep-index)")
+    parser.add_argument("--keep-index", action="store_true")
+    parser.add_argument("--preload", type=int, default=5000, help="Documents indexed before the idle phase")
+    parser.add_argument("--docs", type=int, default=20_000, help="Documents ingested during the indexing phase")
+    parser.add_argument("--idle-s", type=float, default=20.0, help="Search-only seconds before ingestion")
+    parser.add_argument("--post-s", type=float, default=20.0, help="Search-only seconds after ingestion")
+    parser.add_argument("--search-type", choices=list(SEARCH_TYPES), default="hybrid")
+    parser.add_argument("--search-threads", type=int, default=4)
+    parser.add_argument("--qps", type=float, default=None, help="Searches/s per thread (default: back to back)")
+    parser.add_argument("--queries", type=int, default=200, help="Distinct queries in the pool")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-bytes", type=int, default=None)
+    parser.add_argument("--max-inflight", type=int, default=20)
+    parser.add_argument("--batch-pause", type=float, default=0.0, help="Seconds between batches (throttled ingestion)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    args = parser.parse_args()
+
+    run_id = time.strftime("%Y%m%dT%H%M%S")
+    corpus = SyntheticCorpus.from_seed_file(seed=args.seed)
+    stream = corpus.iter_documents()
+    queries = corpus.queries(args.queries)
+    client = get_client()
+    index = client.index(args.index)
+    if not args.keep_index:
+        log(f"Deleting index {args.index}...")
+        wait_task(client, client.delete_index(args.index), check=False)  # index_not_found on a fresh server
+    wait_task(client, index.update_settings(pdf_index_settings(load_settings())))
+    if args.preload:
+        log(f"Preloading {args.preload} documents...")
+        ingest_stream(client, index, islice(stream, args.preload), batch_size=args.batch_size, max_inflight=args.max_inflight, batch_bytes=args.batch_bytes)
+
+    load = SearchLoad(args.index, queries, _search_params(SEARCH_TYPES[args.search_type]), threads=args.search_threads, qps=args.qps)
+    t0 = time.time()
+    log(f"========== Mixed load {run_id}: {args.search_threads} search threads ({args.search_type}), {args.docs} docs ==========")
+    load.start()
+    try:
+        log(f"Phase idle ({args.idle_s:.0f}s)...")
+        time.sleep(args.idle_s)
+        log("Phase indexing...")
+        ingest_start = time.time()
+        ingestion, task_uids = ingest_stream(
+            client, index, islice(stream, args.docs), batch_size=args.batch_size, max_inflight=args.max_inflight,
+            batch_bytes=args.batch_bytes, pause_s=args.batch_pause,
+        )
+        ingest_end = time.time()
+        log(f"Ingested {ingestion['docs']} docs in {ingestion['seconds']:.1f}s ({ingestion['docs_per_s']:.1f} docs/s)")
+        log(f"Phase post ({args.post_s:.0f}s)...")
+        time.sleep(args.post_s)
+    finally:
+        load.stop()
+
+    timeline = collect_timeline(client, task_uids)
+    intervals = task_intervals(timeline)
+    samples = sorted(load.samples)
+    groups = classify(samples, ingest_start, ingest_end, intervals)
+    phases = {name: latency_summary(values) for name, values in groups.items()}
+    errors = {name: 0 for name in PHASES}
+    for started, _, ok in samples:
+        if not ok:
+            errors["idle" if started < ingest_start else "indexing" if started < ingest_end else "post"] += 1
+    for name, s in phases.items():
+        if s:
+            log(f"  {name:24}: n {s['count']:5} | p50 {s['p50']:.1f} ms | p95 {s['p95']:.1f} | p99 {s['p99']:.1f} | max {s['max']:.1f}")
+    degradation = None
+    if phases["idle"] and phases["indexing"]:
+        degradation = phases["indexing"]["p95"] / phases["idle"]["p95"]
+        log(f"p95 indexing / idle: {degradation:.2f}x  (errors per phase: {errors})")
+
+    report = {
+        "run_id": run_id,
+        "index": args.index,
+        "search_type": args.search_type,
+        "t0": t0,
+        "ingest_start": ingest_start,
+        "ingest_end": ingest_end,
+        "phases": phases,
+        "errors": errors,
+        "p95_degradation": degradation,
+        "ingestion": ingestion,
+        "series": per_second(samples, t0),
+        "task_intervals": intervals,
+        "timeline_tasks": timeline["tasks"],
+        "samples": samples,
+    }
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    out = args.out_dir / f"mixed-{run_id}"
+    out.with_suffix(".json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    log(f"Report → {out.with_suffix('.json')}")
+    for path in plot_mixed(report, out):
+        log(f"Chart → {path}")
+
+    run = new_run(
+        "mixed_load",
+        index_uid=args.index,
+        label=args.label or f"{args.search_type} x{args.search_threads}, pause {args.batch_pause:g}s",
+        client=client,
+        latencies_ms=groups["indexing"],
+        ingestion=ingestion,
+        extra={
+            "phases": phases,
+            "latencies_by_phase": groups,
+            "errors": errors,
+            "p95_degradation": degradation,
+            "search_type": args.search_type,
+            "search_threads": args.search_threads,
+            "qps_per_thread": args.qps,
+            "preload": args.preload,
+            "batch_size": args.batch_size,
+            "batch_bytes": args.batch_bytes,
+            "max_inflight": args.max_inflight,
+            "batch_pause_s": args.batch_pause,
+            "series": report["series"],
+        },
+    )
+    log(f"Saved run {run.run_id} → {save_run(run)}")
+    log("========== Mixed load end ==========")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Multi-scale sweep: grow one index through several corpus sizes (e.g. 1k → 10k → 100k → 1M)
+with a streaming synthetic corpus, and measure each scale point.
+
+At each scale point:
+  - INGESTION: the delta since the previous point is generated lazily and streamed to
+    Meilisearch batch by batch (never held in memory); throughput = documents of succeeded
+    tasks / time until every task of the delta finished (failed batches are reported apart,
+    ingestion.failed_*). In-flight tasks are bounded (--max-inflight).
+  - SERVER PHASES: queue wait / processing / progress trace of the delta's tasks
+    (task_timeline.py), to see whether time goes to embedding or indexing.
+  - INDEX SIZE: databaseSize / usedDatabaseSize from /stats, documents in the index.
+  - SEARCH: keyword, hybrid and semantic latency over a generated query set
+    (mean / p50 / p95 / p99 per search type).
+  - RESOURCES: resource_monitor.py samples /stats and the Meilisearch process through the
+    ingestion and search phases (RSS anon / file-backed, page-cache residency of data.ms
+    with --db-path, disk I/O, major faults, CPU), with bytes per document and per vector
+    dimension at the point's corpus size.
+
+Each point is saved to the results store (kind "scale_sweep"); a sweep summary JSON and a
+latency / throughput / footprint vs corpus size chart are written to --out-dir.
+
+Usage (from project root):
+  uv run python complex_pdf_test/scale_test/run_scale_sweep.py --scales 1000,10000,100000
+  uv run python complex_pdf_test/scale_test/run_scale_sweep.py --scales 1000,10000 --search-types keyword
+  uv run python complex_pdf_test/scale_test/run_scale_sweep.py --scales 10000,100000 --db-path ./meili_data/data.ms
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter, deque
+from itertools import islice
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from config import load_settings
+from complex_pdf_test.load.load_to_meilisearch import pdf_index_settings
+from complex_pdf_test.load.serialize import NDJSON, byte_batches
+from complex_pdf_test.results import ingestion_summary, latency_summary, new_run, save_run
+from complex_pdf_test.scale_test._common import _task_uid, get_client, log, wait_task
+from complex_pdf_test.scale_test.resource_monitor import DEFAULT_INTERVAL_S, ResourceMonitor, format_summary, vector_dimensions
+from complex_pdf_test.scale_test.synthetic_corpus import SyntheticCorpus, batched
+from complex_pdf_test.scale_test.task_timeline import collect_timeline, print_summary, write_report
+
+INDEX_UID = "pdf_chunks_sweep"
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+BATCH_SIZE = 1000
+MAX_INFLIGHT_TASKS = 20
+QUERIES_PER_POINT = 50
+SEARCH_TYPES = {
+    "keyword": None,
+    "hybrid": 0.5,
+    "semantic": 1.0,
+}
+OUT_DIR = Path(__file__).resolve().parent / "sweeps"
+
+
+def _search_params(semantic_ratio: float | None) -> dict:
+    params = {"limit": 5, "attributesToRetrieve": ["id", "title", "chunk_text"]}
+    if semantic_ratio is not None:
+        params["hybrid"] = {"semanticRatio": semantic_ratio, "embedder": "mistral"}
+    return params
+
+
+def ingest_stream(
+    client, index, documents, *, batch_size: int, max_inflight: int, batch_bytes: int | None = None, pause_s: float = 0.0,
+) -> tuple[dict, list[int]]:
+    """
+    Stream documents to the index in batches; wait for all tasks. Returns (ingestion summary, task uids).
+    With batch_bytes, batches are pre-encoded NDJSON cut at that size (and batch_size docs).
+    pause_s sleeps after each batch is sent (throttled ingestion).
+    docs / docs_per_s count documents of succeeded tasks only; batches whose task failed are
+    reported in failed_batches / failed_docs / task_errors.
+    """
+    inflight: deque = deque()  # (task, documents)
+    task_uids: list[int] = []
+    n_docs = 0
+    batch_docs: list[int] = []
+    failed: list[tuple[object, int]] = []
+
+    def settle(task, count: int) -> None:
+        done = wait_task(client, task, check=False)
+        if done.status != "succeeded":
+            failed.append((done, count))
+            log(f"  task {done.uid} {done.status} ({count} docs): {(done.error or {}).get('code')}")
+
+    t0 = time.perf_counter()
+    if batch_bytes:
+        batches = byte_batches(documents, max_bytes=batch_bytes, max_docs=batch_size)
+    else:
+        batches = ((batch, len(batch)) for batch in batched(documents, batch_size))
+    for batch, count in batches:
+        if len(inflight) >= max_inflight:
+            settle(*inflight.popleft())
+        if batch_bytes:
+            task = index.add_documents_raw(batch, primary_key="id", content_type=NDJSON)
+        else:
+            task = index.add_documents(batch, primary_key="id")
+        inflight.append((task, count))
+        task_uids.append(_task_uid(task))
+        n_docs += count
+        batch_docs.append(count)
+        if len(batch_docs) % 10 == 0:
+            log(f"  streamed {n_docs} docs ({len(batch_docs)} batches, {len(inflight)} tasks in flight)")
+        if pause_s:
+            time.sleep(pause_s)
+    while inflight:
+        settle(*inflight.popleft())
+    elapsed = time.perf_counter() - t0
+    failed_docs = sum(count for _, count in failed)
+    summary = ingestion_summary(n_docs - failed_docs, elapsed, batch_docs=batch_docs)
+    if failed:
+        summary["failed_batches"] = len(failed)
+        summary["failed_docs"] = failed_docs
+        summary["task_errors"] = dict(Counter((t.error or {}).get("code") or t.status for t, _ in failed))
+        log(f"  WARNING: {len(failed)} of {len(batch_docs)} batches failed ({failed_docs} docs not indexed): {summary['task_errors']}")
+    return summary, task_uids
+
+
+def index_footprint(client, index_uid: str) -> dict:
+    """Database size and documents for one index, from GET /stats."""
+    stats = client.get_all_stats()
+    idx = (stats.get("indexes") or {}).get(index_uid, {})
+    return {
+        "database_size_bytes": stats.get("databaseSize"),
+        "used_database_size_bytes": stats.get("usedDatabaseSize"),
+        "number_of_documents": idx.get("numberOfDocuments"),
+        "number_of_embeddings": idx.get("numberOfEmbeddings"),
+    }
+
+
+def measure_search(index, queries: list[str], search_types: list[str]) -> dict[str, list[float]]:
+    out: dict[str, list[float]] = {}
+    for name in search_types:
+        params = _search_params(SEARCH_TYPES[name])
+        samples: list[float] = []
+        for q in queries:
+            t0 = time.perf_counter()
+            index.search(q, params)
+            samples.append((time.perf_counter() - t0) * 1000)
+        out[name] = samples
+    return out
+
+
+def plot_sweep(points: list[dict], out_path: Path) -> list[Path]:
+    """Latency percentiles, ingestion throughput and server footprint vs corpus size (log x)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    sizes = [p["corpus_size"] for p in points]
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(16, 4))
+    for name in points[0]["latency"]:
+        for q, style in (("p50", "-o"), ("p95", "--s")):
+            ax1.plot(sizes, [p["latency"][name][q] for p in points], style, label=f"{name} {q}")
+    ax1.set_xscale("log")
+    ax1.set_xlabel("Corpus size (docs)")
+    ax1.set_ylabel("Latency (ms)")
+    ax1.set_title("Search latency vs corpus size")
+    ax1.legend(fontsize=8)
+    ax1.grid(alpha=0.3)
+
+    ax2.plot(sizes, [p["ingestion"]["docs_per_s"] for p in points], "-o", color="C3")
+    ax2.set_xscale("log")
+    ax2.set_xlabel("Corpus size (docs)")
+    ax2.set_ylabel("Throughput (docs/s)")
+    ax2.set_title("Ingestion throughput (delta per point)")
+    ax2.grid(alpha=0.3)
+
+    def mib(v):
+        return v / 2**20 if v is not None else float("nan")
+
+    resources = [p.get("resources") or {} for p in points]
+    for key, label, style in (
+        ("used_database_size_bytes", "used database", "-o"),
+        ("rss_bytes", "RSS", "-s"),
+        ("rss_file_bytes", "RSS file-backed (mmap)", "--s"),
+        ("db_cached_bytes", "data.ms in page cache", ":^"),
+    ):
+        values = [r.get(key) for r in resources]
+        if any(v is not None for v in values):
+            ax3.plot(sizes, [mib(v) for v in values], style, label=label)
+    ax3.set_xscale("log")
+    ax3.set_xlabel("Corpus size (docs)")
+    ax3.set_ylabel("MiB")
+    ax3.set_title("Index footprint and server memory")
+    ax3.legend(fontsize=8)
+    ax3.grid(alpha=0.3)
+
+    plt.tight_layout()
+    written = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-scale ingestion + search sweep on a synthetic corpus.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES), help="Comma-separated corpus sizes")
+    parser.add_argument("--index", default=INDEX_UID, help="Index uid (deleted first unless --keep-index)")
+    parser.add_argument("--keep-index", action="store_true", help="Do not delete the index before the sweep")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--batch-bytes", type=int, default=None, help="Send pre-encoded NDJSON batches of at most this many bytes")
+    parser.add_argument("--max-inflight", type=int, default=MAX_INFLIGHT_TASKS, help="Max enqueued tasks not yet waited for")
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_POINT, help="Queries per search type per point")
+    parser.add_argument("--search-types", default=",".join(SEARCH_TYPES), help="Subset of keyword,hybrid,semantic")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus / query seed")
+    parser.add_argument("--label", default="", help="Label stored with the runs")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--meili-pid", type=int, default=None, help="Meilisearch pid (default: found by process name)")
+    parser.add_argument("--db-path", type=Path, default=None, help="data.ms directory, for page-cache residency")
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_INTERVAL_S, help="Resource sampling interval (s)")
+    args = parser.parse_args()
+
+    scales = sorted(int(s) for s in args.scales.split(",") if s.strip())
+    search_types = [s.strip() for s in args.search_types.split(",") if s.strip()]
+    unknown = set(search_types) - set(SEARCH_TYPES)
+    if unknown:
+        raise SystemExit(f"Unknown search types: {sorted(unknown)}")
+
+    sweep_id = time.strftime("%Y%m%dT%H%M%S")
+    log(f"========== Scale sweep {sweep_id}: {scales} on index {args.index} ==========")
+    corpus = SyntheticCorpus.from_seed_file(seed=args.seed)
+    stream = corpus.iter_documents()
+    queries = corpus.queries(args.queries)
+
+    settings = load_settings()
+    client = get_client()
+    index = client.index(args.index)
+    if not args.keep_index:
+        log(f"Deleting index {args.index} (fresh sweep)...")
+        wait_task(client, client.delete_index(args.index), check=False)  # index_not_found on a fresh server
+    log("Configuring index (searchable, filterable, Mistral embedder)...")
+    settings_task = index.update_settings(pdf_index_settings(settings))
+    log(f"Settings task {_task_uid(settings_task)} enqueued, waiting...")
+    wait_task(client, settings_task)
+
+    monitor = ResourceMonitor(client, args.index, pid=args.meili_pid, db_path=args.db_path, interval_s=args.sample_interval).start()
+    log(f"Resource sampling every {args.sample_interval:g}s (Meilisearch pid: {monitor.pid or 'not found, /stats only'})")
+    dims = None
+    points: list[dict] = []
+    current = 0
+    for target in scales:
+        delta = target - current
+        log(f"--- Scale point {target} docs: streaming {delta} new docs ---")
+        monitor.phase(f"ingest {target}")
+        ingestion, task_uids = ingest_stream(client, index, islice(stream, delta), batch_size=args.batch_size, max_inflight=args.max_inflight, batch_bytes=args.batch_bytes)
+        current = target
+        log(f"Ingested {ingestion['docs']} docs in {ingestion['seconds']:.1f}s ({ingestion['docs_per_s']:.1f} docs/s)")
+
+        timeline = collect_timeline(client, task_uids)
+        print_summary(timeline["summary"])
+
+        footprint = index_footprint(client, args.index)
+        log(f"Index footprint: {footprint}")
+
+        monitor.phase(f"search {target}")
+        latencies = measure_search(index, queries, search_types)
+        monitor.sample()
+        dims = dims or vector_dimensions(client, args.index, "mistral") or settings.mistral_embedding_dimensions
+        resources = monitor.summary(phases=[f"ingest {target}", f"search {target}"], vector_dimensions=dims)
+        log(f"Resources: {format_summary(resources)}")
+        point = {
+            "corpus_size": target,
+            "ingestion": ingestion,
+            "task_timeline": timeline["summary"],
+            "footprint": footprint,
+            "resources": resources,
+            "latency": {name: latency_summary(samples) for name, samples in latencies.items()},
+        }
+        points.append(point)
+        for name, summary in point["latency"].items():
+            log(f"  {name:8}: mean {summary['mean']:.1f} ms | p50 {summary['p50']:.1f} | p95 {summary['p95']:.1f} | p99 {summary['p99']:.1f}")
+
+        main_type = "hybrid" if "hybrid" in latencies else search_types[0]
+        run = new_run(
+            "scale_sweep",
+            index_uid=args.index,
+            label=args.label or f"{target} docs",
+            client=client,
+            corpus_size=target,
+            latencies_ms=latencies[main_type],
+            ingestion=ingestion,
+            extra={
+                "sweep_id": sweep_id,
+                "main_search_type": main_type,
+                "latencies_by_type": latencies,
+                "footprint": footprint,
+                "resources": resources,
+                "task_timeline": timeline["summary"],
+                "batch_size": args.batch_size,
+                "batch_bytes": args.batch_bytes,
+                "corpus_seed": args.seed,
+                "queries": queries,
+            },
+        )
+        log(f"Saved run {run.run_id} → {save_run(run)}")
+        for path in write_report(timeline, args.out_dir / f"sweep-{sweep_id}-timeline-{target}"):
+            log(f"Task timeline → {path}")
+
+    monitor.stop()
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    (args.out_dir / f"sweep-{sweep_id}-resources.json").write_text(json.dumps(monitor.samples, indent=2), encoding="utf-8")
+    summary_path = args.out_dir / f"sweep-{sweep_id}.json"
+    summary_path.write_text(json.dumps({"sweep_id": sweep_id, "index": args.index, "points": points}, indent=2), encoding="utf-8")
+    log(f"Sweep summary → {summary_path}")
+    for out in plot_sweep(points, args.out_dir / f"sweep-{sweep_id}.png"):
+        log(f"Chart → {out}")
+    log("========== Scale sweep end ==========")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """
 Scale test: index 10k docs in batches, then benchmark search latency.
 
-We measure two things:
+We measure three things:
 
 1. INGESTION (task queue + embedder)
    Time from first batch sent until all indexation tasks are "succeeded".
@@ -11,19 +11,33 @@ We measure two things:
    - Same API as the 43-chunk load: add_documents. Here we use add_documents_in_batches
      (SDK helper that calls add_documents in a loop with batch_size=1000).
 
-2. SEARCH (mmap / LMDB)
+2. SEARCH
    After ingestion, run 50 hybrid searches and report mean / p50 / p95.
-   - Verifies that at 10k docs the latency doesn't explode (memory-mapping / LMDB).
+   - Checks that at 10k docs the latency stays in the same order as at 43 chunks.
+
+3. RESOURCES (resource_monitor.py, sampled during ingestion and search)
+   Database size and documents from /stats; RSS of the Meilisearch process split into
+   anonymous and file-backed pages (the memory-mapped LMDB environment); disk I/O and major
+   page faults; with MEILI_DB_PATH set to the data.ms directory, its bytes in the page cache.
+   Whether search is served from memory is read from these numbers (resident share of the
+   used database, major faults during the search phase), not assumed.
 
 43 chunks (load_to_meilisearch): index.add_documents(documents, primary_key="id") — one call.
 10k (this script): index.add_documents_in_batches(documents, batch_size=1000, primary_key="id")
   → same add_documents under the hood, called once per batch.
 
+After ingestion, task_timeline.py breaks the server-side time down (queue wait vs
+processing, per-batch progress trace such as embedding vs indexing) from /tasks and /batches.
+
+Results (raw latencies, per-batch timings, settings hash, environment) are saved to the
+results store (complex_pdf_test/results/runs/); chart or compare them with results/compare.py.
+
 Usage (from project root):
   uv run python complex_pdf_test/scale_test/run_scale_test.py
 """
 
 import json
+import os
 import sys
 import time
 from pathlib import Path
@@ -35,8 +49,12 @@ if str(PROJECT_ROOT) not in sys.path:
 from dotenv import load_dotenv
 load_dotenv(PROJECT_ROOT / ".env")
 
-import meilisearch
 from config import load_settings
+from complex_pdf_test.scale_test._common import TASK_WAIT_TIMEOUT_MS, _task_uid, get_client, log, wait_task
+from complex_pdf_test.scale_test.resource_monitor import ResourceMonitor, format_summary, vector_dimensions
+from complex_pdf_test.scale_test.task_timeline import TIMELINE_DIR, collect_timeline, print_summary, write_report
+from complex_pdf_test.load.load_to_meilisearch import pdf_index_settings
+from complex_pdf_test.results import ingestion_summary, latency_summary, new_run, save_run
 
 # Index dedicated to scale test (do not overwrite pdf_chunks)
 INDEX_UID = "pdf_chunks_scale"
@@ -46,44 +64,6 @@ BATCH_SIZE = 1000
 BENCHMARK_REQUESTS = 50
 QUERY = "architecture Mixtral experts routing"
 
-# Logging: elapsed seconds since script start
-_script_start = time.perf_counter()
-
-
-def _elapsed() -> float:
-    return time.perf_counter() - _script_start
-
-
-def log(msg: str) -> None:
-    print(f"[{_elapsed():.1f}s] [scale_test] {msg}", flush=True)
-
-
-def get_client() -> meilisearch.Client:
-    settings = load_settings()
-    if settings.meilisearch_api_key:
-        return meilisearch.Client(settings.meilisearch_url, settings.meilisearch_api_key)
-    return meilisearch.Client(settings.meilisearch_url)
-
-
-# Per-batch indexation with embedder can take minutes (Mistral API). Default SDK timeout is 5s.
-TASK_WAIT_TIMEOUT_MS = 30 * 60 * 1000  # 30 min per batch
-
-
-def _task_uid(task) -> int:
-    uid = getattr(task, "task_uid", None) or getattr(task, "uid", None)
-    if uid is None and hasattr(task, "task_uid"):
-        uid = task.task_uid
-    if uid is None and isinstance(task, dict):
-        uid = task.get("taskUid") or task.get("uid")
-    if uid is None:
-        raise RuntimeError(f"Task UID not found in response: {task}")
-    return uid
-
-
-def wait_task(client: meilisearch.Client, task, timeout_in_ms: int = TASK_WAIT_TIMEOUT_MS) -> None:
-    task_uid = _task_uid(task)
-    client.wait_for_task(task_uid, timeout_in_ms=timeout_in_ms)
-
 
 def load_seed_chunks() -> list[dict]:
     data = json.loads(CHUNKS_PATH.read_text(encoding="utf-8"))
@@ -126,41 +106,21 @@ def main() -> None:
     log("Client connected.")
 
     log(f"Configuring index {INDEX_UID} (searchable, filterable, Mistral embedder)...")
-    settings_task = index.update_settings(
-        {
-            "searchableAttributes": ["chunk_text", "title"],
-            "filterableAttributes": ["doc_id", "page", "element_type", "source_file"],
-            "embedders": {
-                "mistral": {
-                    "source": "rest",
-                    "apiKey": settings.mistral_api_key,
-                    "dimensions": 1024,
-                    "documentTemplate": (
-                        "{% if doc.title %}Section: {{ doc.title }}. {% endif %}"
-                        "{% if doc.chunk_text %}{{ doc.chunk_text | truncatewords: 50 }}{% endif %}"
-                    ),
-                    "url": "https://api.mistral.ai/v1/embeddings",
-                    "request": {
-                        "model": settings.mistral_embedding_model,
-                        "input": ["{{text}}", "{{..}}"],
-                    },
-                    "response": {
-                        "data": [
-                            {"embedding": "{{embedding}}"},
-                            "{{..}}",
-                        ]
-                    },
-                }
-            },
-        }
-    )
+    settings_task = index.update_settings(pdf_index_settings(settings))
     settings_uid = _task_uid(settings_task)
     log(f"Settings task enqueued (task_uid={settings_uid}), waiting for success (timeout {TASK_WAIT_TIMEOUT_MS // 1000}s)...")
     wait_task(client, settings_task)
     log("Settings applied successfully.")
 
+    db_path = os.getenv("MEILI_DB_PATH")
+    monitor = ResourceMonitor(client, INDEX_UID, db_path=Path(db_path) if db_path else None).start()
+    log(f"Resource sampling started (Meilisearch pid: {monitor.pid or 'not found, /stats only'})")
+    monitor.phase("ingest")
+
     num_batches = (len(documents) + BATCH_SIZE - 1) // BATCH_SIZE
     log(f"Adding {len(documents)} documents in {num_batches} batches of {BATCH_SIZE}...")
+    batch_seconds: list[float] = []
+    batch_docs: list[int] = []
     t0_ingestion = time.perf_counter()
     tasks = index.add_documents_in_batches(documents, batch_size=BATCH_SIZE, primary_key="id")
     log(f"Enqueued {len(tasks)} indexation tasks (add_documents_in_batches returned).")
@@ -173,6 +133,8 @@ def main() -> None:
         log(f"Batch {i + 1}/{len(tasks)}: task_uid={task_uid}, docs {doc_start}-{doc_end-1}, waiting (timeout 30min)...")
         wait_task(client, task)
         batch_elapsed = time.perf_counter() - batch_start
+        batch_seconds.append(batch_elapsed)
+        batch_docs.append(doc_end - doc_start)
         cumulative = time.perf_counter() - t0_ingestion
         log(f"Batch {i + 1}/{len(tasks)} done in {batch_elapsed:.1f}s (cumulative: {cumulative:.1f}s)")
 
@@ -180,6 +142,11 @@ def main() -> None:
     throughput = len(documents) / elapsed if elapsed > 0 else 0
     log(f"All batches finished. Total ingestion time: {elapsed:.1f}s — throughput: {throughput:.1f} docs/s")
 
+    log("Collecting server-side task/batch timeline (queue wait, processing, progress trace)...")
+    timeline = collect_timeline(client, [_task_uid(t) for t in tasks])
+    print_summary(timeline["summary"])
+
+    monitor.phase("search")
     log(f"Running {BENCHMARK_REQUESTS} hybrid searches on {INDEX_UID} (query: {QUERY!r})...")
     latencies_ms: list[float] = []
     for k in range(BENCHMARK_REQUESTS):
@@ -196,11 +163,11 @@ def main() -> None:
         if (k + 1) % 10 == 0 or k == 0:
             log(f"  Search request {k + 1}/{BENCHMARK_REQUESTS} done (last: {latencies_ms[-1]:.0f} ms)")
 
-    latencies_ms.sort()
-    p50 = latencies_ms[len(latencies_ms) // 2]
-    p95_idx = int(len(latencies_ms) * 0.95)
-    p95 = latencies_ms[p95_idx] if p95_idx < len(latencies_ms) else latencies_ms[-1]
-    mean_ms = sum(latencies_ms) / len(latencies_ms)
+    monitor.stop()
+    resources = monitor.summary(vector_dimensions=vector_dimensions(client, INDEX_UID, "mistral") or settings.mistral_embedding_dimensions)
+
+    summary = latency_summary(latencies_ms)
+    mean_ms, p50, p95 = summary["mean"], summary["p50"], summary["p95"]
 
     log("========== Scale test results ==========")
     print()
@@ -208,11 +175,28 @@ def main() -> None:
     print(f"  Hybrid search ({BENCHMARK_REQUESTS} requests, query {QUERY!r}):")
     print(f"    Mean: {mean_ms:.1f} ms  |  p50: {p50:.1f} ms  |  p95: {p95:.1f} ms")
     print()
-    print("  Compare with BILAN (43 chunks): mean ~335 ms, p50 ~194 ms, p95 ~727 ms.")
+    print("  Compare with BILAN (43 chunks): results/compare.py compare bilan-43-chunks-hybrid <run id saved below>")
     if p95 > 2000:
         print("  → p95 degraded significantly at 10k docs.")
     else:
         print("  → Latency at 10k docs in the same order as at 43 chunks.")
+    print(f"  Resources: {format_summary(resources)}")
+    search_phase = resources.get("phases", {}).get("search", {})
+    if search_phase.get("major_faults") is not None:
+        print(f"    During search: {search_phase['major_faults']} major page faults, {(search_phase['read_bytes'] or 0) / 2**20:.1f} MiB read from disk")
+
+    run = new_run(
+        "scale_test",
+        index_uid=INDEX_UID,
+        label=f"{len(documents)} docs",
+        client=client,
+        latencies_ms=latencies_ms,
+        ingestion=ingestion_summary(len(documents), elapsed, batch_seconds, batch_docs),
+        extra={"query": QUERY, "batch_size": BATCH_SIZE, "task_timeline": timeline["summary"], "resources": resources},
+    )
+    log(f"Saved run {run.run_id} → {save_run(run)}")
+    for path in write_report(timeline, TIMELINE_DIR / run.run_id):
+        log(f"Task timeline → {path}")
     log("========== Scale test end ==========")
 
 
@@ -0,0 +1,170 @@
+"""
+Shard benchmark: the same synthetic corpus in one index and in N shards (load/sharding.py),
+then search latency of the single index, of each shard alone and of the federated search.
+
+  - INGESTION: docs/s into the single index vs into the shards (shards load concurrently;
+    on separate instances indexing and embedding run in parallel).
+  - SEARCH per type (keyword / hybrid / semantic):
+      single     index.search on the unsharded index
+      shard i    index.search on one shard (what each node pays for its part)
+      federated  federated_search over the layout (fan-out + merge)
+  - AGREEMENT: share of the single index's top-k ids that the federated search also returns.
+    Below 1.0 means the merge reorders hits.
+
+Shards on one instance share its CPU and disk, so the per-shard gains show up mostly when
+the shards run on separate instances, e.g. local containers on ports 7700, 7701, ...:
+  docker run -d --rm -p 7701:7700 getmeili/meilisearch:v1.15.1   (same MEILI_MASTER_KEY on every instance)
+
+Each configuration is saved to the results store (kind "shard_benchmark"; compare the runs
+with results/compare.py).
+
+Usage (from project root):
+  uv run python complex_pdf_test/scale_test/run_shard_benchmark.py --docs 20000 --shards 4
+  uv run python complex_pdf_test/scale_test/run_shard_benchmark.py --docs 20000 --urls http://localhost:7700,http://localhost:7701
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from complex_pdf_test.load.sharding import ShardLayout, load_sharded, shard_client
+from complex_pdf_test.results import ingestion_summary, latency_summary, new_run, save_run
+from complex_pdf_test.scale_test._common import log, wait_task
+from complex_pdf_test.scale_test.run_scale_sweep import SEARCH_TYPES, _search_params
+from complex_pdf_test.scale_test.synthetic_corpus import SyntheticCorpus
+from complex_pdf_test.search import federated_search
+
+INDEX_UID = "pdf_chunks_shard"
+DEFAULT_DOCS = 20_000
+DEFAULT_SHARDS = 4
+QUERIES = 50
+LAYOUT_DIR = Path(__file__).resolve().parent / "sweeps"
+
+
+def _reset(layout: ShardLayout) -> None:
+    for shard in layout.shards:
+        client = shard_client(shard)
+        wait_task(client, client.delete_index(shard.index_uid), check=False)  # index_not_found on a fresh server
+
+
+def _ingest(layout: ShardLayout, documents: list[dict], batch_bytes: int) -> dict:
+    t0 = time.perf_counter()
+    per_shard = load_sharded(documents, layout, max_batch_bytes=batch_bytes)
+    summary = ingestion_summary(len(documents), time.perf_counter() - t0)
+    summary["per_shard"] = per_shard
+    return summary
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def measure(single: ShardLayout, sharded: ShardLayout, queries: list[str], search_type: str) -> dict:
+    """Latency samples (ms) for the single index, each shard and the federated search, plus top-k agreement."""
+    params = _search_params(SEARCH_TYPES[search_type])
+    base = single.shards[0]
+    base_index = shard_client(base).index(base.index_uid)
+    shard_indexes = [(s.index_uid, shard_client(s).index(s.index_uid)) for s in sharded.shards]
+    out: dict = {"single": [], "federated": [], "shards": {uid: [] for uid, _ in shard_indexes}, "agreement": []}
+    for q in queries:
+        t0 = time.perf_counter()
+        base_ids = [h["id"] for h in base_index.search(q, params)["hits"]]
+        out["single"].append((time.perf_counter() - t0) * 1000)
+        for uid, index in shard_indexes:
+            out["shards"][uid].append(_timed(lambda: index.search(q, params)))
+        t0 = time.perf_counter()
+        fed_ids = [h["id"] for h in federated_search(sharded, q, params).hits]
+        out["federated"].append((time.perf_counter() - t0) * 1000)
+        if base_ids:
+            out["agreement"].append(len(set(base_ids) & set(fed_ids)) / len(base_ids))
+    return out
+
+
+def _print_latency(name: str, samples: list[float]) -> None:
+    s = latency_summary(samples)
+    log(f"  {name:22}: mean {s['mean']:.1f} ms | p50 {s['p50']:.1f} | p95 {s['p95']:.1f} | p99 {s['p99']:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Single index vs N shards: ingestion, per-shard and federated search latency.")
+    parser.add_argument("--docs", type=int, default=DEFAULT_DOCS)
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="Number of shards (at least one per URL)")
+    parser.add_argument("--urls", default="", help="Comma-separated Meilisearch URLs for the shards (default: MEILISEARCH_URL)")
+    parser.add_argument("--index", default=INDEX_UID, help="Base index uid (single index; shards get _s<i>)")
+    parser.add_argument("--key", default="doc_id", help="Routing field")
+    parser.add_argument("--queries", type=int, default=QUERIES)
+    parser.add_argument("--search-types", default="keyword,hybrid", help="Subset of keyword,hybrid,semantic")
+    parser.add_argument("--batch-bytes", type=int, default=8 * 1024 * 1024)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse the indexes of a previous run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="")
+    args = parser.parse_args()
+
+    urls = [u.strip() for u in args.urls.split(",") if u.strip()] or None
+    search_types = [s.strip() for s in args.search_types.split(",") if s.strip()]
+    single = ShardLayout.create(index_uid=args.index, shards=1, urls=urls[:1] if urls else None, key=args.key)
+    sharded = ShardLayout.create(index_uid=args.index, shards=max(args.shards, 2), urls=urls, key=args.key)
+    LAYOUT_DIR.mkdir(parents=True, exist_ok=True)
+    layout_path = sharded.save(LAYOUT_DIR / f"{args.index}-layout.json")
+    log(f"========== Shard benchmark: {args.docs} docs, {len(sharded)} shards on {len(sharded.by_instance())} instance(s) ==========")
+    log(f"Layout → {layout_path}")
+
+    corpus = SyntheticCorpus.from_seed_file(seed=args.seed)
+    queries = corpus.queries(args.queries)
+    ingestion: dict[str, dict | None] = {"single": None, "sharded": None}
+    if not args.skip_load:
+        documents = list(corpus.documents(args.docs))
+        for name, layout in (("single", single), ("sharded", sharded)):
+            log(f"Loading {name} ({len(layout)} index(es))...")
+            _reset(layout)
+            ingestion[name] = _ingest(layout, documents, args.batch_bytes)
+            log(f"  {ingestion[name]['docs']} docs in {ingestion[name]['seconds']:.1f}s ({ingestion[name]['docs_per_s']:.1f} docs/s)")
+
+    results = {}
+    for search_type in search_types:
+        log(f"--- {search_type} ({len(queries)} queries) ---")
+        m = measure(single, sharded, queries, search_type)
+        results[search_type] = m
+        _print_latency("single index", m["single"])
+        for uid, samples in m["shards"].items():
+            _print_latency(f"shard {uid}", samples)
+        _print_latency("federated", m["federated"])
+        if m["agreement"]:
+            log(f"  top-k agreement federated vs single: {sum(m['agreement']) / len(m['agreement']):.3f}")
+
+    main_type = "hybrid" if "hybrid" in results else search_types[0]
+    common = {"docs": args.docs, "shards": len(sharded), "instances": len(sharded.by_instance()), "search_types": search_types}
+    for name, layout, key in (("single", single, "single"), (f"sharded-{len(sharded)}", sharded, "federated")):
+        run = new_run(
+            "shard_benchmark",
+            index_uid=layout.shards[0].index_uid,
+            label=args.label or name,
+            corpus_size=args.docs,
+            latencies_ms=results[main_type][key],
+            ingestion=ingestion["single" if key == "single" else "sharded"],
+            extra={
+                **common,
+                "layout": layout.to_dict(),
+                "main_search_type": main_type,
+                "latencies_by_type": {t: r[key] for t, r in results.items()},
+                "per_shard_latencies": {t: r["shards"] for t, r in results.items()} if key == "federated" else None,
+                "agreement": {t: r["agreement"] for t, r in results.items()} if key == "federated" else None,
+                "queries": queries,
+            },
+        )
+        log(f"Saved run {run.run_id} → {save_run(run)}")
+    log("========== Shard benchmark end ==========")
+
+
+if __name__ == "__main__":
+    main()
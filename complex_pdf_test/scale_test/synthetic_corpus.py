@@ -0,0 +1,229 @@
+"""
+Streaming synthetic corpus for scale tests.
+
+Replaces "clone the 43 seed chunks" with a small generative model so that large indexes
+behave like real ones for both keyword and vector search:
+
+  - Vocabulary: word frequencies of the seed chunks (mistral-doc.chunks.json) as the head,
+    plus a long tail of pseudo-words, so posting lists have a realistic shape.
+  - Topics: each topic is a Zipf distribution over its own subset of the vocabulary; each
+    source document mixes 1-3 topics (Dirichlet) with a shared background distribution.
+  - Layout: documents have a log-normal number of chunks, numbered sections with headings
+    ("## 2.1 ..."), pages, and a mix of text / table / figure_caption chunks. Chunk length
+    follows the log-normal fitted on the seed chunks, capped at max_chars.
+
+Everything is generated lazily (iter_documents / batched), so a 1M-doc sweep never holds
+the corpus in memory. Output is deterministic for a given seed.
+"""
+
+import json
+import math
+import random
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from itertools import accumulate, islice
+from pathlib import Path
+
+DEFAULT_SEED_PATH = Path(__file__).resolve().parents[1] / "mistral-doc.chunks.json"
+_WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z\-]{1,}")
+_SYLLABLES = [
+    "ka", "lo", "mi", "ra", "te", "sul", "ven", "dor", "pli", "qua", "nex", "tor", "bel", "cri",
+    "fa", "gon", "hy", "ix", "jor", "mar", "no", "pe", "sti", "vo", "zen", "tra", "ul", "ost",
+]
+ELEMENT_TYPES = ["text", "table", "figure_caption"]
+ELEMENT_WEIGHTS = [0.86, 0.09, 0.05]
+
+
+def _zipf_cum_weights(n: int, exponent: float) -> list[float]:
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def _pseudo_words(count: int, rng: random.Random, exclude: set[str]) -> list[str]:
+    out: list[str] = []
+    seen = set(exclude)
+    while len(out) < count:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            out.append(word)
+    return out
+
+
+class SyntheticCorpus:
+    """Generative corpus model fitted on seed chunk texts (see module docstring)."""
+
+    def __init__(
+        self,
+        seed_texts: list[str],
+        *,
+        seed: int = 0,
+        n_topics: int = 24,
+        topic_size: int = 80,
+        tail_size: int = 20_000,
+        background_share: float = 0.45,
+        max_chars: int = 1200,
+        mean_chunks_per_doc: float = 40.0,
+    ):
+        if not seed_texts:
+            raise ValueError("SyntheticCorpus needs at least one seed text")
+        self.seed = seed
+        self.max_chars = max_chars
+        self.background_share = background_share
+        self.mean_chunks_per_doc = mean_chunks_per_doc
+        rng = random.Random(seed)
+
+        counts = Counter(w.lower() for t in seed_texts for w in _WORD_RE.findall(t))
+        head = [w for w, _ in counts.most_common()]
+        # Background = the most frequent seed words with their empirical weights
+        bg = head[:300]
+        self.bg_words = bg
+        self.bg_cum = list(accumulate(counts[w] for w in bg))
+
+        # Topic vocabularies: half real content words from the seed, half from the pseudo-word tail
+        head_content = head[len(bg):] or head
+        tail = _pseudo_words(tail_size, rng, set(head))
+        self.topics: list[tuple[list[str], list[float]]] = []
+        for _ in range(n_topics):
+            words = rng.sample(head_content, min(topic_size // 2, len(head_content)))
+            words += rng.sample(tail, min(topic_size - len(words), len(tail)))
+            rng.shuffle(words)
+            self.topics.append((words, _zipf_cum_weights(len(words), 0.9)))
+
+        lengths = [len(t) for t in seed_texts if t.strip()]
+        logs = [math.log(n) for n in lengths]
+        self.len_mu = sum(logs) / len(logs)
+        self.len_sigma = (sum((x - self.len_mu) ** 2 for x in logs) / max(len(logs) - 1, 1)) ** 0.5 or 0.5
+        self.avg_word_len = sum(len(w) + 1 for w in head[:2000]) / max(len(head[:2000]), 1)
+
+    @classmethod
+    def from_seed_file(cls, path: str | Path = DEFAULT_SEED_PATH, **kwargs) -> "SyntheticCorpus":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls([d.get("chunk_text") or "" for d in data], **kwargs)
+
+    # ---- sampling helpers ----
+    def _words(self, rng: random.Random, mixture: list[tuple[int, float]], n: int, background: bool = True) -> list[str]:
+        bg_share = self.background_share if background else 0.0
+        sources = [-1] + [t for t, _ in mixture]
+        weights = [bg_share] + [w * (1 - bg_share) for _, w in mixture]
+        picks = Counter(rng.choices(sources, weights=weights, k=n))
+        out: list[str] = []
+        for src, k in picks.items():
+            if src == -1:
+                out.extend(rng.choices(self.bg_words, cum_weights=self.bg_cum, k=k))
+            else:
+                words, cum = self.topics[src]
+                out.extend(rng.choices(words, cum_weights=cum, k=k))
+        rng.shuffle(out)
+        return out
+
+    def _sentences(self, words: list[str], rng: random.Random) -> str:
+        parts: list[str] = []
+        i = 0
+        while i < len(words):
+            n = rng.randint(8, 24)
+            sent = words[i:i + n]
+            i += n
+            parts.append(sent[0].capitalize() + (" " + " ".join(sent[1:]) if len(sent) > 1 else "") + ".")
+        return " ".join(parts)
+
+    def _mixture(self, rng: random.Random) -> list[tuple[int, float]]:
+        k = rng.choice([1, 1, 2, 2, 3])
+        topics = rng.sample(range(len(self.topics)), k)
+        raw = [rng.gammavariate(1.0, 1.0) for _ in topics]
+        total = sum(raw) or 1.0
+        return [(t, w / total) for t, w in zip(topics, raw)]
+
+    def _target_chars(self, rng: random.Random) -> int:
+        return int(min(self.max_chars, max(60, rng.lognormvariate(self.len_mu, self.len_sigma))))
+
+    def _table(self, rng: random.Random, mixture, target: int) -> str:
+        n_cols = rng.randint(3, 6)
+        header = self._words(rng, mixture, n_cols, background=False)
+        lines = ["| " + " | ".join(h.capitalize() for h in header) + " |", "|" + "---|" * n_cols]
+        while sum(len(l) + 1 for l in lines) < target:
+            label = self._words(rng, mixture, 1, background=False)[0]
+            cells = [f"{rng.uniform(0, 100):.1f}" for _ in range(n_cols - 1)]
+            lines.append(f"| {label} | " + " | ".join(cells) + " |")
+        return "\n".join(lines)
+
+    # ---- public API ----
+    def iter_source_document(self, doc_index: int) -> Iterator[dict]:
+        """All chunks of one synthetic source PDF (deterministic per seed + doc_index)."""
+        rng = random.Random(self.seed * 1_000_003 + doc_index)
+        mixture = self._mixture(rng)
+        n_chunks = max(1, min(2000, int(rng.lognormvariate(math.log(self.mean_chunks_per_doc), 0.8))))
+        doc_id = f"syn_d{doc_index}"
+        source_file = f"synthetic-{doc_index:06d}.pdf"
+        page = 1
+        section, subsection = 0, 0
+        heading = ""
+        remaining_in_section = 0
+        figure_no = table_no = 0
+        for c in range(n_chunks):
+            if remaining_in_section <= 0:
+                if section == 0 or rng.random() < 0.4:
+                    section, subsection = section + 1, 0
+                    number = f"{section}"
+                else:
+                    subsection += 1
+                    number = f"{section}.{subsection}"
+                title_words = self._words(rng, mixture, rng.randint(2, 5), background=False)
+                heading = f"{number} " + " ".join(w.capitalize() for w in title_words)
+                remaining_in_section = 1 + int(rng.expovariate(1 / 2.0))
+                new_section = True
+            else:
+                new_section = False
+            remaining_in_section -= 1
+
+            element_type = rng.choices(ELEMENT_TYPES, weights=ELEMENT_WEIGHTS)[0]
+            target = self._target_chars(rng)
+            if element_type == "table":
+                table_no += 1
+                body = f"Table {table_no}: " + self._sentences(self._words(rng, mixture, 8), rng) + "\n\n"
+                body += self._table(rng, mixture, target - len(body))
+            elif element_type == "figure_caption":
+                figure_no += 1
+                body = f"Figure {figure_no}: " + self._sentences(self._words(rng, mixture, rng.randint(10, 30)), rng)
+            else:
+                n_words = max(5, int(target / self.avg_word_len))
+                body = self._sentences(self._words(rng, mixture, n_words), rng)
+            text = f"## {heading}\n\n{body}" if new_section else body
+            yield {
+                "id": f"{doc_id}_c{c}",
+                "doc_id": doc_id,
+                "chunk_text": text[: self.max_chars],
+                "title": heading,
+                "page": page,
+                "element_type": element_type,
+                "source_file": source_file,
+            }
+            if rng.random() < 0.45:
+                page += 1
+
+    def iter_documents(self, start_doc: int = 0) -> Iterator[dict]:
+        """Endless stream of chunk documents, source document after source document."""
+        doc_index = start_doc
+        while True:
+            yield from self.iter_source_document(doc_index)
+            doc_index += 1
+
+    def documents(self, count: int) -> Iterator[dict]:
+        """First `count` chunk documents of the stream."""
+        return islice(self.iter_documents(), count)
+
+    def queries(self, count: int, *, seed: int | None = None) -> list[str]:
+        """Search queries drawn from topic vocabularies (2-5 words each)."""
+        rng = random.Random(self.seed + 7919 if seed is None else seed)
+        out: list[str] = []
+        for _ in range(count):
+            words, cum = self.topics[rng.randrange(len(self.topics))]
+            out.append(" ".join(dict.fromkeys(rng.choices(words[:30], cum_weights=cum[:30], k=rng.randint(2, 5)))))
+        return out
+
+
+def batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    """Yield lists of at most `size` items from a (possibly endless) iterable."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
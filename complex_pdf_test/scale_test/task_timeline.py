@@ -0,0 +1,316 @@
+"""
+Ingestion phase breakdown from Meilisearch task and batch metadata.
+
+Client-side wall clock only says "batch took 80 s". The server knows more:
+  - /tasks:   enqueuedAt / startedAt / finishedAt, details (received / indexed documents)
+  - /batches: which tasks were processed together (auto-batching), batch duration and
+              stats.progressTrace (time per internal step, e.g. embedding vs indexing
+              vs writing to LMDB) on Meilisearch >= 1.14, embedder request counts on newer versions.
+
+From these we derive per task: queue wait (startedAt - enqueuedAt), processing time
+(finishedAt - startedAt) and cost per document; per batch: composition and step times.
+The report (JSON + Gantt-style chart) tells whether to tune the embedder, batch sizes
+or Meilisearch hardware.
+
+Usage (from project root):
+  uv run python complex_pdf_test/scale_test/task_timeline.py --tasks 12,13,14 -o timeline
+  uv run python complex_pdf_test/scale_test/task_timeline.py --index pdf_chunks_scale --from-uid 100 -o timeline
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+LOG_PREFIX = "[task_timeline]"
+TIMELINE_DIR = Path(__file__).resolve().parent / "timelines"
+PAGE_SIZE = 1000
+_FRACTION_RE = re.compile(r"\.(\d+)")
+_DURATION_RE = re.compile(r"^\s*([\d.]+)\s*(ns|µs|us|ms|s|m|h)?\s*$")
+_DURATION_UNITS = {"ns": 1e-9, "µs": 1e-6, "us": 1e-6, "ms": 1e-3, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0}
+_ISO_DURATION_RE = re.compile(r"^P(?:T)?(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?$")
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    """RFC 3339 with up to nanosecond precision (Meilisearch format) → aware datetime."""
+    if not value:
+        return None
+    value = value.replace("Z", "+00:00")
+    value = _FRACTION_RE.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, count=1)
+    return datetime.fromisoformat(value)
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Seconds from an ISO 8601 task duration ("PT1.5S") or a progressTrace string ("12.3ms")."""
+    if not value:
+        return None
+    m = _ISO_DURATION_RE.match(value)
+    if m and any(m.groups()):
+        h, mi, s = (float(x) if x else 0.0 for x in m.groups())
+        return h * 3600 + mi * 60 + s
+    m = _DURATION_RE.match(value)
+    if m:
+        return float(m.group(1)) * _DURATION_UNITS[m.group(2)]
+    return None
+
+
+def _get_paginated(client, path: str, params: dict) -> list[dict]:
+    """GET /tasks or /batches following the `from` / `next` cursor."""
+    out: list[dict] = []
+    params = dict(params, limit=PAGE_SIZE)
+    while True:
+        query = "&".join(f"{k}={v}" for k, v in params.items() if v is not None)
+        page = client.http.get(f"{path}?{query}")
+        out.extend(page.get("results", []))
+        nxt = page.get("next")
+        if nxt is None:
+            return out
+        params["from"] = nxt
+
+
+def fetch_tasks(client, task_uids: list[int] | None = None, *, index_uid: str | None = None, from_uid: int | None = None) -> list[dict]:
+    """Tasks by explicit uids, or all tasks of an index with uid >= from_uid."""
+    if task_uids:
+        tasks: list[dict] = []
+        for i in range(0, len(task_uids), 200):
+            chunk = task_uids[i:i + 200]
+            tasks.extend(_get_paginated(client, "tasks", {"uids": ",".join(str(u) for u in chunk)}))
+        return sorted(tasks, key=lambda t: t["uid"])
+    tasks = _get_paginated(client, "tasks", {"indexUids": index_uid})
+    if from_uid is not None:
+        tasks = [t for t in tasks if t["uid"] >= from_uid]
+    return sorted(tasks, key=lambda t: t["uid"])
+
+
+def fetch_batches(client, batch_uids: list[int]) -> list[dict]:
+    """Batches by uid (GET /batches, Meilisearch >= 1.13). Empty list if the route is missing."""
+    if not batch_uids:
+        return []
+    batches: list[dict] = []
+    try:
+        for i in range(0, len(batch_uids), 200):
+            chunk = batch_uids[i:i + 200]
+            batches.extend(_get_paginated(client, "batches", {"uids": ",".join(str(u) for u in chunk)}))
+    except Exception as e:  # older server: no batches route
+        print(f"{LOG_PREFIX} Batches endpoint unavailable ({e}); task-level breakdown only.", file=sys.stderr)
+        return []
+    return sorted(batches, key=lambda b: b["uid"])
+
+
+def _task_docs(task: dict) -> int:
+    """Documents indexed by the task; received documents only while indexedDocuments is unset (not finished)."""
+    details = task.get("details") or {}
+    indexed = details.get("indexedDocuments")
+    if indexed is not None:
+        return int(indexed)
+    return int(details.get("receivedDocuments") or 0)
+
+
+def _flatten_trace(trace: dict, prefix: str = "") -> dict[str, float]:
+    """progressTrace is {"step > substep": "1.2s", ...} (possibly nested); flatten to seconds."""
+    out: dict[str, float] = {}
+    for key, value in (trace or {}).items():
+        name = f"{prefix} > {key}" if prefix else key
+        if isinstance(value, dict):
+            out.update(_flatten_trace(value, name))
+        else:
+            seconds = parse_duration(value) if isinstance(value, str) else None
+            if seconds is not None:
+                out[name] = seconds
+    return out
+
+
+def build_timeline(tasks: list[dict], batches: list[dict]) -> dict:
+    """Derive per-task / per-batch phases and a run summary from raw task and batch JSON."""
+    rows: list[dict] = []
+    for t in tasks:
+        enq, start, fin = (parse_timestamp(t.get(k)) for k in ("enqueuedAt", "startedAt", "finishedAt"))
+        docs = _task_docs(t)
+        queue_s = (start - enq).total_seconds() if enq and start else None
+        proc_s = (fin - start).total_seconds() if start and fin else None
+        rows.append({
+            "uid": t["uid"],
+            "batch_uid": t.get("batchUid"),
+            "type": t.get("type"),
+            "status": t.get("status"),
+            "index_uid": t.get("indexUid"),
+            "documents": docs,
+            "enqueued_at": t.get("enqueuedAt"),
+            "started_at": t.get("startedAt"),
+            "finished_at": t.get("finishedAt"),
+            "queue_wait_s": queue_s,
+            "processing_s": proc_s,
+            "ms_per_doc": proc_s * 1000 / docs if proc_s is not None and docs else None,
+            "error": (t.get("error") or {}).get("message"),
+        })
+
+    tasks_by_batch: dict[int, list[dict]] = defaultdict(list)
+    for r in rows:
+        if r["batch_uid"] is not None:
+            tasks_by_batch[r["batch_uid"]].append(r)
+
+    batch_rows: list[dict] = []
+    step_totals: dict[str, float] = defaultdict(float)
+    embedder_requests = {"total": 0, "failed": 0}
+    for b in batches:
+        stats = b.get("stats") or {}
+        trace = _flatten_trace(stats.get("progressTrace") or {})
+        for step, seconds in trace.items():
+            step_totals[step] += seconds
+        emb = stats.get("embedderRequests") or {}
+        embedder_requests["total"] += int(emb.get("total") or 0)
+        embedder_requests["failed"] += int(emb.get("failed") or 0)
+        member_tasks = tasks_by_batch.get(b["uid"], [])
+        docs = sum(r["documents"] for r in member_tasks)
+        duration_s = parse_duration(b.get("duration"))
+        batch_rows.append({
+            "uid": b["uid"],
+            "task_uids": [r["uid"] for r in member_tasks],
+            "total_tasks": stats.get("totalNbTasks"),
+            "documents": docs,
+            "started_at": b.get("startedAt"),
+            "finished_at": b.get("finishedAt"),
+            "duration_s": duration_s,
+            "ms_per_doc": duration_s * 1000 / docs if duration_s and docs else None,
+            "progress_trace_s": trace,
+            "embedder_requests": emb or None,
+            "batch_strategy": b.get("batchStrategy"),
+        })
+
+    done = [r for r in rows if r["processing_s"] is not None]
+    enqueued = [parse_timestamp(r["enqueued_at"]) for r in rows if r["enqueued_at"]]
+    finished = [parse_timestamp(r["finished_at"]) for r in rows if r["finished_at"]]
+    total_docs = sum(r["documents"] for r in done)
+    processing_total = sum(r["processing_s"] for r in done)
+    # Tasks of one batch share the same processing window: count each batch once for server busy time
+    busy_s = sum(b["duration_s"] or 0 for b in batch_rows) if batch_rows else processing_total
+    wall_s = (max(finished) - min(enqueued)).total_seconds() if enqueued and finished else None
+    queue_waits = [r["queue_wait_s"] for r in rows if r["queue_wait_s"] is not None]
+    summary = {
+        "tasks": len(rows),
+        "succeeded": sum(1 for r in rows if r["status"] == "succeeded"),
+        "failed": sum(1 for r in rows if r["status"] == "failed"),
+        "batches": len(batch_rows),
+        "documents": total_docs,
+        "wall_s": wall_s,
+        "server_busy_s": busy_s,
+        "server_idle_s": wall_s - busy_s if wall_s is not None else None,
+        "queue_wait_mean_s": sum(queue_waits) / len(queue_waits) if queue_waits else None,
+        "queue_wait_max_s": max(queue_waits) if queue_waits else None,
+        "ms_per_doc": busy_s * 1000 / total_docs if total_docs else None,
+        "docs_per_s_server": total_docs / busy_s if busy_s else None,
+        "progress_trace_totals_s": dict(sorted(step_totals.items(), key=lambda kv: -kv[1])),
+        "embedder_requests": embedder_requests if embedder_requests["total"] else None,
+    }
+    return {"summary": summary, "tasks": rows, "batches": batch_rows}
+
+
+def collect_timeline(client, task_uids: list[int] | None = None, *, index_uid: str | None = None, from_uid: int | None = None) -> dict:
+    """Fetch tasks (+ their batches) from the server and build the timeline report."""
+    tasks = fetch_tasks(client, task_uids, index_uid=index_uid, from_uid=from_uid)
+    batch_uids = sorted({t["batchUid"] for t in tasks if t.get("batchUid") is not None})
+    return build_timeline(tasks, fetch_batches(client, batch_uids))
+
+
+def plot_timeline(report: dict, out_path: Path) -> list[Path]:
+    """Gantt of tasks (queue wait vs processing) and, if available, total time per progress step."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rows = [r for r in report["tasks"] if r["enqueued_at"] and r["started_at"] and r["finished_at"]]
+    steps = report["summary"]["progress_trace_totals_s"]
+    n_axes = 2 if steps else 1
+    fig, axes = plt.subplots(1, n_axes, figsize=(7 * n_axes, max(3, 0.25 * len(rows) + 1)), squeeze=False)
+    ax = axes[0][0]
+    if rows:
+        t0 = min(parse_timestamp(r["enqueued_at"]) for r in rows)
+        for i, r in enumerate(rows):
+            enq = (parse_timestamp(r["enqueued_at"]) - t0).total_seconds()
+            start = (parse_timestamp(r["started_at"]) - t0).total_seconds()
+            fin = (parse_timestamp(r["finished_at"]) - t0).total_seconds()
+            ax.barh(i, start - enq, left=enq, color="#cccccc", label="queue wait" if i == 0 else None)
+            color = f"C{(r['batch_uid'] or 0) % 10}"
+            ax.barh(i, fin - start, left=start, color=color, label="processing (colour = batch)" if i == 0 else None)
+        ax.set_yticks(range(len(rows)))
+        ax.set_yticklabels([f"task {r['uid']} ({r['documents']} docs)" for r in rows], fontsize=7)
+        ax.invert_yaxis()
+    ax.set_xlabel("Seconds since first enqueue")
+    ax.set_title("Task timeline")
+    ax.legend(fontsize=8)
+    ax.grid(axis="x", alpha=0.3)
+
+    if steps:
+        ax2 = axes[0][1]
+        top = list(steps.items())[:12]
+        ax2.barh([name[-50:] for name, _ in top], [s for _, s in top], color="C1")
+        ax2.invert_yaxis()
+        ax2.set_xlabel("Seconds (summed over batches)")
+        ax2.set_title("Batch progress trace (top steps)")
+        ax2.tick_params(axis="y", labelsize=7)
+        ax2.grid(axis="x", alpha=0.3)
+
+    plt.tight_layout()
+    written = []
+    for ext in ("png", "svg"):
+        out = out_path.with_suffix(f".{ext}")
+        fig.savefig(out, dpi=150, bbox_inches="tight")
+        written.append(out)
+    plt.close(fig)
+    return written
+
+
+def write_report(report: dict, out_path: Path, *, chart: bool = True) -> list[Path]:
+    """Write <out>.json (+ chart .png/.svg). Returns written paths."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path = out_path.with_suffix(".json")
+    json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    written = [json_path]
+    if chart:
+        written += plot_timeline(report, out_path)
+    return written
+
+
+def print_summary(summary: dict) -> None:
+    def fmt(v, unit=""):
+        return f"{v:.2f}{unit}" if isinstance(v, float) else f"{v}{unit}"
+    print(f"{LOG_PREFIX} {summary['tasks']} tasks ({summary['succeeded']} succeeded, {summary['failed']} failed) in {summary['batches']} batches, {summary['documents']} docs")
+    print(f"{LOG_PREFIX} wall {fmt(summary['wall_s'], 's')} | server busy {fmt(summary['server_busy_s'], 's')} | idle {fmt(summary['server_idle_s'], 's')}")
+    print(f"{LOG_PREFIX} queue wait mean {fmt(summary['queue_wait_mean_s'], 's')} max {fmt(summary['queue_wait_max_s'], 's')} | {fmt(summary['ms_per_doc'], ' ms/doc')}")
+    for step, seconds in list(summary["progress_trace_totals_s"].items())[:8]:
+        print(f"{LOG_PREFIX}   {seconds:8.2f}s  {step}")
+    if summary["embedder_requests"]:
+        print(f"{LOG_PREFIX} embedder requests: {summary['embedder_requests']}")
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+    from complex_pdf_test.scale_test._common import get_client
+
+    parser = argparse.ArgumentParser(description="Per-task / per-batch ingestion timeline from Meilisearch metadata.")
+    parser.add_argument("--tasks", default=None, help="Comma-separated task uids")
+    parser.add_argument("--index", default=None, help="Index uid (with --from-uid) instead of explicit tasks")
+    parser.add_argument("--from-uid", type=int, default=None, help="Only tasks with uid >= this")
+    parser.add_argument("-o", "--output", type=Path, default=Path("task_timeline"), help="Output path stem (.json, .png, .svg)")
+    parser.add_argument("--no-chart", action="store_true")
+    args = parser.parse_args()
+    if not args.tasks and not args.index:
+        parser.error("give --tasks or --index")
+
+    uids = [int(u) for u in args.tasks.split(",")] if args.tasks else None
+    report = collect_timeline(get_client(), uids, index_uid=args.index, from_uid=args.from_uid)
+    print_summary(report["summary"])
+    for path in write_report(report, args.output, chart=not args.no_chart):
+        print(f"{LOG_PREFIX} Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Search over sharded layouts (federated multi-search, score-based merge), batched and cached query embeddings."""
+
+from .embedding_cache import EmbeddingCache
+from .federated import FederatedResult, federated_search, hit_score, merge_hits
+from .query_embedder import CoalescerStats, QueryEmbedder, mistral_batch_embedder, with_vector
+
+__all__ = [
+    "EmbeddingCache",
+    "FederatedResult",
+    "federated_search",
+    "hit_score",
+    "merge_hits",
+    "CoalescerStats",
+    "QueryEmbedder",
+    "mistral_batch_embedder",
+    "with_vector",
+]
@@ -0,0 +1,85 @@
+"""
+Query embeddings on disk, so popular queries skip the embedder round trip.
+
+One SQLite file; a row per (model, query text) with the vector as float32 bytes. The key is
+the query with whitespace collapsed, not lower-cased: Meilisearch embeds `q` as typed, and
+a vector is only reused for the exact text it was computed from. Vectors are tied to the
+embedding model, not to an index, so a reindex with the same model keeps them valid.
+
+Filled by load/prewarm.py (top queries of a log, before traffic reaches a new index) and by
+QueryEmbedder(cache=...) as it embeds; read by QueryEmbedder before it queues a text.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+_SPACE_RE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    query TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, query)
+);
+"""
+
+
+def cache_key(text: str) -> str:
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """Persistent (model, query) → vector map; safe to share between threads of one process."""
+
+    def __init__(self, path: str | Path, model: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model,)).fetchone()[0]
+
+    def get(self, text: str) -> list[float] | None:
+        return self.get_many([text]).get(text)
+
+    def get_many(self, texts: list[str]) -> dict[str, list[float]]:
+        """Cached vectors of the texts that have one (keys are the texts as given)."""
+        keys = {cache_key(t): t for t in texts}
+        out: dict[str, list[float]] = {}
+        items = list(keys)
+        with self._lock:
+            for i in range(0, len(items), 500):  # SQLite host parameter limit
+                part = items[i : i + 500]
+                rows = self._conn.execute(
+                    f"SELECT query, vector FROM embeddings WHERE model = ? AND query IN ({','.join('?' * len(part))})",
+                    (self.model, *part),
+                ).fetchall()
+                for query, blob in rows:
+                    out[keys[query]] = array("f", blob).tolist()
+        return out
+
+    def put_many(self, vectors: dict[str, list[float]]) -> None:
+        now = time.time()
+        rows = [(self.model, cache_key(t), len(v), array("f", v).tobytes(), now) for t, v in vectors.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
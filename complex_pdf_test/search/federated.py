@@ -0,0 +1,119 @@
+"""
+Search over a sharded layout (load/sharding.py): fan out, merge the hits by score.
+
+Per instance, the shards that live on it are queried with one federated multi-search
+(POST /multi-search with "federation", Meilisearch >= 1.10). The instance merges them by
+weighted ranking score. With several instances, the requests run in parallel and their
+hits are merged again by the same score, so one instance with N indexes and N instances
+with one index give the same order.
+
+Score normalisation: _rankingScore is in [0, 1] and depends only on the query and the
+document (matched words, typos, proximity, vector similarity). No corpus-wide statistics
+such as IDF enter it. Scores from different shards are therefore already on one scale and
+are compared as they are. Per-shard min-max rescaling would be wrong: a shard whose best
+hit is weak would get its top score raised to 1. What the merge must get right:
+  - the same weight on every shard (federationOptions.weight, default 1.0),
+  - each shard returns offset + limit hits, not limit / N: the global top k can all come
+    from a single shard,
+  - a document present on two shards (during a reshard) is kept once, with its best score.
+
+Hybrid and semantic queries are embedded by each instance (one embedder call per instance),
+unless params carry a precomputed "vector" (search/query_embedder.py).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..instrumentation import span
+from ..load.sharding import Shard, ShardLayout, shard_client
+
+LOG_PREFIX = "[federated]"
+# Per-query parameters that federation rejects (pagination is set once, on the federation)
+_PAGINATION = ("limit", "offset", "page", "hitsPerPage")
+
+
+@dataclass
+class FederatedResult:
+    hits: list[dict[str, Any]]
+    estimated_total_hits: int
+    wall_ms: float
+    # instance URL → {"wall_ms", "processing_ms", "shards"}
+    instances: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+def hit_score(hit: dict[str, Any]) -> float:
+    """Weighted ranking score of a hit (federated responses) or its _rankingScore."""
+    fed = hit.get("_federation") or {}
+    score = fed.get("weightedRankingScore", hit.get("_rankingScore"))
+    return float(score) if score is not None else 0.0
+
+
+def merge_hits(hit_lists: list[list[dict[str, Any]]], *, limit: int, offset: int = 0, id_field: str = "id") -> list[dict[str, Any]]:
+    """Hits of several shards / instances, best score first, one per document id."""
+    best: dict[Any, dict[str, Any]] = {}
+    for hits in hit_lists:
+        for hit in hits:
+            key = hit.get(id_field, id(hit))
+            if key not in best or hit_score(hit) > hit_score(best[key]):
+                best[key] = hit
+    ranked = sorted(best.values(), key=hit_score, reverse=True)
+    return ranked[offset : offset + limit]
+
+
+def _instance_search(
+    shards: list[Shard], query: str, params: dict[str, Any], *, limit: int, weights: dict[str, float] | None,
+) -> tuple[list[dict[str, Any]], int, dict[str, Any]]:
+    client = shard_client(shards[0])
+    queries = []
+    for shard in shards:
+        q = {"indexUid": shard.index_uid, "q": query, **params, "showRankingScore": True}
+        weight = (weights or {}).get(shard.index_uid)
+        if weight is not None:
+            q["federationOptions"] = {"weight": weight}
+        queries.append(q)
+    t0 = time.perf_counter()
+    response = client.multi_search(queries, federation={"limit": limit, "offset": 0})
+    wall_ms = (time.perf_counter() - t0) * 1000
+    stats = {"wall_ms": wall_ms, "processing_ms": response.get("processingTimeMs"), "shards": [s.index_uid for s in shards]}
+    return response.get("hits", []), int(response.get("estimatedTotalHits") or 0), stats
+
+
+def federated_search(
+    layout: ShardLayout,
+    query: str,
+    params: dict[str, Any] | None = None,
+    *,
+    key_value: Any | None = None,
+    weights: dict[str, float] | None = None,
+) -> FederatedResult:
+    """
+    Search every shard (or only key_value's shard, e.g. a tenant) and return the merged
+    top hits. params are the usual search parameters; limit / offset apply to the merged list.
+    """
+    params = dict(params or {})
+    limit = int(params.get("limit", 20))
+    offset = int(params.get("offset", 0))
+    for name in _PAGINATION:
+        params.pop(name, None)
+    groups = layout.by_instance(layout.shards_for(key_value))
+    t0 = time.perf_counter()
+    with span("search.federated", shards=sum(map(len, groups.values())), instances=len(groups)) as s:
+        if len(groups) == 1:
+            outcomes = [_instance_search(next(iter(groups.values())), query, params, limit=offset + limit, weights=weights)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                futures = [
+                    pool.submit(_instance_search, shards, query, params, limit=offset + limit, weights=weights)
+                    for shards in groups.values()
+                ]
+                outcomes = [f.result() for f in futures]
+        hits = merge_hits([o[0] for o in outcomes], limit=limit, offset=offset)
+        s.set(hits=len(hits))
+    return FederatedResult(
+        hits=hits,
+        estimated_total_hits=sum(o[1] for o in outcomes),
+        wall_ms=(time.perf_counter() - t0) * 1000,
+        instances={url: o[2] for url, o in zip(groups, outcomes)},
+    )
@@ -0,0 +1,266 @@
+"""
+Query embeddings coalesced into batches.
+
+Without it, every concurrent hybrid search makes its own embeddings call: Meilisearch
+embeds `q` for each search, one text per request. The Mistral embeddings endpoint takes
+an array of inputs. QueryEmbedder holds the queries that arrive within window_ms, or
+until max_batch are waiting, and embeds them in one request. The same text is sent once
+per batch. Each waiting search then gets its vector and passes it as the `vector` search
+parameter (with_vector), so Meilisearch does not call the embedder again.
+
+Under load, one request carries many queries, so the embedder's requests/s limit allows
+many more searches per second. With a single user, a query waits at most window_ms.
+CoalescerStats records batch sizes, coalescing wait and request time.
+
+With an EmbeddingCache (search/embedding_cache.py, filled ahead of traffic by
+load/prewarm.py), a cached query returns at once without joining a batch, and every
+vector the embedder returns is written to the cache.
+
+Usage (from project root):
+  uv run python complex_pdf_test/search/query_embedder.py --concurrency 64 --queries 1000 --window-ms 5 --compare
+  uv run python complex_pdf_test/search/query_embedder.py --standin lognormal:40,0.5 --rate-limit 20 --compare   offline
+"""
+
+import asyncio
+import sys
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+LOG_PREFIX = "[query_embedder]"
+DEFAULT_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH = 32
+
+EmbedBatchFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+def mistral_batch_embedder(base_url: str, api_key: str, model: str = "mistral-embed", http=None) -> EmbedBatchFn:
+    """Embed a list of texts in one Mistral embeddings request (or the stand-in via MISTRAL_BASE_URL)."""
+    import httpx
+
+    client = http or httpx.AsyncClient(timeout=30.0)
+
+    async def embed_batch(texts: list[str]) -> list[list[float]]:
+        r = await client.post(
+            f"{base_url.rstrip('/')}/embeddings",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": model, "input": texts},
+        )
+        r.raise_for_status()
+        data = sorted(r.json()["data"], key=lambda d: d.get("index", 0))
+        return [d["embedding"] for d in data]
+
+    return embed_batch
+
+
+def with_vector(params: dict[str, Any], vector: list[float]) -> dict[str, Any]:
+    """Search parameters with a precomputed query vector (hybrid / semantic keep their embedder name)."""
+    return {**params, "vector": vector}
+
+
+@dataclass
+class CoalescerStats:
+    queries: int = 0
+    batches: int = 0
+    texts: int = 0  # distinct texts sent (duplicates in a batch are embedded once)
+    errors: int = 0
+    cache_hits: int = 0
+    flushes: Counter = field(default_factory=Counter)  # "full" / "window"
+    sizes: Counter = field(default_factory=Counter)  # queries per batch → batches
+    wait_ms: deque = field(default_factory=lambda: deque(maxlen=10_000))  # enqueue → request sent
+    request_ms: deque = field(default_factory=lambda: deque(maxlen=10_000))
+
+    def summary(self) -> dict[str, Any]:
+        from complex_pdf_test.results import latency_summary
+
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "texts": self.texts,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "mean_batch": sum(n * c for n, c in self.sizes.items()) / self.batches if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.sizes.items())),
+            "flushes": dict(self.flushes),
+            "wait_ms": latency_summary(list(self.wait_ms)),
+            "request_ms": latency_summary(list(self.request_ms)),
+        }
+
+
+class QueryEmbedder:
+    """Coalesces concurrent embed() calls into batched embedding requests (see module docstring)."""
+
+    def __init__(
+        self,
+        embed_batch: EmbedBatchFn,
+        *,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_concurrent: int = 8,
+        cache=None,
+    ):
+        self.embed_batch = embed_batch
+        self.cache = cache
+        self.window_s = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.stats = CoalescerStats()
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    async def embed(self, text: str) -> list[float]:
+        self.stats.queries += 1
+        if self.cache is not None:
+            vector = self.cache.get(text)
+            if vector is not None:
+                self.stats.cache_hits += 1
+                return vector
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch or self.window_s <= 0:
+            self._dispatch("full")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._dispatch, "window")
+        return await future
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return list(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    def _dispatch(self, reason: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.stats.flushes[reason] += 1
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future, float]]) -> None:
+        """Embed one batch; whatever goes wrong, every caller still waiting gets the exception."""
+        try:
+            await self._embed(batch)
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            self.stats.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _embed(self, batch: list[tuple[str, asyncio.Future, float]]) -> None:
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        async with self._slots:
+            sent = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.stats.wait_ms.append((sent - enqueued) * 1000)
+            vectors = await self.embed_batch(texts)
+            self.stats.request_ms.append((time.perf_counter() - sent) * 1000)
+        if len(vectors) != len(texts):
+            raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(texts)} texts")
+        self.stats.batches += 1
+        self.stats.texts += len(texts)
+        self.stats.sizes[len(batch)] += 1
+        by_text = dict(zip(texts, vectors))
+        for text, future, _ in batch:
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(by_text[text])
+        if self.cache is not None:
+            self.cache.put_many(by_text)  # after the callers: a cache failure is counted, not theirs
+
+    async def aclose(self) -> None:
+        """Send what is still waiting and wait for the requests in flight."""
+        self._dispatch("window")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _load(embed: Callable[[str], Awaitable[list[float]]], queries: list[str], concurrency: int) -> tuple[list[float], float]:
+    """Run the queries with `concurrency` concurrent callers; returns per-query ms and wall seconds."""
+    it = iter(queries)
+    samples: list[float] = []
+
+    async def caller() -> None:
+        for q in it:
+            t0 = time.perf_counter()
+            try:
+                await embed(q)
+            except Exception:
+                continue  # counted in CoalescerStats.errors (e.g. 429 from the rate limit)
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return samples, time.perf_counter() - t0
+
+
+def _ms(value: float | None) -> str:
+    return f"{value:.1f}" if value is not None else "n/a"
+
+
+async def _main_async(args) -> None:
+    import httpx
+
+    from config import load_settings
+    from complex_pdf_test.results import latency_summary
+    from complex_pdf_test.scale_test.synthetic_corpus import SyntheticCorpus
+
+    settings = load_settings()
+    base_url = settings.mistral_base_url
+    server = None
+    if args.standin:
+        from complex_pdf_test.standin.fake_mistral import FakeMistralConfig, LatencySpec, start_in_thread
+
+        server = start_in_thread(FakeMistralConfig(latency=LatencySpec.parse(args.standin), rate_limit_rps=args.rate_limit))
+        base_url = server.base_url
+    queries = SyntheticCorpus.from_seed_file().queries(args.queries)
+    configs = [("coalesced", args.window_ms, args.max_batch)]
+    if args.compare:
+        configs.insert(0, ("per query", 0.0, 1))
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=args.concurrency)) as http:
+        embed_batch = mistral_batch_embedder(base_url, settings.mistral_api_key, settings.mistral_embedding_model, http)
+        for name, window_ms, max_batch in configs:
+            embedder = QueryEmbedder(embed_batch, window_ms=window_ms, max_batch=max_batch, max_concurrent=args.concurrency)
+            samples, wall_s = await _load(embedder.embed, queries, args.concurrency)
+            await embedder.aclose()
+            s, lat = embedder.stats.summary(), latency_summary(samples)
+            print(f"{LOG_PREFIX} {name:10} window {window_ms:g} ms, max batch {max_batch}: {len(samples) / wall_s:7.1f} queries/s, "
+                  f"{s['batches']} requests (mean batch {s['mean_batch']:.1f}), errors {s['errors']}, "
+                  f"latency p50 {_ms(lat.get('p50'))} / p95 {_ms(lat.get('p95'))} ms, coalescing wait p95 {_ms(s['wait_ms'].get('p95'))} ms")
+            print(f"{LOG_PREFIX}   batch sizes {s['batch_sizes']}")
+    if server is not None:
+        server.shutdown()
+
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    parser = argparse.ArgumentParser(description="Concurrent query embeddings, one request per query vs coalesced batches.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent callers")
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--compare", action="store_true", help="Also run one request per query first")
+    parser.add_argument("--standin", default=None, help="Use an in-process fake Mistral with this latency spec (e.g. fixed:40)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Stand-in requests/s limit (429 beyond)")
+    args = parser.parse_args()
+    asyncio.run(_main_async(args))
+
+
+if __name__ == "__main__":
+    main()
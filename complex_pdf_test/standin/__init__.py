@@ -0,0 +1 @@
+"""Local stand-in servers (fake Mistral API) for reproducible, offline performance tests."""
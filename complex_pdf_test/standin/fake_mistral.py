@@ -0,0 +1,404 @@
+"""
+Fake Mistral API for offline / air-gapped performance tests.
+
+Serves the subset of the Mistral API this repo uses:
+  - POST /v1/embeddings        deterministic hash-based vectors (same text → same vector;
+                               texts sharing words get correlated vectors)
+  - POST /v1/chat/completions  streaming (SSE) or plain chat completions
+  - GET  /v1/models            one chat model + one embedding model
+  - POST /chats/{workspace}/chat/completions
+                               Meilisearch chat-route shape: _meiliSearchProgress /
+                               _meiliSearchSources tool-call events after a simulated
+                               search delay, then the streamed answer (for chat benchmarks
+                               without a Meilisearch server)
+  - GET  /_standin/stats       request / error / 429 counters (for load-test reports)
+
+Injectable behaviour: latency distribution, random 5xx and 429 rates, and a token-bucket
+rate limit (requests/s). Point Meilisearch and the scripts at it with MISTRAL_BASE_URL
+(and MEILISEARCH_MISTRAL_BASE_URL if Meilisearch runs in Docker), see README.
+
+Usage (from project root):
+  uv run python complex_pdf_test/standin/fake_mistral.py --port 8089
+  uv run python complex_pdf_test/standin/fake_mistral.py --latency lognormal:40,0.6 --rate-429 0.02 --rate-limit 20
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOG_PREFIX = "[fake_mistral]"
+EMBED_MODEL = "mistral-embed"
+CHAT_MODEL = "mistral-large-latest"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_CHAT_WORKSPACE_RE = re.compile(r"^/chats/([^/]+)/chat/completions$")
+
+
+@dataclass(frozen=True)
+class LatencySpec:
+    """
+    Latency distribution in ms, parsed from "fixed:MS", "uniform:LOW,HIGH",
+    "normal:MEAN,STD" or "lognormal:MEDIAN,SIGMA". "0" / "" means no added latency.
+    """
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencySpec":
+        spec = (spec or "0").strip()
+        if ":" not in spec:
+            return cls("fixed", (float(spec),))
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(x) for x in raw.split(","))
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec {spec!r} (e.g. fixed:50, uniform:20,80, lognormal:40,0.5)")
+        return cls(kind, params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.params))
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+@dataclass
+class FakeMistralConfig:
+    dimensions: int = 1024
+    latency: LatencySpec = field(default_factory=LatencySpec)
+    per_input_latency_ms: float = 0.0  # extra latency per embedded text (batch cost)
+    error_rate: float = 0.0  # fraction of requests answered 500
+    rate_429: float = 0.0  # fraction of requests answered 429 (random throttling)
+    rate_limit_rps: float = 0.0  # token bucket; 0 = unlimited
+    token_delay_ms: float = 15.0  # delay between streamed chat tokens
+    answer_tokens: int = 60
+    chat_search_ms: float = 0.0  # simulated index search before the answer on /chats/... routes
+    api_key: str | None = None  # when set, requests must carry "Authorization: Bearer <api_key>"
+    seed: int = 0
+
+
+def hash_embedding(text: str, dimensions: int) -> list[float]:
+    """
+    Deterministic unit vector for text: signed feature hashing of lower-cased word unigrams
+    and bigrams. Identical texts map to identical vectors, overlapping texts correlate.
+    """
+    vec = [0.0] * dimensions
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        features = [text]
+    for feat in features:
+        digest = hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest()
+        idx, sign = struct.unpack("<IxxxB", digest[:8])
+        vec[idx % dimensions] += 1.0 if sign & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class _TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class FakeMistralServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: FakeMistralConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.bucket = _TokenBucket(config.rate_limit_rps)
+        self.stats_lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "requests": 0,
+            "embeddings_requests": 0,
+            "embedded_inputs": 0,
+            "chat_requests": 0,
+            "errors_500": 0,
+            "throttled_429": 0,
+        }
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.root_url}/v1"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def sample_latency_ms(self) -> float:
+        with self.rng_lock:
+            return self.config.latency.sample_ms(self.rng)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeMistralServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:  # quiet by default
+        pass
+
+    # ---- helpers ----
+    def _send_json(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw or b"{}")
+
+    def _admit(self) -> bool:
+        """Auth, rate limit and injected failures. Returns False if a response was already sent."""
+        srv = self.server
+        srv.count("requests")
+        cfg = srv.config
+        if cfg.api_key and self.headers.get("Authorization") != f"Bearer {cfg.api_key}":
+            self._send_json(401, {"message": "Unauthorized"})
+            return False
+        if not srv.bucket.try_acquire() or (cfg.rate_429 and srv.random() < cfg.rate_429):
+            srv.count("throttled_429")
+            self._send_json(429, {"message": "Requests rate limit exceeded"}, {"Retry-After": "1"})
+            return False
+        if cfg.error_rate and srv.random() < cfg.error_rate:
+            srv.count("errors_500")
+            self._send_json(500, {"message": "Injected internal error"})
+            return False
+        return True
+
+    # ---- routes ----
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [
+                {"id": CHAT_MODEL, "object": "model", "owned_by": "standin"},
+                {"id": EMBED_MODEL, "object": "model", "owned_by": "standin"},
+            ]})
+        elif path == "/_standin/stats":
+            with self.server.stats_lock:
+                self._send_json(200, dict(self.server.stats))
+        else:
+            self._send_json(404, {"message": f"Not found: {path}"})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?")[0].rstrip("/")
+        try:
+            body = self._read_json()
+        except json.JSONDecodeError:
+            self._send_json(400, {"message": "Invalid JSON body"})
+            return
+        if path == "/v1/embeddings":
+            self._embeddings(body)
+        elif path == "/v1/chat/completions":
+            self._chat(body)
+        elif _CHAT_WORKSPACE_RE.match(path):
+            self._chat(body, workspace=_CHAT_WORKSPACE_RE.match(path).group(1))
+        else:
+            self._send_json(404, {"message": f"Not found: {path}"})
+
+    def _embeddings(self, body: dict) -> None:
+        if not self._admit():
+            return
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        srv, cfg = self.server, self.server.config
+        srv.count("embeddings_requests")
+        srv.count("embedded_inputs", len(inputs))
+        time.sleep((srv.sample_latency_ms() + cfg.per_input_latency_ms * len(inputs)) / 1000)
+        data = [
+            {"object": "embedding", "index": i, "embedding": hash_embedding(str(text), cfg.dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        n_tokens = sum(len(_TOKEN_RE.findall(str(t))) for t in inputs)
+        self._send_json(200, {
+            "id": uuid.uuid4().hex,
+            "object": "list",
+            "model": body.get("model", EMBED_MODEL),
+            "data": data,
+            "usage": {"prompt_tokens": n_tokens, "total_tokens": n_tokens, "completion_tokens": 0},
+        })
+
+    def _answer_tokens(self, messages: list[dict]) -> list[str]:
+        question = ""
+        for m in reversed(messages or []):
+            if m.get("role") == "user" and isinstance(m.get("content"), str):
+                question = m["content"]
+                break
+        words = _TOKEN_RE.findall(question) or ["question"]
+        n = self.server.config.answer_tokens
+        return ["Stand-in", " answer:"] + [f" {words[i % len(words)]}" for i in range(max(n - 2, 0))]
+
+    def _chat(self, body: dict, workspace: str | None = None) -> None:
+        if not self._admit():
+            return
+        srv, cfg = self.server, self.server.config
+        srv.count("chat_requests")
+        if workspace is None:
+            time.sleep(srv.sample_latency_ms() / 1000)
+        tokens = self._answer_tokens(body.get("messages", []))
+        completion_id = f"cmpl-{uuid.uuid4().hex[:16]}"
+        model = body.get("model", CHAT_MODEL)
+        created = int(time.time())
+        usage = {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+
+        if not body.get("stream") and workspace is None:
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: dict, finish: str | None = None, with_usage: bool = False) -> bytes:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if with_usage:
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        def tool_call(name: str, arguments: dict) -> bytes:
+            call = {"index": 0, "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)}}
+            return event({"tool_calls": [call]})
+
+        try:
+            if workspace is not None:
+                # Meilisearch: progress event, index search, sources, then the LLM call
+                query = "".join(tokens[2:6]).strip()
+                self.wfile.write(tool_call("_meiliSearchProgress", {
+                    "call_id": uuid.uuid4().hex[:8], "function_name": "_meiliSearchInIndex",
+                    "function_parameters": json.dumps({"index_uid": workspace, "q": query}),
+                }))
+                self.wfile.flush()
+                time.sleep(cfg.chat_search_ms / 1000)
+                self.wfile.write(tool_call("_meiliSearchSources", {
+                    "call_id": uuid.uuid4().hex[:8],
+                    "documents": [{"id": f"standin_c{i}", "chunk_text": query} for i in range(3)],
+                }))
+                self.wfile.flush()
+                time.sleep(srv.sample_latency_ms() / 1000)
+            self.wfile.write(event({"role": "assistant", "content": ""}))
+            self.wfile.flush()
+            for tok in tokens:
+                time.sleep(cfg.token_delay_ms / 1000)
+                self.wfile.write(event({"content": tok}))
+                self.wfile.flush()
+            self.wfile.write(event({}, finish="stop", with_usage=True))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled the stream
+
+
+def start_in_thread(config: FakeMistralConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> FakeMistralServer:
+    """Start a fake server on a background thread (port 0 = pick a free port). Call .shutdown() to stop."""
+    server = FakeMistralServer((host, port), config or FakeMistralConfig())
+    threading.Thread(target=server.serve_forever, name="fake-mistral", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="Fake Mistral API (embeddings + streaming chat) with injectable latency.")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address (0.0.0.0 so a Docker Meilisearch can reach it)")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dimensions", type=int, default=1024, help="Embedding dimensions (must match the embedder config)")
+    parser.add_argument("--latency", default="0", help="Per-request latency: fixed:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--per-input-latency", type=float, default=0.0, help="Extra ms per embedded text in a batch")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Token-bucket limit in requests/s (0 = unlimited)")
+    parser.add_argument("--token-delay", type=float, default=15.0, help="ms between streamed chat tokens")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="Tokens per chat answer")
+    parser.add_argument("--chat-search", type=float, default=0.0, help="Simulated search ms on /chats/{workspace}/chat/completions")
+    parser.add_argument("--api-key", default=None, help="Require this bearer key (default: accept any)")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for latency / failure injection")
+    args = parser.parse_args()
+
+    config = FakeMistralConfig(
+        dimensions=args.dimensions,
+        latency=LatencySpec.parse(args.latency),
+        per_input_latency_ms=args.per_input_latency,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        rate_limit_rps=args.rate_limit,
+        token_delay_ms=args.token_delay,
+        answer_tokens=args.answer_tokens,
+        chat_search_ms=args.chat_search,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    server = FakeMistralServer((args.host, args.port), config)
+    print(f"{LOG_PREFIX} Listening on http://{args.host}:{args.port}/v1 (dimensions={config.dimensions}, latency={args.latency})")
+    print(f"{LOG_PREFIX} Set MISTRAL_BASE_URL=http://localhost:{args.port}/v1 in .env", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{LOG_PREFIX} Stopped. Stats: {server.stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,11 @@ class Settings:
     meilisearch_url: str
     meilisearch_api_key: str
     meilisearch_index: str
+    # Mistral API root as called by our scripts, and as called by Meilisearch (embedder / chat
+    # workspace). They differ when Meilisearch runs in Docker and Mistral is a local stand-in.
+    mistral_base_url: str = "https://api.mistral.ai/v1"
+    meilisearch_mistral_base_url: str = "https://api.mistral.ai/v1"
+    mistral_embedding_dimensions: int = 1024
 
 
 def load_settings() -> Settings:
@@ -23,6 +28,11 @@ def load_settings() -> Settings:
             "MISTRAL_API_KEY is missing. Set it in .env or your shell environment."
         )
 
+    mistral_base_url = os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1").strip().rstrip("/")
+    meilisearch_mistral_base_url = (
+        os.getenv("MEILISEARCH_MISTRAL_BASE_URL", "").strip().rstrip("/") or mistral_base_url
+    )
+
     return Settings(
         mistral_api_key=mistral_api_key,
         mistral_embedding_model=os.getenv("MISTRAL_EMBEDDING_MODEL", "mistral-embed"),
@@ -30,4 +40,7 @@ def load_settings() -> Settings:
         meilisearch_url=os.getenv("MEILISEARCH_URL", "http://localhost:7700").strip(),
         meilisearch_api_key=os.getenv("MEILISEARCH_API_KEY", "").strip(),
         meilisearch_index=os.getenv("MEILISEARCH_INDEX", "documents"),
+        mistral_base_url=mistral_base_url,
+        meilisearch_mistral_base_url=meilisearch_mistral_base_url,
+        mistral_embedding_dimensions=int(os.getenv("MISTRAL_EMBEDDING_DIMENSIONS", "1024")),
     )
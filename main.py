@@ -1,5 +1,186 @@
-def main():
-    print("Hello from meilisearch-mistral!")
+"""
+Single entry point for the project tools. Heavy dependencies (docling, matplotlib,
+meilisearch, mistralai) are imported only by the command that needs them.
+
+Usage (from project root):
+  uv run python main.py parse complex_pdf_test/mistral-doc.pdf [--load]   PDF → chunks JSON (Docling)
+  uv run python main.py chunk notes.md [-o notes.chunks.json]           Markdown / text → chunks JSON
+  uv run python main.py load complex_pdf_test/mistral-doc.chunks.json   chunks JSON → pdf_chunks
+  uv run python main.py shards --shards 4 [--urls u1,u2] -o shards.json  shard layout (load / search --layout)
+  uv run python main.py migrate export|import [...]                     index + vectors → files → index, no re-embedding
+  uv run python main.py prewarm queries.log --index I [--swap-with LIVE] top queries of a log → cached embeddings, warm index
+  uv run python main.py search "question" [--limit N] [--layout F]      hybrid search, print chunks
+  uv run python main.py jobs add|work|status|retry|serve [...]           resumable ingestion of many PDFs
+  uv run python main.py parse-server [--workers N] [--port 8090]         resident Docling parse service
+  uv run python main.py canary [--rate 1] [--alert hybrid:p95>800]       continuous search probe, /metrics on :9464
+  uv run python main.py benchmark hybrid|keyword|chat|params|chunking|embed [...]
+  uv run python main.py chat ask|setup|rag|async|cache [...]
+  uv run python main.py scale test|sweep|shards|mixed|resources|timeline|plot [...]
+  uv run python main.py imports [--modules m1,m2]                       cold import time per command
+"""
+
+import importlib
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# command → module whose main() handles it (arguments are passed through)
+COMMANDS: dict[str, str] = {
+    "parse": "complex_pdf_test.run_pipeline",
+    "search": "complex_pdf_test.audit.search_chunks_for_query",
+    "jobs": "complex_pdf_test.jobs.run_jobs",
+    "parse-server": "complex_pdf_test.pipeline.parse_server",
+    "shards": "complex_pdf_test.load.sharding",
+    "migrate": "complex_pdf_test.load.migrate",
+    "prewarm": "complex_pdf_test.load.prewarm",
+    "canary": "complex_pdf_test.audit.search_canary",
+}
+GROUPS: dict[str, dict[str, str]] = {
+    "benchmark": {
+        "hybrid": "complex_pdf_test.audit.benchmark_hybrid_latency",
+        "keyword": "complex_pdf_test.audit.benchmark_keyword_latency",
+        "chat": "complex_pdf_test.chat.benchmark_chat_latency",
+        "params": "complex_pdf_test.audit.search_param_sweep",
+        "chunking": "complex_pdf_test.audit.chunking_sweep",
+        "embed": "complex_pdf_test.search.query_embedder",
+    },
+    "chat": {
+        "ask": "complex_pdf_test.chat.ask_chat",
+        "setup": "complex_pdf_test.chat.setup_meilisearch_chat",
+        "rag": "complex_pdf_test.chat.rag_chat",
+        "async": "complex_pdf_test.chat.async_client",
+        "cache": "complex_pdf_test.chat.answer_cache",
+    },
+    "scale": {
+        "test": "complex_pdf_test.scale_test.run_scale_test",
+        "sweep": "complex_pdf_test.scale_test.run_scale_sweep",
+        "shards": "complex_pdf_test.scale_test.run_shard_benchmark",
+        "mixed": "complex_pdf_test.scale_test.run_mixed_load",
+        "resources": "complex_pdf_test.scale_test.resource_monitor",
+        "timeline": "complex_pdf_test.scale_test.task_timeline",
+        "plot": "complex_pdf_test.scale_test.plot_scale_comparison",
+    },
+}
+HEAVY_MODULES = ["docling", "torch", "matplotlib", "meilisearch", "mistralai", "httpx", "numpy", "requests"]
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(.+)$")
+
+
+def _delegate(module_name: str, prog: str, argv: list[str]) -> None:
+    module = importlib.import_module(module_name)
+    sys.argv = [prog, *argv]
+    module.main()
+
+
+def _chunk(argv: list[str]) -> None:
+    """Markdown / text file → chunks JSON with the pipeline's normalize + chunk + build (no Docling)."""
+    import argparse
+
+    from complex_pdf_test.pipeline import build_documents, chunk_text, normalize_text
+
+    parser = argparse.ArgumentParser(prog="main.py chunk", description=_chunk.__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("-o", "--output", type=Path, default=None, help="Output JSON (default: <stem>.chunks.json)")
+    parser.add_argument("--max-chars", type=int, default=1200)
+    parser.add_argument("--overlap", type=int, default=120)
+    args = parser.parse_args(argv)
+    text = normalize_text(args.path.read_text(encoding="utf-8"))
+    chunks = chunk_text(text, doc_id=args.path.stem, source_file=args.path.name, max_chars=args.max_chars, overlap_chars=args.overlap)
+    out = args.output or args.path.with_suffix(".chunks.json")
+    with out.open("w", encoding="utf-8") as fh:
+        json.dump(build_documents(chunks), fh, ensure_ascii=False, indent=2)
+    print(f"Chunks: {len(chunks)}\nOutput: {out}")
+
+
+def _load(argv: list[str]) -> None:
+    layout = None
+    if len(argv) == 3 and argv[1] == "--layout":
+        argv, layout = argv[:1], argv[2]
+    if len(argv) != 1:
+        raise SystemExit("Usage: main.py load <chunks.json> [--layout shards.json]")
+    from complex_pdf_test.load import load_from_json_path
+
+    load_from_json_path(argv[0], layout)
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """Cold import of `module` in a fresh interpreter: (cumulative ms from -X importtime, heavy modules it loaded)."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+        raise RuntimeError(err)
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m and m.group(3).strip() == module:
+            cumulative_us = int(m.group(2))
+    return cumulative_us / 1000, [m for m in proc.stdout.strip().split(",") if m]
+
+
+def _imports(argv: list[str]) -> None:
+    """Cold import time of every command module (and the heavy dependencies each one pulls in)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py imports", description=_imports.__doc__)
+    parser.add_argument("--modules", default=None, help="Comma-separated modules (default: all command modules + heavy deps)")
+    args = parser.parse_args(argv)
+    if args.modules:
+        modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    else:
+        modules = ["complex_pdf_test.pipeline", "complex_pdf_test.load", "complex_pdf_test.search", "complex_pdf_test.jobs", *COMMANDS.values()]
+        modules += [m for group in GROUPS.values() for m in group.values()]
+        modules += HEAVY_MODULES
+    print(f"{'MODULE':52} {'IMPORT MS':>10}  HEAVY DEPENDENCIES LOADED")
+    for module in modules:
+        try:
+            ms, heavy = measure_import(module)
+        except RuntimeError as e:
+            print(f"{module:52} {'-':>10}  ({e})")
+            continue
+        print(f"{module:52} {ms:10.1f}  {', '.join(heavy) or '-'}")
+
+
+def _usage() -> str:
+    lines = [__doc__.strip(), "", "Commands:"]
+    lines += [f"  {name:10} {module}" for name, module in COMMANDS.items()]
+    lines += ["  chunk      (built in)", "  load       (built in)", "  imports    (built in)"]
+    for group, tools in GROUPS.items():
+        lines += [f"  {group} {tool:12} {module}" for tool, module in tools.items()]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage())
+        return
+    command, rest = argv[0], argv[1:]
+
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
+
+    if command in COMMANDS:
+        _delegate(COMMANDS[command], f"main.py {command}", rest)
+    elif command in GROUPS:
+        tools = GROUPS[command]
+        if not rest or rest[0] not in tools:
+            raise SystemExit(f"Usage: main.py {command} {{{','.join(tools)}}} [args...]")
+        _delegate(tools[rest[0]], f"main.py {command} {rest[0]}", rest[1:])
+    elif command == "chunk":
+        _chunk(rest)
+    elif command == "load":
+        _load(rest)
+    elif command == "imports":
+        _imports(rest)
+    else:
+        raise SystemExit(f"Unknown command {command!r}.\n\n{_usage()}")
 
 
 if __name__ == "__main__":
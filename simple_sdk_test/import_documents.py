@@ -16,12 +16,12 @@ def main() -> None:
                 "mistral": {
                     "source": "rest",
                     "apiKey": settings.mistral_api_key,
-                    "dimensions": 1024,
+                    "dimensions": settings.mistral_embedding_dimensions,
                     "documentTemplate": (
                         "{% if doc.title %}Title: {{ doc.title }}. {% endif %}"
                         "{% if doc.content %}Content: {{ doc.content | truncatewords: 40 }}{% endif %}"
                     ),
-                    "url": "https://api.mistral.ai/v1/embeddings",
+                    "url": f"{settings.meilisearch_mistral_base_url}/embeddings",
                     "request": {
                         "model": settings.mistral_embedding_model,
                         "input": ["{{text}}", "{{..}}"],